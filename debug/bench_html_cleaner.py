@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Micro-benchmark da limpeza de HTML usada por Article.to_html.
+
+Compara a implementação anterior (várias passagens de re.sub com padrões
+recompilados a cada chamada) com `clean_content`, sobre os artigos em
+output/, e confirma que o resultado é idêntico.
+
+Uso: python debug/bench_html_cleaner.py [repetições]
+
+Autor: Descomplicar - Agência de Aceleração Digital
+https://descomplicar.pt
+"""
+
+import sys
+import os
+import re
+import timeit
+from pathlib import Path
+
+# Adicionar diretório pai ao path para importar os módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.generators.content_generator import SECTION_TITLES, clean_content
+
+def legacy_clean_content(content: str) -> str:
+    """Implementação anterior, mantida aqui apenas para comparação."""
+    content = re.sub(r'</?(?:html|body|article|section)[^>]*>', '', content)
+    content = re.sub(r'<[^>]*?/>', '', content)
+    content = re.sub(r'<h1>.*?</h1>', '', content)
+    for title in SECTION_TITLES.values():
+        content = re.sub(f'<h2>{title}</h2>', '', content)
+    content = re.sub(r'```html\s*', '', content)
+    content = re.sub(r'```\s*', '', content)
+    content = re.sub(r'<h3>(.*?)</h3>\s*<p></h3>', r'<h3>\1</h3>', content)
+    content = re.sub(r'<h3></p>', '</p>', content)
+    content = re.sub(r'\s+', ' ', content)
+    return content.strip()
+
+def load_samples() -> list:
+    """Artigos de output/, inteiros e divididos em seções e parágrafos."""
+    samples = []
+    for path in sorted(Path('output').glob('*.html')):
+        html = path.read_text(encoding='utf-8')
+        samples.append(html)
+        samples.extend(re.split(r'(?=<h2>)', html))
+        samples.extend(re.findall(r'<p>.*?</p>', html, re.DOTALL))
+    return samples
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    samples = load_samples()
+    if not samples:
+        print("Nenhum ficheiro HTML encontrado em output/")
+        return 1
+
+    mismatches = sum(legacy_clean_content(s) != clean_content(s) for s in samples)
+    size_kb = sum(len(s) for s in samples) / 1024
+    print(f"{len(samples)} amostras ({size_kb:.0f} KB), {mismatches} resultados diferentes")
+
+    legacy = timeit.timeit(lambda: [legacy_clean_content(s) for s in samples], number=repeat)
+    current = timeit.timeit(lambda: [clean_content(s) for s in samples], number=repeat)
+    print(f"Anterior: {legacy / repeat * 1000:.2f} ms por ronda")
+    print(f"Atual:    {current / repeat * 1000:.2f} ms por ronda")
+    print(f"Ganho:    {legacy / current:.2f}x")
+    return 1 if mismatches else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
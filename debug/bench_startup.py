@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Relatório do tempo de arranque (python -X importtime) dos pontos de entrada.
+
+Para cada módulo importa-o num processo novo, soma o tempo de importação
+reportado pelo interpretador, lista os módulos mais lentos e indica que
+dependências pesadas foram carregadas.
+
+Uso: python debug/bench_startup.py [módulo ...] [--top N] [--repeat N]
+
+Com --repeat, cada módulo é importado N vezes e fica a medição mais rápida,
+para reduzir o ruído do sistema de ficheiros e do escalonador.
+
+Autor: Descomplicar - Agência de Aceleração Digital
+https://descomplicar.pt
+"""
+
+import os
+import re
+import sys
+import subprocess
+from typing import Dict, List, Tuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Pontos de entrada medidos por omissão
+DEFAULT_MODULES = [
+    'src.main',
+    'src.batch',
+    'src.generators.content_generator',
+    'src.utils.wordpress',
+    'src.utils.image',
+    'src.integrations.wordpress_client',
+]
+
+# Dependências que não devem ser carregadas sem necessidade
+HEAVY_MODULES = ['PIL', 'bs4', 'wordpress_xmlrpc', 'crewai', 'aiohttp', 'dotenv']
+
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+def import_times(module: str) -> Tuple[int, List[Tuple[int, int, str]], str]:
+    """
+    Importa um módulo num processo novo com -X importtime.
+
+    Args:
+        module: Nome do módulo
+
+    Returns:
+        Tuplo (microssegundos totais, [(próprio, acumulado, módulo)], erro)
+    """
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT,
+        capture_output=True,
+        text=True
+    )
+    entries = []
+    total = 0
+    for line in process.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            entries.append((int(match.group(1)), int(match.group(2)), match.group(4)))
+            # Só os módulos de nível superior (um espaço) entram no total
+            if len(match.group(3)) == 1:
+                total += int(match.group(2))
+
+    error = ''
+    if process.returncode:
+        error = process.stderr.strip().splitlines()[-1]
+    return total, entries, error
+
+def main() -> int:
+    args = sys.argv[1:]
+    options = {'--top': 5, '--repeat': 3}
+    for option in options:
+        if option in args:
+            index = args.index(option)
+            options[option] = int(args[index + 1])
+            del args[index:index + 2]
+    top = options['--top']
+    modules = args or DEFAULT_MODULES
+
+    for module in modules:
+        runs = [import_times(module) for _ in range(max(1, options['--repeat']))]
+        total, entries, error = min(runs, key=lambda run: run[0])
+        loaded = {name.split('.')[0] for _, _, name in entries}
+        heavy = [name for name in HEAVY_MODULES if name in loaded]
+        print(f"{module}: {total / 1000:.1f} ms")
+        if error:
+            print(f"  erro: {error}")
+        print(f"  dependências pesadas: {', '.join(heavy) or 'nenhuma'}")
+        slowest = sorted(entries, key=lambda entry: entry[0], reverse=True)[:top]
+        for own, _, name in slowest:
+            print(f"    {own / 1000:7.1f} ms  {name}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
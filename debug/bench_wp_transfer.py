@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Mede os bytes transferidos com o WordPress por publicação.
+
+Publica o mesmo artigo como rascunho duas vezes, pelo caminho por omissão
+de `create_post`: com as respostas completas da API REST e com os campos
+limitados por _fields (sem o eco do conteúdo renderizado). Mostra os
+bytes enviados e recebidos em cada caso. Cada passagem usa um índice de
+media vazio, para que a imagem seja de facto enviada nas duas. Os
+rascunhos e as imagens criados são apagados no fim (exceto com --keep).
+
+Requer as credenciais WP_URL/WP_USERNAME/WP_APP_PASSWORD no .env.
+
+Uso: python debug/bench_wp_transfer.py [artigo.html] [--image imagem.webp] [--keep]
+
+Autor: Descomplicar - Agência de Aceleração Digital
+https://descomplicar.pt
+"""
+
+import os
+import sys
+import glob
+import tempfile
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils import http_client, wordpress
+from src.utils.media_index import MediaIndex
+from src.utils.wordpress import WordPressClient
+
+def publish(client: WordPressClient, html: str, image: str, trim: bool, media_path: str) -> dict:
+    """
+    Publica um rascunho e devolve o tráfego com o WordPress.
+
+    Args:
+        client: Cliente WordPress
+        html: Conteúdo do artigo
+        image: Caminho da imagem destacada (ou None)
+        trim: Se True, usa _fields nas respostas
+        media_path: Ficheiro do índice de media desta passagem
+
+    Returns:
+        Dicionário com 'post', 'requests', 'sent' e 'received'
+    """
+    wordpress.TRIM_FIELDS = trim
+    # Um índice novo por passagem: senão a segunda reutilizaria a imagem
+    # enviada pela primeira e mediria menos um upload
+    client.media = MediaIndex(client.api_url, path=media_path)
+    http_client.transfer_stats.reset()
+    post = client.create_post(
+        title=f"Teste de tráfego ({'_fields' if trim else 'completo'})",
+        content=html,
+        status="draft",
+        featured_image=image
+    )
+    stats = http_client.transfer_stats.snapshot().get(urlsplit(client.api_url).netloc, {})
+    return {'post': post, **stats}
+
+def main() -> int:
+    args = sys.argv[1:]
+    keep = '--keep' in args
+    if keep:
+        args.remove('--keep')
+    image = None
+    if '--image' in args:
+        index = args.index('--image')
+        image = args[index + 1]
+        del args[index:index + 2]
+
+    samples = args or sorted(glob.glob('output/*.html'))
+    if not samples:
+        print("Nenhum artigo encontrado (indique um ficheiro HTML)")
+        return 1
+    with open(samples[0], encoding='utf-8') as f:
+        html = f.read()
+
+    client = WordPressClient()
+    # Aquece os índices de taxonomia para não contarem na medição
+    client.resolve_taxonomy()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as media_dir:
+        for trim in (False, True):
+            results[trim] = publish(client, html, image, trim, os.path.join(media_dir, f"media-{trim}.json"))
+
+    print(f"Artigo: {samples[0]} ({len(html.encode('utf-8'))} bytes)")
+    for trim, label in ((False, 'completo'), (True, '_fields')):
+        result = results[trim]
+        print(f"  {label:9} pedidos {result.get('requests', 0):3}  "
+              f"enviados {result.get('sent', 0):9}  recebidos {result.get('received', 0):9}")
+    before, after = results[False].get('received', 0), results[True].get('received', 0)
+    if before:
+        print(f"  Redução nos bytes recebidos: {100 * (before - after) / before:.1f}%")
+
+    if not keep:
+        for result in results.values():
+            post = result['post']
+            resources = [f"posts/{post['id']}"]
+            if post.get('thumbnail'):
+                resources.append(f"media/{post['thumbnail']}")
+            for resource in resources:
+                http_client.request(
+                    'DELETE',
+                    f"{client.api_url}/{resource}",
+                    auth=client.auth,
+                    params={'force': 'true'}
+                )
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -34,6 +34,9 @@ setup(
         "beautifulsoup4>=4.12.0",
     ],
     extras_require={
+        "async": [
+            "aiohttp>=3.9.0",
+        ],
         "dev": [
             "pytest>=7.4.0",
             "black>=23.7.0",
@@ -45,6 +48,7 @@ setup(
     entry_points={
         "console_scripts": [
             "geradorwp=src.main:main",
+            "geradorwp-batch=src.batch:main",
         ]
     },
     classifiers=[
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Geração de artigos em lote a partir do CSV de tópicos.
+
+O CSV é lido linha a linha e cada artigo é processado por um pool de
+workers de tamanho limitado. Os clientes Dify, WordPress e o gerador de
+imagens são criados uma única vez e partilhados por todas as linhas.
+
+Autor: Descomplicar - Agência de Aceleração Digital
+https://descomplicar.pt
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import logging
+import argparse
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+from src.config import config
+from src.generators.content_generator import SECTIONS, Article, ContentGenerator, topic_brief
+from src.integrations.dify_client import DifyClient
+from src.utils.exceptions import ValidationError
+from src.utils.journal import JobJournal
+from src.utils.pipeline import Pipeline
+
+# Logger para este módulo
+logger = logging.getLogger(__name__)
+
+# CSV com os artigos planeados
+DEFAULT_CSV = Path('docs') / 'Gerador de Conteúdos - artigos_sem_duplicados.csv'
+
+# Número de artigos processados em simultâneo
+DEFAULT_WORKERS = 2
+
+def split_list(value: Optional[str]) -> List[str]:
+    """Divide uma célula do CSV separada por vírgulas numa lista.
+
+    Args:
+        value: Conteúdo da célula
+
+    Returns:
+        Itens não vazios, sem espaços nas pontas
+    """
+    return [item.strip() for item in (value or '').split(',') if item.strip()]
+
+def parse_row(row: Dict[str, str]) -> Dict[str, Any]:
+    """Converte uma linha do CSV de tópicos num pedido de artigo.
+
+    Args:
+        row: Linha lida por csv.DictReader
+
+    Returns:
+        Dicionário com title, topics, keywords, tags, category, slug e faqs
+    """
+    try:
+        faqs = json.loads(row.get('faqs') or '[]')
+    except json.JSONDecodeError:
+        logger.warning(f"FAQs inválidas para '{row.get('título')}', a ignorar")
+        faqs = []
+
+    return {
+        'title': (row.get('título') or '').strip(),
+        'topics': split_list(row.get('tópicos')),
+        'keywords': split_list(row.get('palavras chave')),
+        'tags': split_list(row.get('tags')),
+        'category': (row.get('categorias') or '').strip() or None,
+        'slug': (row.get('slug') or '').strip(),
+        'faqs': faqs
+    }
+
+def iter_rows(path: Path, start: int = 0, limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Lê o CSV de tópicos em streaming, sem o carregar todo para memória.
+
+    Args:
+        path: Caminho do CSV
+        start: Número de linhas de dados a saltar
+        limit: Número máximo de linhas a devolver (opcional)
+
+    Yields:
+        Pedidos de artigo (ver `parse_row`), com o índice da linha em 'row'
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        yielded = 0
+        for index, row in enumerate(csv.DictReader(f)):
+            if index < start:
+                continue
+            if limit is not None and yielded >= limit:
+                return
+            item = parse_row(row)
+            if not item['title']:
+                logger.warning(f"Linha {index} sem título, a ignorar")
+                continue
+            item['row'] = index
+            yielded += 1
+            yield item
+
+class BatchRunner:
+    """Processa pedidos de artigo com um pool de workers limitado."""
+
+    def __init__(
+        self,
+        dify_client: Optional[DifyClient] = None,
+        wordpress: Optional[Any] = None,
+        image_generator: Optional[Any] = None,
+        workers: int = DEFAULT_WORKERS,
+        status: str = 'draft',
+        output_dir: Optional[Path] = None,
+        journal: Optional[JobJournal] = None
+    ):
+        """Inicializa o processamento em lote.
+
+        Args:
+            dify_client: Cliente Dify partilhado (opcional, cria um novo se None)
+            wordpress: WordPressClient partilhado; se None, os artigos não são publicados
+            image_generator: ImageGenerator partilhado; se None, não há imagem destacada
+            workers: Número de artigos processados em simultâneo
+            status: Status dos posts criados (draft, publish, private)
+            output_dir: Diretório onde guardar o HTML de cada artigo (opcional)
+            journal: Diário de etapas para retomar lotes interrompidos (opcional)
+        """
+        self.dify = dify_client or DifyClient()
+        self.wordpress = wordpress
+        self.image_generator = image_generator
+        self.workers = max(1, workers)
+        self.status = status
+        self.output_dir = Path(output_dir) if output_dir else None
+        self.journal = journal
+        # Um ContentGenerator por thread: last_run_stats é estado por artigo
+        self._local = threading.local()
+
+    def _generator(self) -> ContentGenerator:
+        """Devolve o ContentGenerator da thread atual, sobre o cliente Dify partilhado."""
+        generator = getattr(self._local, 'generator', None)
+        if generator is None:
+            generator = self._local.generator = ContentGenerator(self.dify)
+        return generator
+
+    def _stage(self, job: str, stage: str, run: Callable[[], Any]) -> Any:
+        """Executa uma etapa de um artigo, ou devolve o resultado já registado no diário.
+
+        Args:
+            job: Identificador do artigo no diário
+            stage: Nome da etapa (ver `src.utils.journal.STAGES`)
+            run: Função que executa a etapa
+
+        Returns:
+            Resultado da etapa
+        """
+        if self.journal and self.journal.has(job, stage):
+            return self.journal.get(job, stage)
+        value = run()
+        if self.journal:
+            self.journal.record(job, stage, value)
+        return value
+
+    def _write_sections(self, item: Dict[str, Any]) -> Dict[str, str]:
+        """Gera as seções de um artigo, regenerando uma vez as que falharem.
+
+        O resultado é registado no diário e publicado tal como está, pelo que
+        uma seção com o texto de erro de `section_placeholder`, cortada a meio
+        ou fora dos limites de palavras nunca é devolvida.
+
+        Args:
+            item: Pedido de artigo (ver `parse_row`)
+
+        Returns:
+            Conteúdo de cada seção
+
+        Raises:
+            ValidationError: Se alguma seção continuar inválida após a reparação
+        """
+        generator = self._generator()
+        article = generator.generate_article(
+            item['title'],
+            item['category'],
+            title=item['title'],
+            subtopics=item.get('topics'),
+            keywords=item.get('keywords'),
+            faqs=item.get('faqs')
+        )
+        generator.repair(article, topic=topic_brief(item['title'], item.get('topics'), item.get('keywords')))
+
+        problems = {}
+        for section in SECTIONS:
+            problem = generator.section_problem(section, article.sections.get(section))
+            if problem:
+                problems[section] = problem
+        if problems:
+            raise ValidationError(f"Seções inválidas em '{item['title']}': {problems}")
+        return dict(article.sections)
+
+    def process(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Gera (e, se configurado, publica) um artigo.
+
+        As etapas correm num `Pipeline`: a imagem destacada, o upload do
+        media e a resolução da categoria e tags dependem só do título e
+        correm em paralelo com a geração do texto. Com um diário configurado,
+        as etapas já concluídas numa execução anterior não são repetidas.
+
+        Args:
+            item: Pedido de artigo (ver `parse_row`)
+
+        Returns:
+            Resultado com title, seconds, timings e, quando aplicável,
+            html_path e post
+        """
+        start_time = time.perf_counter()
+        title = item['title']
+        job = item['slug'] or title
+        result: Dict[str, Any] = {'title': title, 'row': item.get('row')}
+
+        if self.journal and self.journal.has(job, 'sections'):
+            logger.info(f"A retomar '{title}' a partir da etapa {self.journal.next_stage(job) or 'final'}")
+
+        def render(sections: Dict[str, str]) -> str:
+            article = Article(title, item['category'])
+            for name, content in sections.items():
+                article.add_section(name, content)
+            article.meta['tags'] = item['tags']
+            return self._stage(job, 'html', article.to_html)
+
+        def write_output(html: str) -> str:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            html_path = self.output_dir / f"{item['slug'] or item.get('row')}.html"
+            html_path.write_text(html, encoding='utf-8')
+            return str(html_path)
+
+        pipeline = Pipeline()
+        pipeline.add('sections', lambda: self._stage(job, 'sections', lambda: self._write_sections(item)))
+        pipeline.add('html', render, requires=['sections'])
+        if self.output_dir:
+            pipeline.add('html_path', write_output, requires=['html'])
+
+        if self.wordpress and self.journal and self.journal.has(job, 'post'):
+            result['post'] = self.journal.get(job, 'post')
+        elif self.wordpress:
+            pipeline.add('image', lambda: self._stage(
+                job, 'image', lambda: self._create_image(title, item['category'])
+            ) if self.image_generator else None)
+            pipeline.add('media', lambda image: self._stage(
+                job, 'media', lambda: self.wordpress.upload_media(image)
+            ) if image else None, requires=['image'])
+            pipeline.add('taxonomy', lambda: self.wordpress.resolve_taxonomy(item['category'], item['tags']))
+            pipeline.add('post', lambda html, media, taxonomy: self._stage(
+                job, 'post', lambda: self.wordpress.create_post(
+                    title=title,
+                    content=html,
+                    status=self.status,
+                    category_id=taxonomy[0],
+                    tag_ids=taxonomy[1],
+                    featured_media_id=media,
+                    enrich=False
+                )
+            ), requires=['html', 'media', 'taxonomy'])
+
+        outputs = pipeline.run()
+        for key in ('html_path', 'post'):
+            if key in outputs:
+                result[key] = outputs[key]
+
+        result['timings'] = pipeline.last_timings
+        result['seconds'] = time.perf_counter() - start_time
+        logger.debug(f"Etapas de '{title}': {pipeline.format_timings()}")
+        return result
+
+    def _create_image(self, title: str, category: Optional[str]) -> Optional[str]:
+        """Cria a imagem destacada e devolve o caminho como texto (para o diário)."""
+        path = self.image_generator.create_featured_image(title, category or '')
+        return str(path) if path else None
+
+    def run(self, items: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Processa todos os pedidos, com no máximo `workers` artigos em curso.
+
+        Os pedidos são consumidos à medida que há workers livres, por isso o
+        iterável pode ser um leitor de CSV em streaming. Um artigo que falhe
+        não interrompe o lote.
+
+        Args:
+            items: Pedidos de artigo
+
+        Returns:
+            Resumo com done, failed, seconds, articles_per_minute, results e errors
+        """
+        results: List[Dict[str, Any]] = []
+        errors: List[Dict[str, Any]] = []
+        start_time = time.perf_counter()
+
+        def collect(finished: Set[Future]):
+            for future in finished:
+                item = pending.pop(future)
+                try:
+                    result = future.result()
+                    results.append(result)
+                    status = f"ok em {result['seconds']:.1f}s"
+                except Exception as e:
+                    errors.append({'title': item['title'], 'row': item.get('row'), 'error': str(e)})
+                    status = f"erro: {e}"
+
+                elapsed = time.perf_counter() - start_time
+                done = len(results) + len(errors)
+                logger.info(
+                    f"[{done}] {item['title']} - {status} "
+                    f"({done / elapsed * 60:.2f} artigos/min)"
+                )
+
+        pending: Dict[Future, Dict[str, Any]] = {}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="article") as executor:
+            for item in items:
+                if len(pending) >= self.workers:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(finished)
+                pending[executor.submit(self.process, item)] = item
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(finished)
+
+        elapsed = time.perf_counter() - start_time
+        done = len(results) + len(errors)
+        summary = {
+            'done': len(results),
+            'failed': len(errors),
+            'seconds': elapsed,
+            'articles_per_minute': done / elapsed * 60 if elapsed > 0 else 0.0,
+            'results': results,
+            'errors': errors
+        }
+        logger.info(
+            f"Lote concluído: {summary['done']} artigos, {summary['failed']} falhas "
+            f"em {elapsed:.1f}s ({summary['articles_per_minute']:.2f} artigos/min)"
+        )
+        return summary
+
+def main(args: Optional[List[str]] = None) -> int:
+    """Função principal do processamento em lote.
+
+    Args:
+        args: Argumentos da linha de comando
+
+    Returns:
+        Código de saída (0 se todos os artigos foram processados, 1 caso contrário)
+    """
+    parser = argparse.ArgumentParser(description='Geração de artigos em lote a partir do CSV de tópicos')
+    parser.add_argument('csv', nargs='?', default=str(DEFAULT_CSV), help='CSV com os artigos planeados')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Artigos processados em simultâneo')
+    parser.add_argument('--start', type=int, default=0, help='Linhas do CSV a saltar')
+    parser.add_argument('--limit', type=int, help='Número máximo de artigos a processar')
+    parser.add_argument('--output-dir', default='output', help='Diretório para o HTML gerado')
+    parser.add_argument('--publish', action='store_true', help='Publicar no WordPress')
+    parser.add_argument('--draft', action='store_true', help='Publicar como rascunho')
+    parser.add_argument(
+        '--journal',
+        default=os.path.join(config.CACHE_DIR, 'batch-journal.jsonl'),
+        help='Diário de etapas usado para retomar o lote'
+    )
+    parser.add_argument('--no-journal', action='store_true', help='Não usar o diário de etapas')
+    args = parser.parse_args(args)
+
+    logging.basicConfig(
+        level=os.getenv('LOG_LEVEL', 'INFO'),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
+
+    wordpress = image_generator = None
+    if args.publish:
+        from src.utils.wordpress import WordPressClient
+        from src.utils.image import ImageGenerator
+        wordpress = WordPressClient()
+        image_generator = ImageGenerator()
+
+    runner = BatchRunner(
+        wordpress=wordpress,
+        image_generator=image_generator,
+        workers=args.workers,
+        status='draft' if args.draft else 'publish',
+        output_dir=Path(args.output_dir) if args.output_dir else None,
+        journal=None if args.no_journal else JobJournal(args.journal)
+    )
+    summary = runner.run(iter_rows(Path(args.csv), start=args.start, limit=args.limit))
+
+    for error in summary['errors']:
+        print(f"Erro na linha {error['row']} ({error['title']}): {error['error']}")
+    return 0 if not summary['errors'] else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,91 +1,140 @@
 """
 Configurações do projeto GeradorWP.
+
+As configurações são lidas do ambiente (e do .env) no primeiro acesso, e
+não ao importar o módulo: `config.WP_URL` ou `from .config import WP_URL`
+continuam a funcionar, mas só carregam o .env quando são usados.
 """
 
 import os
-from typing import Dict, List, Optional
-from dotenv import load_dotenv
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from .env import load_env
 
-# Carrega as variáveis de ambiente
-load_dotenv()
+@lru_cache(maxsize=None)
+def get_config() -> Dict[str, Any]:
+    """
+    Devolve as configurações, carregando antes o .env (uma vez por processo).
+
+    Returns:
+        Dicionário {NOME: valor} com todas as configurações
+    """
+    load_env()
+    return {
+        # Configurações da API Dify
+        "DIFY_API_KEY": os.getenv("DIFY_API_KEY"),
+        "DIFY_API_URL": os.getenv("DIFY_API_URL"),
 
-# Configurações da API Dify
-DIFY_API_KEY = os.getenv("DIFY_API_KEY")
-DIFY_API_URL = os.getenv("DIFY_API_URL")
+        # Configurações do WordPress
+        "WP_URL": os.getenv("WP_URL"),
+        "WP_USERNAME": os.getenv("WP_USERNAME"),
+        "WP_PASSWORD": os.getenv("WP_PASSWORD"),
+        "WP_APP_PASSWORD": os.getenv("WP_APP_PASSWORD"),
 
-# Configurações do WordPress
-WP_URL = os.getenv("WP_URL")
-WP_USERNAME = os.getenv("WP_USERNAME")
-WP_PASSWORD = os.getenv("WP_PASSWORD")
-WP_APP_PASSWORD = os.getenv("WP_APP_PASSWORD")
+        # Configurações de cache
+        "CACHE_TTL": int(os.getenv("CACHE_TTL", "3600")),  # 1 hora
+        "CACHE_DIR": os.getenv("CACHE_DIR", ".cache"),
+        "LLM_CACHE_MODE": os.getenv("LLM_CACHE_MODE", "read_write"),  # off, read_write, replay
+        "LLM_CACHE_TTL": int(os.getenv("LLM_CACHE_TTL", "604800")),  # 7 dias
+        "TAXONOMY_TTL": int(os.getenv("TAXONOMY_TTL", "86400")),  # 1 dia
 
-# Configurações de cache
-CACHE_TTL = int(os.getenv("CACHE_TTL", "3600"))  # 1 hora
-CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+        # Configurações de requisições
+        "REQUEST_TIMEOUT": int(os.getenv("REQUEST_TIMEOUT", "30")),
+        "MAX_RETRIES": int(os.getenv("MAX_RETRIES", "3")),
+        "RETRY_DELAY": int(os.getenv("RETRY_DELAY", "5")),
+        "REQUEST_DEADLINE": float(os.getenv("REQUEST_DEADLINE", "0")),  # 0 = sem limite total
+        "RETRY_MAX_DELAY": float(os.getenv("RETRY_MAX_DELAY", "60")),
+        "CIRCUIT_FAILURE_THRESHOLD": int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5")),
+        "CIRCUIT_RESET_TIMEOUT": float(os.getenv("CIRCUIT_RESET_TIMEOUT", "60")),
+        "HTTP_POOL_SIZE": int(os.getenv("HTTP_POOL_SIZE", "20")),
+        "DIFY_MAX_CONCURRENCY": int(os.getenv("DIFY_MAX_CONCURRENCY", "20")),
 
-# Configurações de requisições
-REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", "30"))
-MAX_RETRIES = int(os.getenv("MAX_RETRIES", "3"))
-RETRY_DELAY = int(os.getenv("RETRY_DELAY", "5"))
+        # Limites de pedidos ao Dify, partilhados entre processos (0 = sem limite)
+        "DIFY_RPM": int(os.getenv("DIFY_RPM", "0")),
+        "DIFY_TPM": int(os.getenv("DIFY_TPM", "0")),
+        "RATE_LIMIT_DB": os.getenv("RATE_LIMIT_DB", ""),
 
-# Configurações de logging
-LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
-LOG_FILE = os.getenv("LOG_FILE", "gerador-wp.log")
+        # Configurações de logging
+        "LOG_LEVEL": os.getenv("LOG_LEVEL", "INFO"),
+        "LOG_FILE": os.getenv("LOG_FILE", "gerador-wp.log"),
+
+        # Configurações de conteúdo
+        "MIN_CONTENT_LENGTH": int(os.getenv("MIN_CONTENT_LENGTH", "1000")),
+        "MAX_CONTENT_LENGTH": int(os.getenv("MAX_CONTENT_LENGTH", "5000")),
+        "DEFAULT_CATEGORY": os.getenv("DEFAULT_CATEGORY", "Blog"),
+        "DEFAULT_TAGS": os.getenv("DEFAULT_TAGS", "").split(","),
+
+        # Configurações de SEO
+        "DEFAULT_META_DESCRIPTION_LENGTH": int(os.getenv('DEFAULT_META_DESCRIPTION_LENGTH', '160')),
+        "DEFAULT_TITLE_LENGTH": int(os.getenv('DEFAULT_TITLE_LENGTH', '60')),
+
+        # Configurações de Imagens
+        "IMAGE_WIDTH": int(os.getenv('IMAGE_WIDTH', '1200')),
+        "IMAGE_HEIGHT": int(os.getenv('IMAGE_HEIGHT', '630')),
+        "IMAGE_QUALITY": int(os.getenv('IMAGE_QUALITY', '90')),
+    }
 
-# Configurações de conteúdo
-MIN_CONTENT_LENGTH = int(os.getenv("MIN_CONTENT_LENGTH", "1000"))
-MAX_CONTENT_LENGTH = int(os.getenv("MAX_CONTENT_LENGTH", "5000"))
-DEFAULT_CATEGORY = os.getenv("DEFAULT_CATEGORY", "Blog")
-DEFAULT_TAGS = os.getenv("DEFAULT_TAGS", "").split(",")
+def __getattr__(name: str) -> Any:
+    # As configurações são atributos do módulo, resolvidos no primeiro acesso;
+    # os atributos especiais (ex.: __path__, consultado pelo mecanismo de
+    # importação) não podem carregar o .env
+    config = get_config() if not name.startswith("__") else {}
+    if name in config:
+        return config[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def validate_config() -> None:
     """
     Valida as configurações do projeto.
-    
+
     Raises:
         ValueError: Se alguma configuração obrigatória estiver faltando
     """
+    config = get_config()
     required_vars = {
-        "DIFY_API_KEY": DIFY_API_KEY,
-        "DIFY_API_URL": DIFY_API_URL,
-        "WP_URL": WP_URL,
-        "WP_USERNAME": WP_USERNAME,
-        "WP_APP_PASSWORD": WP_APP_PASSWORD
+        name: config[name]
+        for name in ("DIFY_API_KEY", "DIFY_API_URL", "WP_URL", "WP_USERNAME", "WP_APP_PASSWORD")
     }
-    
+
     missing_vars = [
         var for var, value in required_vars.items()
         if not value
     ]
-    
+
     if missing_vars:
         raise ValueError(
             f"Configurações obrigatórias faltando: {', '.join(missing_vars)}"
         )
-    
+
     # Valida URLs
-    if not WP_URL.startswith(("http://", "https://")):
+    if not config["WP_URL"].startswith(("http://", "https://")):
         raise ValueError("WP_URL deve começar com http:// ou https://")
-    
+
     # Valida comprimentos de conteúdo
-    if MIN_CONTENT_LENGTH > MAX_CONTENT_LENGTH:
+    if config["MIN_CONTENT_LENGTH"] > config["MAX_CONTENT_LENGTH"]:
         raise ValueError(
             "MIN_CONTENT_LENGTH não pode ser maior que MAX_CONTENT_LENGTH"
         )
-    
+
+    # Valida cache de respostas do Dify
+    if config["LLM_CACHE_MODE"] not in ("off", "read_write", "replay"):
+        raise ValueError("LLM_CACHE_MODE deve ser off, read_write ou replay")
+
     # Valida timeouts e retries
-    if REQUEST_TIMEOUT <= 0:
+    if config["REQUEST_TIMEOUT"] <= 0:
         raise ValueError("REQUEST_TIMEOUT deve ser maior que 0")
-    if MAX_RETRIES < 0:
+    if config["MAX_RETRIES"] < 0:
         raise ValueError("MAX_RETRIES não pode ser negativo")
-    if RETRY_DELAY < 0:
+    if config["RETRY_DELAY"] < 0:
         raise ValueError("RETRY_DELAY não pode ser negativo")
-
-# Configurações de SEO
-DEFAULT_META_DESCRIPTION_LENGTH = int(os.getenv('DEFAULT_META_DESCRIPTION_LENGTH', '160'))
-DEFAULT_TITLE_LENGTH = int(os.getenv('DEFAULT_TITLE_LENGTH', '60'))
-
-# Configurações de Imagens
-IMAGE_WIDTH = int(os.getenv('IMAGE_WIDTH', '1200'))
-IMAGE_HEIGHT = int(os.getenv('IMAGE_HEIGHT', '630'))
-IMAGE_QUALITY = int(os.getenv('IMAGE_QUALITY', '90')) 
\ No newline at end of file
+    if config["REQUEST_DEADLINE"] < 0:
+        raise ValueError("REQUEST_DEADLINE não pode ser negativo")
+    if config["CIRCUIT_FAILURE_THRESHOLD"] <= 0:
+        raise ValueError("CIRCUIT_FAILURE_THRESHOLD deve ser maior que 0")
+    if config["HTTP_POOL_SIZE"] <= 0:
+        raise ValueError("HTTP_POOL_SIZE deve ser maior que 0")
+    if config["DIFY_RPM"] < 0 or config["DIFY_TPM"] < 0:
+        raise ValueError("DIFY_RPM e DIFY_TPM não podem ser negativos")
+    if config["DIFY_MAX_CONCURRENCY"] <= 0:
+        raise ValueError("DIFY_MAX_CONCURRENCY deve ser maior que 0")
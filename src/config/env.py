@@ -0,0 +1,27 @@
+"""
+Carregamento único das variáveis de ambiente do ficheiro .env.
+
+Autor: Descomplicar - Agência de Aceleração Digital
+https://descomplicar.pt
+"""
+
+import threading
+
+_loaded = False
+_lock = threading.Lock()
+
+def load_env() -> None:
+    """
+    Carrega o ficheiro .env uma única vez por processo.
+
+    Chamadas seguintes não voltam a procurar nem a ler o ficheiro, por isso
+    pode ser chamada sem custo por qualquer módulo antes de ler os.environ.
+    """
+    global _loaded
+    if _loaded:
+        return
+    with _lock:
+        if not _loaded:
+            from dotenv import load_dotenv
+            load_dotenv()
+            _loaded = True
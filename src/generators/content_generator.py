@@ -9,13 +9,20 @@ https://descomplicar.pt
 """
 
 import os
+import html
+import json
 import time
 import logging
 import re
 import random
-from typing import Dict, List, Optional, Tuple
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+from src.config import settings
 from src.integrations.dify_client import DifyClient
+from src.utils.dify import usage_tokens
+from src.utils.exceptions import ValidationError
+from src.utils.section_store import SectionStore, SpilledSections
+from src.utils.validators import ACIDAValidator
 
 # Configuração do logging
 logger = logging.getLogger(__name__)
@@ -48,8 +55,267 @@ SUBTITLE_PATTERNS = [
     "Estratégias Avançadas"
 ]
 
+# Ordem das seções do artigo
+SECTIONS = ['attention', 'interest', 'desire', 'action', 'faq']
+
+# Títulos das seções no HTML final
+SECTION_TITLES = {
+    'attention': 'Introdução',
+    'interest': 'Desenvolvimento',
+    'desire': 'Benefícios',
+    'action': 'Conclusão',
+    'faq': 'Perguntas Frequentes'
+}
+
+# Padrões de limpeza do HTML gerado, compilados uma vez e combinados em
+# alternâncias para que cada passagem faça o trabalho de várias
+_DUPLICATE_HEADINGS = (
+    r'<h1>.*?</h1>|<h2>(?:'
+    + '|'.join(re.escape(title) for title in SECTION_TITLES.values())
+    + r')</h2>'
+)
+# Tags de documento extra e tags auto-fechadas
+WRAPPER_TAGS_PATTERN = re.compile(r'</?(?:html|body|article|section)[^>]*>|<[^>]*?/>')
+# Títulos duplicados e blocos de código Markdown; a cerca consome também os
+# títulos e espaços que se lhe seguem, como se tivessem sido removidos antes
+DUPLICATE_BLOCKS_PATTERN = re.compile(
+    rf'```(?:html)?(?:\s|{_DUPLICATE_HEADINGS})*|{_DUPLICATE_HEADINGS}'
+)
+# h3 mal fechados: "<h3>x</h3> <p></h3>" e "<h3></p>"
+BROKEN_H3_PATTERN = re.compile(r'<h3>(?:(.*?)</h3>\s*<p></h3>|</p>)')
+ORPHAN_H3_PATTERN = re.compile(r'<h3></p>')
+
+def _fix_broken_h3(match: re.Match) -> str:
+    """Corrige um h3 mal fechado encontrado por BROKEN_H3_PATTERN."""
+    if match.group(1) is None:
+        return '</p>'
+    return ORPHAN_H3_PATTERN.sub('</p>', f'<h3>{match.group(1)}</h3>')
+
+def clean_content(content: str) -> str:
+    """Limpa o HTML gerado pelo Dify.
+    
+    Remove tags de documento e auto-fechadas, h1 e h2 duplicados dos títulos
+    das seções e blocos de código Markdown, corrige h3 mal fechados e
+    normaliza os espaços.
+    
+    Args:
+        content: HTML de uma seção ou resposta
+    
+    Returns:
+        HTML limpo
+    """
+    content = WRAPPER_TAGS_PATTERN.sub('', content)
+    content = DUPLICATE_BLOCKS_PATTERN.sub('', content)
+    content = BROKEN_H3_PATTERN.sub(_fix_broken_h3, content)
+    # str.split() usa os mesmos espaços que \s e evita um re.sub por espaço
+    return ' '.join(content.split())
+
+# Tópico numerado (<strong>, <b>, <p> ou <h3> "1. Título") ou qualquer outro
+# <h3>, que marca o fim do corpo do tópico anterior
+TOPIC_TOKEN_PATTERN = re.compile(r'<(strong|b|p|h3)>(\d+)[.:)]?\s+(.*?)</\1>|<h3>')
+
+def extract_topics(content: str) -> List[Tuple[int, str, Optional[str]]]:
+    """Extrai os tópicos numerados de uma seção numa única passagem.
+    
+    O corpo de um tópico em <h3> é o texto entre o seu título e o <h3>
+    seguinte (ou o fim da seção), obtido diretamente das posições
+    encontradas, sem novas pesquisas por tópico.
+    
+    Args:
+        content: HTML da seção
+    
+    Returns:
+        Triplos (número, título, corpo) ordenados por número e título; o
+        corpo é None para tópicos que não estão em <h3>
+    """
+    topics = []
+    open_topic = None
+    for match in TOPIC_TOKEN_PATTERN.finditer(content):
+        tag = match.group(1)
+        if tag in (None, 'h3') and open_topic is not None:
+            topics[open_topic[0]][2] = content[open_topic[1]:match.start()]
+            open_topic = None
+        if tag:
+            topics.append([int(match.group(2)), match.group(3).strip(), None])
+            if tag == 'h3':
+                open_topic = (len(topics) - 1, match.end())
+    
+    if open_topic is not None:
+        topics[open_topic[0]][2] = content[open_topic[1]:]
+    
+    return sorted((tuple(topic) for topic in topics), key=lambda topic: topic[:2])
+
+# Pergunta em <strong> seguida da resposta, até à próxima pergunta
+QUESTION_PATTERN = re.compile(r'<strong>(.*?)</strong>\s*(.*?)(?=<strong>|$)', re.DOTALL)
+
+def extract_questions(content: str) -> List[Tuple[str, str]]:
+    """Extrai perguntas e respostas do FAQ.
+    
+    Args:
+        content: HTML da seção de FAQ
+    
+    Returns:
+        Pares (pergunta, resposta) não vazios, pela ordem do texto
+    """
+    questions = []
+    for match in QUESTION_PATTERN.finditer(content):
+        question = match.group(1).strip()
+        answer = match.group(2).strip()
+        if question and answer:
+            questions.append((question, answer))
+    
+    return questions
+
+def format_section(content: str, section_type: str) -> str:
+    """Formata uma seção específica do artigo.
+    
+    Args:
+        content: HTML gerado para a seção
+        section_type: Nome da seção
+    
+    Returns:
+        HTML formatado da seção (sem o título h2)
+    """
+    if section_type == 'interest':
+        # Extrai e formata tópicos numerados
+        formatted_content = []
+        for num, title, body in extract_topics(content):
+            formatted_content.append(f'<h3>{num}. {title}</h3>')
+            if body is not None:
+                formatted_content.append(clean_content(body))
+        return '\n\n'.join(formatted_content)
+    elif section_type == 'faq':
+        # Formata perguntas e respostas
+        formatted_content = []
+        for question, answer in extract_questions(content):
+            formatted_content.extend([
+                f'<h3>{question}</h3>',
+                f'<p>{clean_content(answer)}</p>'
+            ])
+        return '\n\n'.join(formatted_content)
+    else:
+        # Limpa e retorna o conteúdo normal
+        return clean_content(content)
+
+def topic_brief(topic: str, subtopics: Optional[List[str]] = None, keywords: Optional[List[str]] = None) -> str:
+    """Descreve o tema para os prompts, com os subtópicos e palavras-chave planeados.
+    
+    Args:
+        topic: Tópico do artigo
+        subtopics: Subtópicos a abordar (opcional)
+        keywords: Palavras-chave a usar no texto (opcional)
+    
+    Returns:
+        Tópico, seguido das indicações entre parênteses quando existem
+    """
+    details = []
+    if subtopics:
+        details.append(f"abordando: {', '.join(subtopics)}")
+    if keywords:
+        details.append(f"palavras-chave: {', '.join(keywords)}")
+    return f"{topic} ({'; '.join(details)})" if details else topic
+
+def faq_html(faqs: Iterable[Dict[str, Any]]) -> str:
+    """Monta a seção de FAQ a partir de perguntas e respostas já escritas.
+    
+    Usa o formato pedido ao Dify (pergunta em <strong> seguida da resposta),
+    pelo que é formatada por `format_section` como uma seção gerada.
+    
+    Args:
+        faqs: Itens {'pergunta': ..., 'resposta': ...}
+    
+    Returns:
+        HTML da seção (vazio se nenhum item tiver pergunta e resposta)
+    """
+    blocks = []
+    for faq in faqs:
+        if not isinstance(faq, dict):
+            continue
+        question = str(faq.get('pergunta') or '').strip()
+        answer = str(faq.get('resposta') or '').strip()
+        if question and answer:
+            blocks.append(f"<strong>{html.escape(question)}</strong> {html.escape(answer)}")
+    return '\n'.join(blocks)
+
+def section_placeholder(section: str) -> str:
+    """Conteúdo usado no lugar de uma seção cuja geração falhou.
+    
+    Args:
+        section: Nome da seção
+    
+    Returns:
+        Parágrafo HTML com a mensagem de erro
+    """
+    return f"<p>Erro ao gerar conteúdo para {section}</p>"
+
+# Fim de um bloco HTML de nível superior
+BLOCK_END_PATTERN = re.compile(r'</(?:p|h[1-6]|ul|ol|table|blockquote)>', re.IGNORECASE)
+
+# Bloco de código Markdown à volta de uma resposta JSON
+JSON_FENCE_PATTERN = re.compile(r'^\s*```(?:json)?\s*|\s*```\s*$', re.IGNORECASE)
+
+def parse_sections_json(answer: str, sections: List[str]) -> Dict[str, str]:
+    """Extrai as seções de uma resposta JSON do modo one-shot.
+    
+    Args:
+        answer: Resposta do Dify, idealmente um objeto JSON {seção: html}
+        sections: Nomes das seções esperadas
+    
+    Returns:
+        Seções válidas encontradas; as restantes ficam de fora
+    """
+    text = JSON_FENCE_PATTERN.sub('', answer or '')
+    start, end = text.find('{'), text.rfind('}')
+    if start == -1 or end <= start:
+        return {}
+    
+    try:
+        data = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    
+    return {
+        section: data[section].strip()
+        for section in sections
+        if isinstance(data.get(section), str) and data[section].strip()
+    }
+
+def iter_html_blocks(chunks: Iterable[str]) -> Iterator[str]:
+    """Agrupa fragmentos de texto em blocos HTML completos.
+    
+    Args:
+        chunks: Fragmentos de texto recebidos em streaming
+    
+    Yields:
+        Blocos HTML terminados por uma tag de fecho de bloco; o resto final,
+        se existir, é devolvido no fim
+    """
+    buffer = ''
+    for chunk in chunks:
+        buffer += chunk
+        start = 0
+        for match in BLOCK_END_PATTERN.finditer(buffer):
+            block = buffer[start:match.end()].strip()
+            if block:
+                yield block
+            start = match.end()
+        buffer = buffer[start:]
+    
+    if buffer.strip():
+        yield buffer.strip()
+
 class Article:
-    """Representa um artigo com suas seções e metadados."""
+    """Representa um artigo com suas seções e metadados.
+    
+    O HTML de cada seção é guardado após a primeira renderização e só é
+    refeito quando o conteúdo dessa seção muda. Para lotes grandes, o
+    conteúdo das seções pode ser despejado para disco com `spill`, ficando
+    em memória apenas uma referência leve por seção.
+    """
+    
+    __slots__ = ('title', 'category', 'sections', '_meta', '_rendered')
     
     def __init__(self, title: str, category: str):
         """Inicializa um novo artigo.
@@ -61,13 +327,23 @@ class Article:
         self.title = title
         self.category = category
         self.sections = {}
-        self.meta = {
-            'tags': [],
-            'featured_image': None,
-            'excerpt': None,
-            'seo_title': None,
-            'seo_description': None
-        }
+        # Criados apenas quando usados
+        self._meta: Optional[Dict] = None
+        # Cache de renderização: seção -> (conteúdo de origem, fragmento HTML)
+        self._rendered: Optional[Dict[str, Tuple[str, str]]] = None
+    
+    @property
+    def meta(self) -> Dict:
+        """Metadados do artigo (tags, imagem destacada, resumo e SEO)."""
+        if self._meta is None:
+            self._meta = {
+                'tags': [],
+                'featured_image': None,
+                'excerpt': None,
+                'seo_title': None,
+                'seo_description': None
+            }
+        return self._meta
     
     def add_section(self, name: str, content: str):
         """Adiciona uma seção ao artigo.
@@ -77,132 +353,119 @@ class Article:
             content: Conteúdo da seção
         """
         self.sections[name] = content
+        if self._rendered:
+            self._rendered.pop(name, None)
     
-    def to_html(self) -> str:
-        """Converte o artigo para HTML formatado.
+    @property
+    def spilled(self) -> bool:
+        """Indica se o conteúdo das seções está guardado em disco."""
+        return isinstance(self.sections, SpilledSections)
+    
+    def spill(self, store: SectionStore):
+        """Move o conteúdo das seções para disco.
         
-        Returns:
-            HTML formatado do artigo
+        As seções continuam acessíveis em `sections`, sendo lidas do
+        armazenamento a cada acesso; o HTML renderizado deixa de ser guardado.
+        
+        Args:
+            store: Armazenamento partilhado pelos artigos do lote
         """
-        # Definir títulos das seções
-        section_titles = {
-            'attention': 'Introdução',
-            'interest': 'Desenvolvimento',
-            'desire': 'Benefícios',
-            'action': 'Conclusão',
-            'faq': 'Perguntas Frequentes'
-        }
+        if not self.spilled:
+            self.sections = SpilledSections(store, self.sections)
+        self._rendered = None
+    
+    def load(self):
+        """Traz o conteúdo das seções de volta para memória."""
+        if self.spilled:
+            self.sections = self.sections.copy()
+    
+    def _section_html(self, name: str) -> str:
+        """Devolve o fragmento HTML de uma seção, renderizando-o só se mudou.
         
-        # Funções auxiliares
-        def clean_content(content: str) -> str:
-            """Limpa o conteúdo HTML."""
-            # Remove tags HTML extras
-            content = re.sub(r'</?(?:html|body|article|section)[^>]*>', '', content)
-            # Remove tags vazias
-            content = re.sub(r'<[^>]*?/>', '', content)
-            # Remove tags h1 duplicadas
-            content = re.sub(r'<h1>.*?</h1>', '', content)
-            # Remove tags h2 duplicadas que correspondem aos títulos das seções
-            for title in section_titles.values():
-                content = re.sub(f'<h2>{title}</h2>', '', content)
-            # Remove tags ```html e ``` extras
-            content = re.sub(r'```html\s*', '', content)
-            content = re.sub(r'```\s*', '', content)
-            # Remove tags h3 duplicadas ou mal formatadas
-            content = re.sub(r'<h3>(.*?)</h3>\s*<p></h3>', r'<h3>\1</h3>', content)
-            content = re.sub(r'<h3></p>', '</p>', content)
-            # Remove espaços extras
-            content = re.sub(r'\s+', ' ', content)
-            return content.strip()
-        
-        def extract_topics(content: str) -> List[Tuple[int, str]]:
-            """Extrai tópicos numerados do conteúdo."""
-            topics = []
-            patterns = [
-                r'<strong>(\d+)[\.:\)]?\s+(.*?)</strong>',
-                r'<b>(\d+)[\.:\)]?\s+(.*?)</b>',
-                r'<p>(\d+)[\.:\)]?\s+(.*?)</p>',
-                r'<h3>(\d+)[\.:\)]?\s+(.*?)</h3>'
-            ]
-            
-            for pattern in patterns:
-                matches = re.finditer(pattern, content)
-                for match in matches:
-                    num = int(match.group(1))
-                    title = match.group(2).strip()
-                    topics.append((num, title))
-            
-            return sorted(topics)
+        O fragmento guardado é validado pela identidade do conteúdo de
+        origem, por isso alterações feitas diretamente em `sections` também
+        são detetadas. Artigos despejados para disco não guardam fragmentos.
         
-        def extract_questions(content: str) -> List[Tuple[str, str]]:
-            """Extrai perguntas e respostas do FAQ."""
-            questions = []
-            pattern = r'<strong>(.*?)</strong>\s*(.*?)(?=<strong>|$)'
-            matches = re.finditer(pattern, content, re.DOTALL)
-            
-            for match in matches:
-                question = match.group(1).strip()
-                answer = match.group(2).strip()
-                if question and answer:
-                    questions.append((question, answer))
-            
-            return questions
-        
-        def format_section(content: str, section_type: str) -> str:
-            """Formata uma seção específica do artigo."""
-            if section_type == 'interest':
-                # Extrai e formata tópicos numerados
-                topics = extract_topics(content)
-                formatted_content = []
-                for num, title in topics:
-                    formatted_content.append(f'<h3>{num}. {title}</h3>')
-                    # Encontra o conteúdo entre este tópico e o próximo
-                    pattern = f'<h3>{num}[\.:\)]?\s+{re.escape(title)}</h3>(.*?)(?=<h3>|$)'
-                    match = re.search(pattern, content, re.DOTALL)
-                    if match:
-                        topic_content = clean_content(match.group(1))
-                        formatted_content.append(topic_content)
-                return '\n\n'.join(formatted_content)
-            elif section_type == 'faq':
-                # Formata perguntas e respostas
-                questions = extract_questions(content)
-                formatted_content = []
-                for question, answer in questions:
-                    formatted_content.extend([
-                        f'<h3>{question}</h3>',
-                        f'<p>{clean_content(answer)}</p>'
-                    ])
-                return '\n\n'.join(formatted_content)
-            else:
-                # Limpa e retorna o conteúdo normal
-                return clean_content(content)
+        Args:
+            name: Nome da seção
+        
+        Returns:
+            Título h2 e conteúdo formatado da seção
+        """
+        content = self.sections[name]
+        if self.spilled:
+            return f'<h2>{SECTION_TITLES[name]}</h2>\n\n{format_section(content, name)}'
         
-        # Construir o HTML
-        html_parts = []
+        if self._rendered is None:
+            self._rendered = {}
+        cached = self._rendered.get(name)
+        if cached and cached[0] is content:
+            return cached[1]
         
-        # Título principal
-        html_parts.append(f'<h1>{self.title}</h1>')
+        fragment = f'<h2>{SECTION_TITLES[name]}</h2>\n\n{format_section(content, name)}'
+        self._rendered[name] = (content, fragment)
+        return fragment
+    
+    def iter_html(self) -> Iterator[str]:
+        """Devolve os fragmentos HTML do artigo pela ordem final.
         
-        # Seções do artigo
-        for section_name, section_title in section_titles.items():
+        Yields:
+            Título h1 seguido do fragmento de cada seção presente
+        """
+        yield f'<h1>{self.title}</h1>'
+        for section_name in SECTION_TITLES:
             if section_name in self.sections:
-                html_parts.append(f'<h2>{section_title}</h2>')
-                content = format_section(self.sections[section_name], section_name)
-                html_parts.append(content)
+                yield self._section_html(section_name)
+    
+    def to_html(self) -> str:
+        """Converte o artigo para HTML formatado.
         
-        # Juntar todas as partes com quebras de linha
-        return '\n\n'.join(html_parts)
+        Returns:
+            HTML formatado do artigo
+        """
+        return '\n\n'.join(self.iter_html())
+    
+    def write_html(self, fileobj: TextIO) -> int:
+        """Escreve o HTML do artigo num ficheiro, fragmento a fragmento.
+        
+        Produz o mesmo resultado que `to_html` sem construir o documento
+        completo em memória.
+        
+        Args:
+            fileobj: Ficheiro de texto aberto para escrita
+        
+        Returns:
+            Número de caracteres escritos
+        """
+        written = 0
+        for index, fragment in enumerate(self.iter_html()):
+            if index:
+                written += fileobj.write('\n\n')
+            written += fileobj.write(fragment)
+        return written
 
 class ContentGenerator:
     """Gerador de conteúdo usando a API Dify."""
     
-    def __init__(self, dify_client: Optional[DifyClient] = None):
+    def __init__(
+        self,
+        dify_client: Optional[DifyClient] = None,
+        max_workers: Optional[int] = None,
+        stream_max_chars: Optional[int] = None
+    ):
         """Inicializa o gerador de conteúdo.
         
         Args:
             dify_client: Cliente Dify (opcional, cria um novo se None)
+            max_workers: Número máximo de seções geradas em paralelo
+                (se None, usa CONCURRENT_REQUESTS das configurações)
+            stream_max_chars: Limite de caracteres por seção em streaming,
+                acima do qual a geração é abortada (opcional)
         """
         self.dify = dify_client or DifyClient()
+        self.max_workers = max(1, max_workers or settings.CONCURRENT_REQUESTS)
+        self.stream_max_chars = stream_max_chars
+        self.last_run_stats: List[Dict] = []
         self.internal_links = self._initialize_internal_links()
         
         logger.info(f"ContentGenerator inicializado com knowledge_base_id: {self.dify.knowledge_base_id}")
@@ -241,40 +504,261 @@ class ContentGenerator:
         subtitle = random.choice(SUBTITLE_PATTERNS)
         return pattern.format(tema=topic, subtitulo=subtitle)
     
-    def generate_article(self, topic: str, category: str) -> Article:
+    def generate_article(
+        self,
+        topic: str,
+        category: str,
+        concurrent: bool = True,
+        on_block: Optional[Callable[[str, str], None]] = None,
+        one_shot: bool = False,
+        reuse_conversation: bool = False,
+        title: Optional[str] = None,
+        subtopics: Optional[List[str]] = None,
+        keywords: Optional[List[str]] = None,
+        faqs: Optional[List[Dict[str, Any]]] = None
+    ) -> Article:
         """Gera um novo artigo.
         
         Args:
             topic: Tópico do artigo
             category: Categoria do artigo
+            concurrent: Se True, gera as seções em paralelo (limitado por max_workers)
+            on_block: Callback chamado com (seção, bloco) à medida que cada bloco
+                HTML chega; se definido, as seções são geradas em streaming
+            one_shot: Se True, pede todas as seções numa única chamada ao Dify
+                (ver `_generate_one_shot`)
+            reuse_conversation: Se True, gera as seções em sequência numa única
+                conversa Dify (ver `_generate_in_conversation`)
+            title: Título do artigo (se None, é gerado com `format_title`)
+            subtopics: Subtópicos que o artigo deve abordar (ver `topic_brief`)
+            keywords: Palavras-chave a usar no texto (ver `topic_brief`)
+            faqs: Perguntas e respostas já escritas; se existirem, a seção de
+                FAQ é montada com elas (`faq_html`) sem chamar o Dify
         
         Returns:
             Artigo gerado
         """
         # Formatar título
-        title = self.format_title(topic)
+        title = title or self.format_title(topic)
         logger.info(f"Gerando artigo: {title}")
         
         # Criar artigo
         article = Article(title, category)
         
+        # Seções já escritas dispensam a chamada ao Dify
+        contents = {}
+        faq = faq_html(faqs or [])
+        if faq:
+            contents['faq'] = faq
+        sections = [section for section in SECTIONS if section not in contents]
+        
         # Gerar seções
-        sections = ['attention', 'interest', 'desire', 'action', 'faq']
-        for section in sections:
-            content = self._generate_section(topic, section)
-            article.add_section(section, content)
+        brief = topic_brief(topic, subtopics, keywords)
+        self.last_run_stats = []
+        start_time = time.perf_counter()
+        if one_shot:
+            generated = self._generate_one_shot(brief, sections, concurrent)
+        elif reuse_conversation:
+            generated = self._generate_in_conversation(brief, sections)
+        else:
+            generated = self._generate_sections(brief, sections, concurrent, on_block)
+        contents.update(zip(sections, generated))
+        for section in SECTIONS:
+            article.add_section(section, contents[section])
         
+        total_tokens = sum(stat['tokens'] or 0 for stat in self.last_run_stats)
+        logger.info(
+            f"Seções geradas em {time.perf_counter() - start_time:.2f}s "
+            f"({len(self.last_run_stats)} chamadas, {total_tokens} tokens)"
+        )
         return article
     
-    def _generate_section(self, topic: str, section: str) -> str:
-        """Gera o conteúdo de uma seção do artigo.
+    def section_problem(self, section: str, content: Optional[str]) -> Optional[str]:
+        """Indica porque é que uma seção precisa de ser regenerada.
+        
+        Uma seção é inválida se faltar, se for o conteúdo de erro de
+        `section_placeholder` ou se o número de palavras estiver fora dos
+        limites de `ACIDAValidator.SECTION_WORDS` (quando a seção os tem).
+        
+        Args:
+            section: Nome da seção
+            content: Conteúdo atual da seção (None se faltar)
+        
+        Returns:
+            Descrição do problema ou None se a seção for válida
+        """
+        if content is None:
+            return "seção em falta"
+        if not content.strip() or content.strip() == section_placeholder(section):
+            return "falha na geração"
+        
+        bounds = ACIDAValidator.SECTION_WORDS.get(section)
+        if bounds:
+            # Mesma contagem de palavras usada por ACIDAValidator.validate_content
+            words = len(content.split())
+            min_words, max_words = bounds
+            if not min_words <= words <= max_words:
+                return f"{words} palavras (esperado: {min_words}-{max_words})"
+        return None
+    
+    def repair(self, article: Article, topic: Optional[str] = None, concurrent: bool = True) -> Dict[str, str]:
+        """Regenera apenas as seções em falta ou inválidas de um artigo.
+        
+        As seções válidas não são tocadas. As inválidas (ver `section_problem`)
+        são geradas de novo, em paralelo, sem passar pelo cache de respostas,
+        que devolveria o mesmo conteúdo. O resultado não é validado de novo:
+        chame `repair` outra vez se necessário.
+        
+        Args:
+            article: Artigo a reparar (alterado no próprio objeto)
+            topic: Tópico usado nos prompts (se None, usa o título do artigo)
+            concurrent: Se True, regenera as seções em paralelo
+        
+        Returns:
+            Seções regeneradas e o problema encontrado em cada uma
+        """
+        problems = {}
+        for section in SECTIONS:
+            problem = self.section_problem(section, article.sections.get(section))
+            if problem:
+                problems[section] = problem
+        
+        if not problems:
+            logger.info(f"Nenhuma seção a reparar em: {article.title}")
+            return {}
+        
+        logger.warning(f"A regenerar {len(problems)} seções de '{article.title}': {problems}")
+        self.last_run_stats = []
+        contents = self._generate_sections(topic or article.title, list(problems), concurrent, use_cache=False)
+        for section, content in zip(problems, contents):
+            article.add_section(section, content)
+        return problems
+    
+    def _generate_in_conversation(self, topic: str, sections: List[str]) -> List[str]:
+        """Gera as seções em sequência dentro de uma única conversa Dify.
+        
+        A primeira seção abre a conversa e o conversation_id devolvido é
+        passado às seguintes, para que o contexto do artigo e a pesquisa na
+        base de conhecimento sejam aproveitados. Os pedidos numa conversa não
+        usam o cache de respostas. Compare `last_run_stats` com o modo
+        normal para medir a diferença de tokens e latência.
+        
+        Args:
+            topic: Tópico do artigo
+            sections: Nomes das seções a gerar
+        
+        Returns:
+            Conteúdos das seções, na mesma ordem de `sections`
+        """
+        conversation: Dict[str, Optional[str]] = {'id': None}
+        contents = [self._generate_section(topic, section, conversation=conversation) for section in sections]
+        logger.info(f"Conversa Dify usada para o artigo: {conversation['id']}")
+        return contents
+    
+    def _generate_sections(
+        self,
+        topic: str,
+        sections: List[str],
+        concurrent: bool = True,
+        on_block: Optional[Callable[[str, str], None]] = None,
+        use_cache: bool = True
+    ) -> List[str]:
+        """Gera várias seções, em paralelo ou em sequência.
+        
+        As seções são independentes entre si, por isso o tempo total em modo
+        paralelo aproxima-se do tempo da seção mais lenta.
+        
+        Args:
+            topic: Tópico do artigo
+            sections: Nomes das seções a gerar
+            concurrent: Se True, usa um pool de threads com max_workers
+            on_block: Callback de streaming (ver `_generate_section`)
+            use_cache: Se False, ignora o cache de respostas do Dify
+        
+        Returns:
+            Conteúdos das seções, na mesma ordem de `sections`
+        """
+        options = {}
+        if on_block is not None:
+            options['on_block'] = on_block
+        if not use_cache:
+            options['use_cache'] = False
+        
+        def generate(section: str) -> str:
+            return self._generate_section(topic, section, **options)
+        
+        workers = min(self.max_workers, len(sections))
+        if not concurrent or workers <= 1:
+            return [generate(section) for section in sections]
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="section") as executor:
+            return list(executor.map(generate, sections))
+    
+    def _one_shot_prompt(self, topic: str, sections: List[str]) -> str:
+        """Monta o prompt que pede várias seções numa única resposta JSON.
+        
+        Args:
+            topic: Tópico do artigo
+            sections: Nomes das seções a gerar
+        
+        Returns:
+            Prompt do modo one-shot
+        """
+        instructions = '\n\n'.join(
+            f'"{section}": {self._section_prompt(topic, section)}' for section in sections
+        )
+        keys = ', '.join(f'"{section}"' for section in sections)
+        return f"""Escreva um artigo completo sobre {topic}, dividido nas seções descritas abaixo.
+        Responda apenas com um objeto JSON válido com as chaves {keys}.
+        O valor de cada chave é o HTML da respetiva seção, sem texto fora do JSON.
+        
+        {instructions}"""
+    
+    def _generate_one_shot(self, topic: str, sections: List[str], concurrent: bool = True) -> List[str]:
+        """Gera todas as seções numa única chamada ao Dify.
+        
+        O tópico e as regras de formatação são enviados uma só vez, em vez de
+        repetidos em cada pedido. As seções que faltarem ou não puderem ser
+        interpretadas são geradas individualmente.
+        
+        Args:
+            topic: Tópico do artigo
+            sections: Nomes das seções a gerar
+            concurrent: Se True, as seções em falta são geradas em paralelo
+        
+        Returns:
+            Conteúdos das seções, na mesma ordem de `sections`
+        """
+        parsed: Dict[str, str] = {}
+        try:
+            start_time = time.perf_counter()
+            response = self.dify.generate_content(self._one_shot_prompt(topic, sections))
+            self.last_run_stats.append({
+                'section': 'one-shot',
+                'seconds': time.perf_counter() - start_time,
+                'tokens': usage_tokens(response) if isinstance(response, dict) else None
+            })
+            if response and 'answer' in response:
+                parsed = parse_sections_json(response['answer'], sections)
+        except Exception as e:
+            logger.error(f"Erro na geração one-shot: {str(e)}")
+        
+        missing = [section for section in sections if section not in parsed]
+        if missing:
+            logger.warning(f"Seções em falta na resposta one-shot, a gerar individualmente: {missing}")
+            parsed.update(zip(missing, self._generate_sections(topic, missing, concurrent)))
+        
+        return [parsed[section] for section in sections]
+    
+    def _section_prompt(self, topic: str, section: str) -> str:
+        """Monta o prompt de uma seção do artigo.
         
         Args:
             topic: Tópico do artigo
             section: Nome da seção
         
         Returns:
-            Conteúdo da seção
+            Prompt da seção
         """
         # Mapear seções para prompts específicos
         prompts = {
@@ -303,15 +787,107 @@ class ContentGenerator:
             Formate cada pergunta com <strong> e cada resposta em <p>.
             Foque em dúvidas comuns e respostas práticas."""
         }
+        return prompts[section]
+    
+    def stream_section(self, topic: str, section: str, max_chars: Optional[int] = None) -> Iterator[str]:
+        """Gera uma seção em streaming, devolvendo blocos HTML completos.
+        
+        Cada bloco (parágrafo, subtítulo, lista...) é devolvido assim que a
+        respetiva tag de fecho chega, permitindo iniciar a limpeza e validação
+        antes do fim da geração.
         
+        Args:
+            topic: Tópico do artigo
+            section: Nome da seção
+            max_chars: Limite de caracteres; ao ser excedido a geração é abortada
+                (se None, usa stream_max_chars do gerador)
+        
+        Yields:
+            Blocos HTML completos da seção
+        
+        Raises:
+            ValidationError: Se a seção exceder max_chars; os blocos já
+                devolvidos estão incompletos e devem ser descartados
+        """
+        max_chars = max_chars or self.stream_max_chars
+        chunks = self.dify.stream_content(self._section_prompt(topic, section))
+        received = 0
+        
+        def limited_chunks() -> Iterator[str]:
+            nonlocal received
+            for chunk in chunks:
+                received += len(chunk)
+                yield chunk
+                if max_chars and received > max_chars:
+                    logger.warning(f"Seção {section} excedeu {max_chars} caracteres, geração abortada")
+                    # Fechar o gerador do cliente aborta o pedido no Dify
+                    close = getattr(chunks, 'close', None)
+                    if close is not None:
+                        close()
+                    raise ValidationError(f"Seção {section} excedeu {max_chars} caracteres")
+        
+        yield from iter_html_blocks(limited_chunks())
+    
+    def _generate_section(
+        self,
+        topic: str,
+        section: str,
+        on_block: Optional[Callable[[str, str], None]] = None,
+        conversation: Optional[Dict[str, Optional[str]]] = None,
+        use_cache: bool = True
+    ) -> str:
+        """Gera o conteúdo de uma seção do artigo.
+        
+        Args:
+            topic: Tópico do artigo
+            section: Nome da seção
+            on_block: Callback chamado com (seção, bloco) para cada bloco HTML
+                recebido; se definido, a seção é gerada em streaming. Se a
+                geração for abortada por exceder o limite, os blocos já
+                recebidos são descartados e a seção fica com o marcador
+                (reparável com `repair`)
+            conversation: Estado partilhado {'id': conversation_id} da conversa
+                Dify; preenchido com o ID devolvido pela primeira resposta
+            use_cache: Se False, ignora o cache de respostas do Dify
+        
+        Returns:
+            Conteúdo da seção
+        """
         # Gerar conteúdo usando o Dify
         try:
-            response = self.dify.generate_content(prompts[section])
+            if on_block is not None:
+                blocks = []
+                for block in self.stream_section(topic, section):
+                    blocks.append(block)
+                    on_block(section, block)
+                if blocks:
+                    return '\n'.join(blocks)
+                logger.error(f"Erro ao gerar conteúdo para seção {section}: resposta vazia")
+                return section_placeholder(section)
+            
+            conversation_id = conversation['id'] if conversation else None
+            start_time = time.perf_counter()
+            response = self.dify.generate_content(
+                self._section_prompt(topic, section),
+                conversation_id=conversation_id,
+                # Também a primeira seção (ainda sem ID): uma resposta em cache
+                # reabriria uma conversa antiga ou partilhada com outro artigo
+                use_cache=use_cache and conversation is None
+            )
+            self.last_run_stats.append({
+                'section': section,
+                'seconds': time.perf_counter() - start_time,
+                'tokens': usage_tokens(response) if isinstance(response, dict) else None
+            })
+            
+            if conversation is not None and not conversation['id'] and isinstance(response, dict):
+                conversation['id'] = response.get('conversation_id')
+            
             if response and 'answer' in response:
                 return response['answer']
             else:
                 logger.error(f"Erro ao gerar conteúdo para seção {section}: resposta inválida")
-                return f"<p>Erro ao gerar conteúdo para {section}</p>"
+                return section_placeholder(section)
         except Exception as e:
             logger.error(f"Erro ao gerar conteúdo para seção {section}: {str(e)}")
-            return f"<p>Erro ao gerar conteúdo para {section}</p>"
\ No newline at end of file
+            return section_placeholder(section)
\ No newline at end of file
@@ -11,12 +11,14 @@ https://descomplicar.pt
 import os
 import json
 import logging
-from typing import Dict, Optional
+from typing import Dict, Iterator, Optional
 import requests
-from dotenv import load_dotenv
-
-# Carregar variáveis de ambiente
-load_dotenv()
+from src.config.env import load_env
+from src.utils import http_client
+from src.utils.dify import iter_answer_chunks, payload_tokens, retry_safe, usage_tokens
+from src.utils.llm_cache import LLMCache, get_llm_cache
+from src.utils.rate_limit import get_dify_rate_limiter
+from src.utils.singleflight import dify_requests
 
 # Configuração do logging
 logger = logging.getLogger(__name__)
@@ -24,14 +26,19 @@ logger = logging.getLogger(__name__)
 class DifyClient:
     """Cliente para interação com a API Dify."""
     
-    def __init__(self, api_key: str = None, base_url: str = None, knowledge_base_id: str = None):
+    def __init__(self, api_key: str = None, base_url: str = None, knowledge_base_id: str = None,
+                 cache: Optional[LLMCache] = None):
         """Inicializa o cliente Dify.
         
         Args:
             api_key: Chave de API do Dify (se None, usa DIFY_API_KEY do .env)
             base_url: URL base da API (se None, usa DIFY_API_URL do .env)
             knowledge_base_id: ID da base de conhecimento (se None, usa DIFY_KNOWLEDGE_BASE_ID do .env)
+            cache: Cache de respostas (se None, usa o cache partilhado do processo)
         """
+        self.cache = cache or get_llm_cache()
+        self.rate_limiter = get_dify_rate_limiter()
+        load_env()
         self.api_key = api_key or os.getenv('DIFY_API_KEY')
         self.base_url = base_url or os.getenv('DIFY_API_URL')
         self.knowledge_base_id = knowledge_base_id or os.getenv('DIFY_KNOWLEDGE_BASE_ID')
@@ -47,12 +54,39 @@ class DifyClient:
         logger.info(f"DifyClient inicializado com base_url: {self.base_url}")
         logger.debug(f"Headers: {json.dumps(self.headers, indent=2)}")
     
-    def generate_content(self, prompt: str, conversation_id: Optional[str] = None) -> Dict:
+    def _post(self, endpoint: str, payload: Dict) -> Dict:
+        """Envia um POST ao Dify, dentro do orçamento RPM/TPM, e devolve a resposta JSON.
+        
+        O orçamento é reservado uma vez por chamada: as novas tentativas
+        feitas por `http_client.request` não são cobradas ao limitador.
+        """
+        estimated = payload_tokens(payload)
+        self.rate_limiter.acquire(estimated)
+        
+        response = http_client.post(endpoint, headers=self.headers, json=payload, retry_unsafe=retry_safe(payload))
+        
+        # Log da resposta
+        logger.debug(f"Status code: {response.status_code}")
+        logger.debug(f"Response headers: {json.dumps(dict(response.headers), indent=2)}")
+        logger.debug(f"Response body: {response.text}")
+        
+        response.raise_for_status()
+        data = response.json()
+        
+        self.rate_limiter.settle(estimated, usage_tokens(data) or estimated)
+        return data
+    
+    def generate_content(self, prompt: str, conversation_id: Optional[str] = None, use_cache: bool = True) -> Dict:
         """Gera conteúdo usando a API Dify.
         
+        Pedidos sem conversa são servidos pelo cache de respostas quando
+        possível; pedidos numa conversa, ou com use_cache=False, nunca usam
+        o cache nem partilham a chamada com pedidos idênticos em curso.
+        
         Args:
             prompt: Prompt para geração de conteúdo
             conversation_id: ID da conversa para continuidade (opcional)
+            use_cache: Se False, ignora o cache de respostas
         
         Returns:
             Resposta da API com o conteúdo gerado
@@ -71,22 +105,66 @@ class DifyClient:
         logger.debug(f"Enviando requisição para {endpoint}")
         logger.debug(f"Payload: {json.dumps(payload, indent=2)}")
         
+        key = LLMCache.make_key(
+            endpoint, prompt, None, self.knowledge_base_id, app=self.api_key, conversation_id=conversation_id
+        )
+        use_cache = use_cache and conversation_id is None
+        
         try:
-            response = requests.post(endpoint, headers=self.headers, json=payload)
-            
-            # Log da resposta
-            logger.debug(f"Status code: {response.status_code}")
-            logger.debug(f"Response headers: {json.dumps(dict(response.headers), indent=2)}")
-            logger.debug(f"Response body: {response.text}")
+            if not use_cache:
+                return self._post(endpoint, payload)
             
-            response.raise_for_status()
-            return response.json()
+            # Pedidos idênticos em curso partilham a mesma chamada HTTP
+            return dify_requests.do(
+                key,
+                lambda: self.cache.get_or_call(key, lambda: self._post(endpoint, payload), use_cache)
+            )
         except requests.exceptions.RequestException as e:
             logger.error(f"Erro ao gerar conteúdo: {str(e)}")
             if hasattr(e.response, 'text'):
                 logger.error(f"Detalhes do erro: {e.response.text}")
             raise
     
+    def stream_content(self, prompt: str, conversation_id: Optional[str] = None) -> Iterator[str]:
+        """Gera conteúdo em modo streaming (server-sent events).
+        
+        Os fragmentos são devolvidos à medida que o Dify os envia. Fechar o
+        gerador antes do fim aborta a geração.
+        
+        Args:
+            prompt: Prompt para geração de conteúdo
+            conversation_id: ID da conversa para continuidade (opcional)
+        
+        Yields:
+            Fragmentos do conteúdo gerado
+        """
+        endpoint = f"{self.base_url}/chat-messages"
+        
+        payload = {
+            "inputs": {},
+            "query": prompt,
+            "user": "gerador-wp",
+            "response_mode": "streaming",
+            "conversation_id": conversation_id,
+            "knowledge_base_id": self.knowledge_base_id
+        }
+        
+        logger.debug(f"Enviando requisição em streaming para {endpoint}")
+        estimated = payload_tokens(payload)
+        self.rate_limiter.acquire(estimated)
+        
+        try:
+            with http_client.post(
+                endpoint, headers=self.headers, json=payload, stream=True, retry_unsafe=retry_safe(payload)
+            ) as response:
+                response.raise_for_status()
+                used = yield from iter_answer_chunks(http_client.iter_sse_events(response))
+            # Um stream abortado fica cobrado pela estimativa
+            self.rate_limiter.settle(estimated, used or estimated)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Erro ao gerar conteúdo em streaming: {str(e)}")
+            raise
+    
     def get_similar_content(self, query: str, limit: int = 5) -> Dict:
         """Busca conteúdo similar na base de conhecimento.
         
@@ -105,9 +183,7 @@ class DifyClient:
         }
         
         try:
-            response = requests.post(endpoint, headers=self.headers, json=payload)
-            response.raise_for_status()
-            return response.json()
+            return self._post(endpoint, payload)
         except requests.exceptions.RequestException as e:
             logger.error(f"Erro ao buscar conteúdo similar: {str(e)}")
             raise
@@ -129,9 +205,7 @@ class DifyClient:
         }
         
         try:
-            response = requests.post(endpoint, headers=self.headers, json=payload)
-            response.raise_for_status()
-            return response.json()
+            return self._post(endpoint, payload)
         except requests.exceptions.RequestException as e:
             logger.error(f"Erro ao validar conteúdo: {str(e)}")
             raise
\ No newline at end of file
@@ -9,20 +9,56 @@ https://descomplicar.pt
 """
 
 import os
+import socket
 import logging
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
+import xmlrpc.client as xmlrpc_client
 import requests
-from wordpress_xmlrpc import Client, WordPressPost
-from wordpress_xmlrpc.methods import media, posts, taxonomies
-from wordpress_xmlrpc.compat import xmlrpc_client
-from dotenv import load_dotenv
-
-# Carregar variáveis de ambiente
-load_dotenv()
+from src.config import config
+from src.config.env import load_env
+from src.utils.media_index import MediaIndex
+from src.utils.resilience import RETRYABLE_STATUS, call_with_retry
 
 # Configuração do logging
 logger = logging.getLogger(__name__)
 
+def _timeout_transport(url: str, timeout: float) -> xmlrpc_client.Transport:
+    """Cria um transporte XML-RPC com timeout nas ligações.
+    
+    Args:
+        url: URL do endpoint XML-RPC
+        timeout: Timeout em segundos
+    
+    Returns:
+        Transporte HTTP ou HTTPS conforme a URL
+    """
+    base = xmlrpc_client.SafeTransport if url.startswith('https://') else xmlrpc_client.Transport
+    
+    class TimeoutTransport(base):
+        def make_connection(self, host):
+            connection = super().make_connection(host)
+            connection.timeout = timeout
+            return connection
+    
+    return TimeoutTransport()
+
+def _is_retryable(error: BaseException) -> bool:
+    """Indica se um erro XML-RPC justifica nova tentativa."""
+    if isinstance(error, xmlrpc_client.ProtocolError):
+        return error.errcode in RETRYABLE_STATUS
+    return True
+
+def _is_retryable_write(error: BaseException) -> bool:
+    """Indica se uma escrita XML-RPC pode ser repetida sem risco de duplicar.
+    
+    Só é seguro quando o servidor não chegou a receber o pedido (ligação
+    recusada ou nome não resolvido) ou o rejeitou por limite de pedidos
+    (429). Timeouts e 5xx podem chegar depois de o post já estar criado.
+    """
+    if isinstance(error, xmlrpc_client.ProtocolError):
+        return error.errcode == 429
+    return isinstance(error, (ConnectionRefusedError, socket.gaierror))
+
 class WordPressClient:
     """Cliente para interação com WordPress via XML-RPC."""
     
@@ -34,6 +70,7 @@ class WordPressClient:
             username: Nome de utilizador (se None, usa WP_USERNAME do .env)
             password: Senha (se None, usa WP_PASSWORD do .env)
         """
+        load_env()
         self.url = url or os.getenv('WP_URL')
         self.username = username or os.getenv('WP_USERNAME')
         self.password = password or os.getenv('WP_PASSWORD')
@@ -45,9 +82,35 @@ class WordPressClient:
         if not self.url.endswith('/xmlrpc.php'):
             self.url = f"{self.url.rstrip('/')}/xmlrpc.php"
         
-        self.client = Client(self.url, self.username, self.password)
+        # O wordpress_xmlrpc só é importado quando o cliente é usado
+        from wordpress_xmlrpc import Client
+        
+        self.client = Client(
+            self.url, self.username, self.password,
+            transport=_timeout_transport(self.url, config.REQUEST_TIMEOUT)
+        )
+        # Índice local dos media enviados (partilhado com o cliente REST do mesmo site)
+        self.media = MediaIndex(self.url)
         logger.info(f"WordPressClient inicializado para {self.url}")
     
+    def _call(self, method: Any, idempotent: bool = True) -> Any:
+        """Executa um método XML-RPC com novas tentativas e circuit breaker.
+        
+        Args:
+            method: Método XML-RPC a executar
+            idempotent: Se False (métodos que criam conteúdo), só repete
+                quando o pedido não chegou ao servidor
+        
+        Returns:
+            Resultado do método
+        """
+        return call_with_retry(
+            lambda: self.client.call(method),
+            self.url,
+            (OSError, xmlrpc_client.ProtocolError),
+            retry_if=_is_retryable if idempotent else _is_retryable_write
+        )
+    
     def create_post(self, title: str, content: str, status: str = 'draft',
                    category_ids: List[int] = None, tag_ids: List[int] = None,
                    featured_media_id: Optional[int] = None) -> int:
@@ -64,6 +127,9 @@ class WordPressClient:
         Returns:
             ID do post criado
         """
+        from wordpress_xmlrpc import WordPressPost
+        from wordpress_xmlrpc.methods import posts
+        
         post = WordPressPost()
         post.title = title
         post.content = content
@@ -79,7 +145,7 @@ class WordPressClient:
             post.thumbnail = featured_media_id
         
         try:
-            post_id = self.client.call(posts.NewPost(post))
+            post_id = self._call(posts.NewPost(post), idempotent=False)
             logger.info(f"Post criado com ID: {post_id}")
             return post_id
         except Exception as e:
@@ -89,6 +155,9 @@ class WordPressClient:
     def upload_media(self, file_path: str, title: Optional[str] = None) -> int:
         """Faz upload de um ficheiro de media para o WordPress.
         
+        Um ficheiro com o mesmo conteúdo (SHA-256) de outro já enviado não
+        é enviado de novo: é devolvido o ID do anexo existente.
+        
         Args:
             file_path: Caminho do ficheiro
             title: Título do media (opcional)
@@ -96,35 +165,65 @@ class WordPressClient:
         Returns:
             ID do media no WordPress
         """
+        from wordpress_xmlrpc.methods import media
+        
         # Preparar dados do ficheiro
         with open(file_path, 'rb') as img:
-            data = {
-                'name': os.path.basename(file_path),
-                'type': 'image/jpeg',  # Ajustar conforme necessário
-                'bits': xmlrpc_client.Binary(img.read()),
-                'overwrite': True
-            }
-            
-            if title:
-                data['title'] = title
+            content = img.read()
+        data = {
+            'name': os.path.basename(file_path),
+            'type': 'image/jpeg',  # Ajustar conforme necessário
+            'bits': xmlrpc_client.Binary(content),
+            'overwrite': True
+        }
         
-        try:
-            response = self.client.call(media.UploadFile(data))
-            media_id = response['id']
+        if title:
+            data['title'] = title
+        
+        def upload() -> int:
+            response = self._call(media.UploadFile(data), idempotent=False)
+            media_id = int(response['id'])
             logger.info(f"Media enviado com ID: {media_id}")
             return media_id
+        
+        try:
+            return self.media.get_or_upload(content, upload, data['name'])
         except Exception as e:
             logger.error(f"Erro ao enviar media: {str(e)}")
             raise
     
+    def reconcile_media(self) -> int:
+        """Remove do índice de media os anexos apagados no WordPress.
+        
+        Returns:
+            Número de entradas removidas
+        """
+        from wordpress_xmlrpc.methods import media
+        
+        def existing(media_ids: List[int]) -> List[int]:
+            found = []
+            for media_id in media_ids:
+                try:
+                    self._call(media.GetMediaItem(media_id))
+                    found.append(media_id)
+                except xmlrpc_client.Fault as e:
+                    # 404: anexo inexistente; outros erros não devem apagar entradas
+                    if e.faultCode != 404:
+                        raise
+            return found
+        
+        return self.media.reconcile(existing)
+    
     def get_categories(self) -> List[Dict]:
         """Obtém lista de categorias do WordPress.
         
         Returns:
             Lista de categorias com seus IDs e nomes
         """
+        from wordpress_xmlrpc.methods import taxonomies
+        
         try:
-            categories = self.client.call(taxonomies.GetTerms('category'))
+            categories = self._call(taxonomies.GetTerms('category'))
             return [{'id': cat.id, 'name': cat.name, 'slug': cat.slug} for cat in categories]
         except Exception as e:
             logger.error(f"Erro ao obter categorias: {str(e)}")
@@ -136,8 +235,10 @@ class WordPressClient:
         Returns:
             Lista de tags com seus IDs e nomes
         """
+        from wordpress_xmlrpc.methods import taxonomies
+        
         try:
-            tags = self.client.call(taxonomies.GetTerms('post_tag'))
+            tags = self._call(taxonomies.GetTerms('post_tag'))
             return [{'id': tag.id, 'name': tag.name, 'slug': tag.slug} for tag in tags]
         except Exception as e:
             logger.error(f"Erro ao obter tags: {str(e)}")
@@ -153,6 +254,8 @@ class WordPressClient:
         Returns:
             ID da tag criada
         """
+        from wordpress_xmlrpc.methods import taxonomies
+        
         tag_data = {
             'name': name
         }
@@ -161,11 +264,11 @@ class WordPressClient:
             tag_data['slug'] = slug
         
         try:
-            tag = self.client.call(taxonomies.NewTerm({
+            tag = self._call(taxonomies.NewTerm({
                 'taxonomy': 'post_tag',
                 'name': name,
                 'slug': slug
-            }))
+            }), idempotent=False)
             logger.info(f"Tag criada com ID: {tag.id}")
             return tag.id
         except Exception as e:
@@ -191,6 +294,9 @@ class WordPressClient:
         Returns:
             True se atualizado com sucesso
         """
+        from wordpress_xmlrpc import WordPressPost
+        from wordpress_xmlrpc.methods import posts
+        
         post = WordPressPost()
         post.id = post_id
         
@@ -208,7 +314,7 @@ class WordPressClient:
             post.thumbnail = featured_media_id
         
         try:
-            result = self.client.call(posts.EditPost(post_id, post))
+            result = self._call(posts.EditPost(post_id, post))
             logger.info(f"Post {post_id} atualizado: {result}")
             return result
         except Exception as e:
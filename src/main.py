@@ -1,17 +1,109 @@
 """
 Módulo principal do GeradorWP.
+
+Há dois modos de execução com as mesmas opções: a Crew do CrewAI
+(predefinido) e o orquestrador nativo (--native), que usa diretamente o
+ContentGenerator, o ImageGenerator e o WordPressClient sem importar o
+CrewAI. Ambos reportam o tempo de arranque e o tempo do artigo.
 """
 
 import argparse
 import sys
-from typing import List, Optional
-from crewai import Crew, Task
+import time
+from typing import Any, List, Optional, Tuple
 
-from .agents.researcher_agent import ResearcherAgent
-from .agents.writer_agent import WriterAgent
-from .agents.publisher_agent import PublisherAgent
 from .config.config import validate_config
 
+def run_crewai(args: argparse.Namespace) -> Tuple[Any, float, float]:
+    """
+    Gera e publica o artigo com a Crew do CrewAI.
+    
+    Args:
+        args: Argumentos da linha de comando
+        
+    Returns:
+        Tuplo (resultado, segundos de arranque, segundos do artigo)
+    """
+    start = time.perf_counter()
+    
+    # Importados apenas neste modo: o CrewAI domina o tempo de arranque
+    from crewai import Crew, Task
+    from .agents.researcher_agent import ResearcherAgent
+    from .agents.writer_agent import WriterAgent
+    from .agents.publisher_agent import PublisherAgent
+    
+    # Inicializa os agentes
+    researcher = ResearcherAgent()
+    writer = WriterAgent()
+    publisher = PublisherAgent()
+    
+    # Define as tarefas
+    research_task = Task(
+        description=f"Pesquisar informações sobre {args.topic}",
+        agent=researcher.agent
+    )
+    
+    writing_task = Task(
+        description="Criar o conteúdo do artigo",
+        agent=writer.agent
+    )
+    
+    publishing_task = Task(
+        description="Publicar o artigo no WordPress",
+        agent=publisher.agent
+    )
+    
+    # Cria a crew
+    crew = Crew(
+        agents=[researcher.agent, writer.agent, publisher.agent],
+        tasks=[research_task, writing_task, publishing_task],
+        verbose=True
+    )
+    ready = time.perf_counter()
+    
+    # Executa as tarefas
+    result = crew.kickoff()
+    return result, ready - start, time.perf_counter() - ready
+
+def run_native(args: argparse.Namespace) -> Tuple[Any, float, float]:
+    """
+    Gera e publica o artigo com o orquestrador nativo.
+    
+    As etapas correm no pipeline do processamento em lote: a imagem
+    destacada e a taxonomia são preparadas em paralelo com o texto.
+    
+    Args:
+        args: Argumentos da linha de comando
+        
+    Returns:
+        Tuplo (resultado, segundos de arranque, segundos do artigo)
+    """
+    start = time.perf_counter()
+    
+    from .batch import BatchRunner
+    from .generators.content_generator import ContentGenerator
+    from .utils.image import ImageGenerator
+    from .utils.wordpress import WordPressClient
+    
+    runner = BatchRunner(
+        wordpress=WordPressClient(),
+        image_generator=ImageGenerator(),
+        workers=1,
+        status="draft" if args.draft else "publish"
+    )
+    ready = time.perf_counter()
+    
+    # O título segue os mesmos padrões de `generate_article` sem título;
+    # as palavras-chave orientam os prompts e, sem tags explícitas, servem de tags
+    result = runner.process({
+        "title": ContentGenerator(runner.dify).format_title(args.topic),
+        "category": args.category,
+        "keywords": args.keywords or [],
+        "tags": args.tags or args.keywords or [],
+        "slug": ""
+    })
+    return result.get("post"), ready - start, time.perf_counter() - ready
+
 def main(args: Optional[List[str]] = None) -> int:
     """
     Função principal do GeradorWP.
@@ -49,6 +141,11 @@ def main(args: Optional[List[str]] = None) -> int:
         nargs="+",
         help="Tags para o artigo"
     )
+    parser.add_argument(
+        "--native",
+        action="store_true",
+        help="Usar o orquestrador nativo em vez da Crew do CrewAI"
+    )
     
     # Processa os argumentos
     args = parser.parse_args(args)
@@ -57,36 +154,10 @@ def main(args: Optional[List[str]] = None) -> int:
         # Valida as configurações
         validate_config()
         
-        # Inicializa os agentes
-        researcher = ResearcherAgent()
-        writer = WriterAgent()
-        publisher = PublisherAgent()
-        
-        # Define as tarefas
-        research_task = Task(
-            description=f"Pesquisar informações sobre {args.topic}",
-            agent=researcher.agent
-        )
-        
-        writing_task = Task(
-            description="Criar o conteúdo do artigo",
-            agent=writer.agent
-        )
-        
-        publishing_task = Task(
-            description="Publicar o artigo no WordPress",
-            agent=publisher.agent
-        )
-        
-        # Cria e executa a crew
-        crew = Crew(
-            agents=[researcher.agent, writer.agent, publisher.agent],
-            tasks=[research_task, writing_task, publishing_task],
-            verbose=True
-        )
-        
-        # Executa as tarefas
-        result = crew.kickoff()
+        # Executa o modo escolhido
+        run = run_native if args.native else run_crewai
+        result, startup, article = run(args)
+        print(f"Modo {'nativo' if args.native else 'CrewAI'}: arranque {startup:.2f}s, artigo {article:.2f}s")
         
         # Processa o resultado
         if result:
@@ -0,0 +1,467 @@
+"""
+Cliente assíncrono para a API do Dify.
+
+Permite manter dezenas de prompts em curso num único event loop. Todas as
+instâncias partilham um semáforo global (DIFY_MAX_CONCURRENCY) que limita o
+número de requisições simultâneas ao Dify.
+
+Usa `aiohttp` quando disponível; caso contrário, executa a camada de
+transporte síncrona partilhada numa thread.
+
+/**
+ * Autor: Descomplicar - Agência de Aceleração Digital
+ * https://descomplicar.pt
+ */
+"""
+
+import asyncio
+import os
+import threading
+import weakref
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+
+import requests
+
+from . import http_client
+from .dify import (
+    _chat_payload,
+    _completion_payload,
+    _completion_result,
+    _image_payload,
+    _image_result,
+    _streaming,
+    answer_chunk,
+    iter_answer_chunks,
+    payload_tokens,
+    retry_safe,
+    usage_tokens,
+)
+from .exceptions import DifyError
+from .llm_cache import LLMCache, get_llm_cache
+from .rate_limit import get_dify_rate_limiter
+from .resilience import RETRYABLE_STATUS, RetryPolicy, get_breaker
+from .singleflight import dify_requests
+from ..config.env import load_env
+from ..config import config
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - depende do ambiente
+    aiohttp = None
+
+# Exceções de rede tratadas como erro da API Dify
+_NETWORK_ERRORS: tuple = (requests.exceptions.RequestException,)
+if aiohttp is not None:
+    _NETWORK_ERRORS += (aiohttp.ClientError, asyncio.TimeoutError)
+
+# Um semáforo por event loop (as primitivas asyncio ficam ligadas ao loop)
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_semaphore() -> asyncio.Semaphore:
+    """
+    Retorna o semáforo global de concorrência do event loop atual.
+
+    Returns:
+        Semáforo limitado a DIFY_MAX_CONCURRENCY
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(config.DIFY_MAX_CONCURRENCY)
+        _semaphores[loop] = semaphore
+    return semaphore
+
+
+def _stream_sync(
+    endpoint: str,
+    headers: Dict[str, str],
+    payload: Dict[str, Any],
+    settle: Callable[[Optional[int]], None]
+) -> Iterator[str]:
+    """
+    Stream síncrono usado quando o aiohttp não está disponível.
+
+    `settle` recebe os tokens indicados no evento message_end quando o
+    stream termina (não é chamado se o consumidor abortar).
+    """
+    with http_client.post(
+        endpoint, headers=headers, json=payload, stream=True, retry_unsafe=retry_safe(payload)
+    ) as response:
+        response.raise_for_status()
+        used = yield from iter_answer_chunks(http_client.iter_sse_events(response))
+    settle(used)
+
+
+async def _iterate_in_thread(factory: Callable[[], Iterator[str]]) -> AsyncIterator[str]:
+    """
+    Consome um iterador síncrono numa thread e expõe-no como iterador assíncrono.
+
+    Se o consumidor parar antes do fim, o iterador síncrono é fechado na
+    próxima iteração, o que aborta a requisição subjacente.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+    done = object()
+
+    def worker() -> None:
+        iterator = factory()
+        try:
+            for item in iterator:
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        except BaseException as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+
+    future = loop.run_in_executor(None, worker)
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        await future
+
+
+class AsyncDifyClient:
+    """Cliente assíncrono para integração com a API do Dify."""
+
+    def __init__(self, cache: Optional[LLMCache] = None):
+        """
+        Inicializa o cliente Dify com as credenciais do .env.
+
+        Args:
+            cache: Cache de respostas (se None, usa o cache partilhado do processo)
+        """
+        self.cache = cache or get_llm_cache()
+        self.rate_limiter = get_dify_rate_limiter()
+        load_env()
+        self.api_key = os.getenv('DIFY_API_KEY')
+        self.api_url = os.getenv('DIFY_API_URL')
+
+        if not self.api_key or not self.api_url:
+            raise ValueError("DIFY_API_KEY e DIFY_API_URL devem estar definidos no arquivo .env")
+
+        self.headers = {
+            'Authorization': f'Bearer {self.api_key}',
+            'Content-Type': 'application/json'
+        }
+        self._session = None
+
+    async def __aenter__(self) -> "AsyncDifyClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Fecha a sessão HTTP assíncrona, se existir."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self):
+        """Retorna a sessão aiohttp do cliente, criando-a se necessário."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=aiohttp.TCPConnector(limit=config.HTTP_POOL_SIZE),
+                timeout=aiohttp.ClientTimeout(total=config.REQUEST_TIMEOUT)
+            )
+        return self._session
+
+    async def _wait_for_budget(self, tokens: int) -> None:
+        """Reserva o consumo no limitador RPM/TPM e espera sem bloquear o loop."""
+        # O limitador escreve em SQLite (com BEGIN IMMEDIATE): fora do loop
+        wait = await asyncio.to_thread(self.rate_limiter.reserve, tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def _settle(self, estimated: int, actual: Optional[int]) -> None:
+        """Corrige o orçamento com o consumo real, sem bloquear o loop."""
+        await asyncio.to_thread(self.rate_limiter.settle, estimated, actual or estimated)
+
+    async def _post(self, endpoint: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Envia um POST ao Dify respeitando o limite global de concorrência.
+
+        O orçamento RPM/TPM é reservado uma vez por chamada: as novas
+        tentativas (429, 5xx, falhas de ligação) não são cobradas ao limitador.
+
+        Args:
+            endpoint: URL do endpoint
+            payload: Corpo JSON da requisição
+
+        Returns:
+            Resposta JSON da API
+        """
+        estimated = payload_tokens(payload)
+        await self._wait_for_budget(estimated)
+
+        if aiohttp is None:
+            # A camada de transporte síncrona já trata das novas tentativas
+            async with get_semaphore():
+                response = await asyncio.to_thread(
+                    http_client.post, endpoint, headers=self.headers, json=payload,
+                    retry_unsafe=retry_safe(payload)
+                )
+            response.raise_for_status()
+            data = response.json()
+            await self._settle(estimated, usage_tokens(data))
+            return data
+
+        policy = RetryPolicy()
+        breaker = get_breaker(endpoint)
+        # Um pedido (com as suas novas tentativas) conta uma única vez no circuito
+        trial = breaker.before_call(endpoint)
+        try:
+            attempt = 0
+            while True:
+                try:
+                    async with get_semaphore():
+                        async with self._get_session().post(endpoint, json=payload) as response:
+                            if response.status not in RETRYABLE_STATUS or attempt >= policy.max_retries:
+                                # 429 e 4xx mostram que o host está a responder
+                                if response.status >= 500:
+                                    breaker.record_failure()
+                                else:
+                                    breaker.record_success()
+                                response.raise_for_status()
+                                data = await response.json()
+                                await self._settle(estimated, usage_tokens(data))
+                                return data
+                            wait = policy.delay(attempt, response.headers.get("Retry-After"))
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                    if attempt >= policy.max_retries:
+                        breaker.record_failure()
+                        raise
+                    wait = policy.delay(attempt)
+
+                # Espera fora do semáforo para não ocupar vagas de outros pedidos
+                await asyncio.sleep(wait)
+                attempt += 1
+        finally:
+            if trial:
+                breaker.end_trial()
+
+    async def _request(self, key: str, endpoint: str, payload: Dict[str, Any], use_cache: bool) -> Dict[str, Any]:
+        """
+        Executa um pedido ao Dify passando pelo cache de respostas.
+
+        Partilha o grupo single-flight com o cliente síncrono, pelo que
+        pedidos idênticos em curso em threads ou tarefas fazem uma só chamada.
+        Com use_cache=False o pedido é sempre enviado.
+        """
+        if not use_cache:
+            return await self._post(endpoint, payload)
+        return await dify_requests.do_async(
+            key,
+            lambda: self.cache.get_or_call_async(key, lambda: self._post(endpoint, payload), use_cache)
+        )
+
+    async def chat_completion(
+        self,
+        messages: list,
+        temperature: float = 0.3,
+        top_p: float = 0.95,
+        presence_penalty: float = 0,
+        frequency_penalty: float = 0,
+        max_tokens: Optional[int] = None,
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Versão assíncrona de `DifyClient.chat_completion`.
+
+        Args:
+            messages: Lista de mensagens no formato [{"role": "user", "content": "mensagem"}]
+            temperature: Controla a precisão das respostas (0.3 para maior precisão)
+            top_p: Controla a diversidade das respostas (0.0 a 1.0)
+            presence_penalty: Penalidade para repetição de tópicos (-2.0 a 2.0)
+            frequency_penalty: Penalidade para repetição de tokens (-2.0 a 2.0)
+            max_tokens: Número máximo de tokens na resposta
+            use_cache: Se False, ignora o cache de respostas
+
+        Returns:
+            Dict com a resposta da API
+        """
+        endpoint = f"{self.api_url}/chat-messages"
+        payload = _chat_payload(messages)
+        key = LLMCache.make_key(endpoint, payload["query"], temperature, app=self.api_key)
+
+        try:
+            return await self._request(key, endpoint, payload, use_cache)
+        except _NETWORK_ERRORS as e:
+            raise DifyError(f"Erro na chamada à API do Dify: {str(e)}")
+
+    async def completion(
+        self,
+        prompt: str,
+        temperature: float = 0.3,
+        max_tokens: Optional[int] = None,
+        top_p: float = 0.95,
+        frequency_penalty: float = 0,
+        presence_penalty: float = 0,
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Versão assíncrona de `DifyClient.completion`.
+
+        Args:
+            prompt: O texto para completar
+            temperature: Controla a precisão das respostas (0.3 para maior precisão)
+            max_tokens: Número máximo de tokens na resposta
+            top_p: Controla a diversidade das respostas (0.0 a 1.0)
+            frequency_penalty: Penalidade para repetição de tokens (-2.0 a 2.0)
+            presence_penalty: Penalidade para repetição de tópicos (-2.0 a 2.0)
+            use_cache: Se False, ignora o cache de respostas
+
+        Returns:
+            Dict com a resposta da API
+        """
+        endpoint = f"{self.api_url}/completion-messages"
+        key = LLMCache.make_key(endpoint, prompt, temperature, app=self.api_key)
+
+        try:
+            data = await self._request(key, endpoint, _completion_payload(prompt), use_cache)
+            return _completion_result(data)
+        except _NETWORK_ERRORS as e:
+            raise DifyError(f"Erro na chamada à API do Dify: {str(e)}")
+
+    async def stream_completion(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Gera texto em modo streaming, devolvendo fragmentos à medida que chegam.
+
+        Interromper a iteração antes do fim aborta a geração no Dify. Com
+        aiohttp, as novas tentativas e o circuit breaker seguem `_post`, mas
+        uma falha depois do primeiro fragmento já não é repetida.
+
+        Args:
+            prompt: O texto para completar
+
+        Yields:
+            Fragmentos do texto gerado
+        """
+        endpoint = f"{self.api_url}/completion-messages"
+        payload = _streaming(_completion_payload(prompt))
+        estimated = payload_tokens(payload)
+        await self._wait_for_budget(estimated)
+
+        try:
+            if aiohttp is None:
+                def settle(used: Optional[int]) -> None:
+                    self.rate_limiter.settle(estimated, used or estimated)
+
+                async with get_semaphore():
+                    async for chunk in _iterate_in_thread(
+                        lambda: _stream_sync(endpoint, self.headers, payload, settle)
+                    ):
+                        yield chunk
+                return
+
+            # Sem limite total: o stream pode durar mais que REQUEST_TIMEOUT
+            timeout = aiohttp.ClientTimeout(total=None, sock_read=config.REQUEST_TIMEOUT)
+            policy = RetryPolicy()
+            breaker = get_breaker(endpoint)
+            trial = breaker.before_call(endpoint)
+            try:
+                attempt = 0
+                yielded = False
+                while True:
+                    try:
+                        async with get_semaphore():
+                            async with self._get_session().post(endpoint, json=payload, timeout=timeout) as response:
+                                if response.status not in RETRYABLE_STATUS or attempt >= policy.max_retries:
+                                    if response.status >= 500:
+                                        breaker.record_failure()
+                                    else:
+                                        breaker.record_success()
+                                    response.raise_for_status()
+                                    async for raw_line in response.content:
+                                        event = http_client.parse_sse_line(raw_line.decode("utf-8").strip())
+                                        if event is None:
+                                            continue
+                                        if event.get("event") == "message_end":
+                                            await self._settle(estimated, usage_tokens(event))
+                                            return
+                                        chunk = answer_chunk(event)
+                                        if chunk:
+                                            yielded = True
+                                            yield chunk
+                                    return
+                                wait = policy.delay(attempt, response.headers.get("Retry-After"))
+                    except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                        # Depois do primeiro fragmento, repetir duplicaria o texto já entregue
+                        if yielded or attempt >= policy.max_retries:
+                            breaker.record_failure()
+                            raise
+                        wait = policy.delay(attempt)
+
+                    await asyncio.sleep(wait)
+                    attempt += 1
+            finally:
+                if trial:
+                    breaker.end_trial()
+        except _NETWORK_ERRORS as e:
+            raise DifyError(f"Erro na chamada à API do Dify: {str(e)}")
+
+    async def generate_text(self, prompt: str, **kwargs: Any) -> str:
+        """
+        Versão assíncrona de `DifyClient.generate_text`.
+
+        Args:
+            prompt: O prompt para gerar o texto
+            **kwargs: Argumentos adicionais para a API
+
+        Returns:
+            str: O texto gerado
+        """
+        try:
+            if 'temperature' not in kwargs:
+                kwargs['temperature'] = 0.3
+
+            response = await self.completion(prompt, **kwargs)
+            return response["choices"][0]["text"]
+        except Exception as e:
+            raise DifyError(f"Erro ao gerar texto: {str(e)}")
+
+    async def generate_image(
+        self,
+        prompt: str,
+        size: str = "1024x1024",
+        quality: str = "standard",
+        style: str = "natural"
+    ) -> Dict[str, Any]:
+        """
+        Versão assíncrona de `DifyClient.generate_image`.
+
+        Args:
+            prompt: Descrição da imagem
+            size: Tamanho da imagem (1024x1024, 512x512, etc.)
+            quality: Qualidade da imagem (standard, hd)
+            style: Estilo da imagem (natural, vivid)
+
+        Returns:
+            Dict com a URL da imagem gerada
+        """
+        try:
+            data = await self._post(
+                f"{self.api_url}/images/generations",
+                _image_payload(prompt, size, quality, style)
+            )
+            return _image_result(data)
+        except _NETWORK_ERRORS as e:
+            raise DifyError(f"Erro na geração de imagem: {str(e)}")
+
@@ -3,20 +3,40 @@ Sistema de cache para o GeradorWP.
 """
 
 import os
+import re
 import json
 import time
 from typing import Any, Dict, Optional
 from datetime import datetime
+from urllib.parse import urlsplit
 
-from ..config.config import CACHE_TTL, CACHE_DIR
+from ..config import config
+
+def site_key(url: str) -> str:
+    """
+    Nome de ficheiro seguro que identifica o site de uma URL.
+    
+    Args:
+        url: URL de qualquer endpoint do site
+        
+    Returns:
+        Host da URL com os caracteres inválidos trocados por '_'
+    """
+    return re.sub(r'[^\w.-]', '_', urlsplit(url).netloc) or 'local'
 
 class Cache:
     """Classe para gerenciar o cache do sistema."""
     
-    def __init__(self):
-        """Inicializa o sistema de cache."""
-        self.cache_dir = CACHE_DIR
-        self.cache_ttl = CACHE_TTL
+    def __init__(self, cache_dir: Optional[str] = None, cache_ttl: Optional[int] = None):
+        """
+        Inicializa o sistema de cache.
+        
+        Args:
+            cache_dir: Diretório do cache (se None, usa CACHE_DIR)
+            cache_ttl: Validade das entradas em segundos (se None, usa CACHE_TTL)
+        """
+        self.cache_dir = cache_dir or config.CACHE_DIR
+        self.cache_ttl = config.CACHE_TTL if cache_ttl is None else cache_ttl
         
         # Cria o diretório de cache se não existir
         if not os.path.exists(self.cache_dir):
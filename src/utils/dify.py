@@ -8,17 +8,141 @@ https://descomplicar.pt
 import os
 import json
 import requests
-from typing import Dict, Any, Optional, List
-from dotenv import load_dotenv
+from typing import Dict, Any, Generator, Iterable, Iterator, Optional, List
+from . import http_client
+from ..config.env import load_env
 from .exceptions import DifyError
+from .llm_cache import LLMCache, get_llm_cache
+from .rate_limit import estimate_tokens, get_dify_rate_limiter
+from .singleflight import dify_requests
 
-load_dotenv()
+def _last_user_message(messages: List[Dict[str, Any]]) -> str:
+    """Extrai o conteúdo da última mensagem do utilizador."""
+    for msg in reversed(messages):
+        if msg.get("role") == "user":
+            return msg.get("content", "")
+    return ""
+
+def _chat_payload(messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Monta o payload para o endpoint chat-messages."""
+    return {
+        "inputs": {},
+        "query": _last_user_message(messages),
+        "response_mode": "blocking",
+        "conversation_id": "",
+        "user": "default"
+    }
+
+def _completion_payload(prompt: str) -> Dict[str, Any]:
+    """Monta o payload para o endpoint completion-messages."""
+    return {
+        "inputs": {},
+        "query": prompt,
+        "response_mode": "blocking",
+        "user": "default"
+    }
+
+def _image_payload(prompt: str, size: str, quality: str, style: str) -> Dict[str, Any]:
+    """Monta o payload para o endpoint de geração de imagens."""
+    return {
+        "prompt": prompt,
+        "size": size,
+        "quality": quality,
+        "style": style,
+        "response_format": "url"
+    }
+
+def _completion_result(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Converte a resposta do Dify para o formato de completion."""
+    return {
+        "choices": [{
+            "text": data.get("answer", ""),
+            "finish_reason": "stop"
+        }]
+    }
+
+def _image_result(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Extrai a URL da imagem da resposta do Dify."""
+    return {"url": data.get("data", [{}])[0].get("url", "")}
+
+def usage_tokens(data: Dict[str, Any]) -> Optional[int]:
+    """Extrai o total de tokens consumidos de uma resposta do Dify, se existir."""
+    usage = (data.get("metadata") or {}).get("usage") or {}
+    total = usage.get("total_tokens")
+    return int(total) if total is not None else None
+
+def payload_tokens(payload: Dict[str, Any]) -> int:
+    """Estima os tokens de entrada de um payload do Dify."""
+    return estimate_tokens(payload.get("query") or payload.get("prompt"))
+
+def retry_safe(payload: Dict[str, Any]) -> bool:
+    """
+    Indica se um pedido ao Dify pode ser repetido depois de um 5xx ou timeout.
+
+    Gerar texto não cria nada no servidor que fique duplicado, exceto numa
+    conversa existente, onde a repetição acrescentaria a mensagem duas vezes.
+    """
+    return not payload.get("conversation_id")
+
+def _streaming(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Converte um payload bloqueante para o modo streaming."""
+    return {**payload, "response_mode": "streaming"}
+
+def answer_chunk(event: Dict[str, Any]) -> Optional[str]:
+    """
+    Extrai o fragmento de texto de um evento de streaming do Dify.
+
+    Args:
+        event: Evento SSE já interpretado
+
+    Returns:
+        Fragmento de texto ou None se o evento não tiver texto
+
+    Raises:
+        DifyError: Se o Dify enviar um evento de erro
+    """
+    event_type = event.get("event")
+    if event_type == "error":
+        raise DifyError(f"Erro no streaming do Dify: {event.get('message', '')}")
+    if event_type in ("message", "agent_message"):
+        return event.get("answer") or None
+    return None
+
+def iter_answer_chunks(events: Iterable[Dict[str, Any]]) -> Generator[str, None, Optional[int]]:
+    """
+    Converte os eventos de streaming do Dify em fragmentos de texto.
+
+    Args:
+        events: Eventos SSE já interpretados
+
+    Yields:
+        Fragmentos de texto pela ordem de chegada
+
+    Returns:
+        Tokens consumidos indicados no evento message_end (None se o
+        stream terminar sem ele); obtém-se com `yield from`
+    """
+    for event in events:
+        if event.get("event") == "message_end":
+            return usage_tokens(event)
+        chunk = answer_chunk(event)
+        if chunk:
+            yield chunk
+    return None
 
 class DifyClient:
     """Cliente para integração com a API do Dify."""
 
-    def __init__(self):
-        """Inicializa o cliente Dify com as credenciais do .env."""
+    def __init__(self, cache: Optional[LLMCache] = None):
+        """
+        Inicializa o cliente Dify com as credenciais do .env.
+
+        Args:
+            cache: Cache de respostas (se None, usa o cache partilhado do processo)
+        """
+        self.cache = cache or get_llm_cache()
+        self.rate_limiter = get_dify_rate_limiter()
+        load_env()
         self.api_key = os.getenv('DIFY_API_KEY')
         self.api_url = os.getenv('DIFY_API_URL')
         
@@ -30,6 +154,43 @@ class DifyClient:
             'Content-Type': 'application/json'
         }
 
+    def _post(self, endpoint: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Envia um POST ao Dify, dentro do orçamento RPM/TPM, e devolve a resposta JSON.
+
+        O orçamento é reservado uma vez por chamada: as novas tentativas
+        feitas por `http_client.request` (429, falhas de ligação) não são
+        cobradas ao limitador.
+        """
+        estimated = payload_tokens(payload)
+        self.rate_limiter.acquire(estimated)
+
+        response = http_client.post(endpoint, headers=self.headers, json=payload, retry_unsafe=retry_safe(payload))
+        response.raise_for_status()
+        data = response.json()
+
+        self.rate_limiter.settle(estimated, usage_tokens(data) or estimated)
+        return data
+
+    def _cache_key(self, endpoint: str, prompt: str, temperature: Optional[float]) -> str:
+        """Chave de cache de um pedido; inclui a chave de API, que identifica a app Dify."""
+        return LLMCache.make_key(endpoint, prompt, temperature, app=self.api_key)
+
+    def _request(self, key: str, endpoint: str, payload: Dict[str, Any], use_cache: bool) -> Dict[str, Any]:
+        """
+        Executa um pedido ao Dify passando pelo cache de respostas.
+
+        Pedidos idênticos em curso noutras threads ou tarefas partilham a
+        mesma chamada HTTP. Com use_cache=False o pedido é sempre enviado:
+        não usa o cache nem o resultado de um pedido idêntico em curso.
+        """
+        if not use_cache:
+            return self._post(endpoint, payload)
+        return dify_requests.do(
+            key,
+            lambda: self.cache.get_or_call(key, lambda: self._post(endpoint, payload), use_cache)
+        )
+
     def chat_completion(
         self,
         messages: list,
@@ -37,7 +198,8 @@ class DifyClient:
         top_p: float = 0.95,
         presence_penalty: float = 0,
         frequency_penalty: float = 0,
-        max_tokens: Optional[int] = None
+        max_tokens: Optional[int] = None,
+        use_cache: bool = True
     ) -> Dict[str, Any]:
         """
         Realiza uma chamada à API do Dify para completar um chat.
@@ -51,31 +213,17 @@ class DifyClient:
             presence_penalty: Penalidade para repetição de tópicos (-2.0 a 2.0)
             frequency_penalty: Penalidade para repetição de tokens (-2.0 a 2.0)
             max_tokens: Número máximo de tokens na resposta
+            use_cache: Se False, ignora o cache de respostas
 
         Returns:
             Dict com a resposta da API
         """
         endpoint = f"{self.api_url}/chat-messages"
-        
-        # Extrair a query do último message
-        query = ""
-        for msg in reversed(messages):
-            if msg.get("role") == "user":
-                query = msg.get("content", "")
-                break
-        
-        payload = {
-            "inputs": {},
-            "query": query,
-            "response_mode": "blocking",
-            "conversation_id": "",
-            "user": "default"
-        }
+        payload = _chat_payload(messages)
+        key = self._cache_key(endpoint, payload["query"], temperature)
 
         try:
-            response = requests.post(endpoint, headers=self.headers, json=payload)
-            response.raise_for_status()
-            return response.json()
+            return self._request(key, endpoint, payload, use_cache)
         except requests.exceptions.RequestException as e:
             raise DifyError(f"Erro na chamada à API do Dify: {str(e)}")
 
@@ -86,7 +234,8 @@ class DifyClient:
         max_tokens: Optional[int] = None,
         top_p: float = 0.95,
         frequency_penalty: float = 0,
-        presence_penalty: float = 0
+        presence_penalty: float = 0,
+        use_cache: bool = True
     ) -> Dict[str, Any]:
         """
         Realiza uma chamada à API do Dify para completar um texto.
@@ -100,30 +249,74 @@ class DifyClient:
             top_p: Controla a diversidade das respostas (0.0 a 1.0)
             frequency_penalty: Penalidade para repetição de tokens (-2.0 a 2.0)
             presence_penalty: Penalidade para repetição de tópicos (-2.0 a 2.0)
+            use_cache: Se False, ignora o cache de respostas
 
         Returns:
             Dict com a resposta da API
         """
         endpoint = f"{self.api_url}/completion-messages"
-        
-        payload = {
-            "inputs": {},
-            "query": prompt,
-            "response_mode": "blocking",
-            "user": "default"
-        }
+        payload = _completion_payload(prompt)
+        key = self._cache_key(endpoint, prompt, temperature)
+
+        try:
+            data = self._request(key, endpoint, payload, use_cache)
+            return _completion_result(data)
+        except requests.exceptions.RequestException as e:
+            raise DifyError(f"Erro na chamada à API do Dify: {str(e)}")
+
+    def stream_completion(self, prompt: str) -> Iterator[str]:
+        """
+        Gera texto em modo streaming, devolvendo fragmentos à medida que chegam.
+
+        Fechar o gerador antes do fim aborta a geração no Dify.
+
+        Args:
+            prompt: O texto para completar
+
+        Yields:
+            Fragmentos do texto gerado
+        """
+        endpoint = f"{self.api_url}/completion-messages"
+        payload = _streaming(_completion_payload(prompt))
+
+        estimated = payload_tokens(payload)
+        self.rate_limiter.acquire(estimated)
 
         try:
-            response = requests.post(endpoint, headers=self.headers, json=payload)
-            response.raise_for_status()
-            data = response.json()
-            
-            return {
-                "choices": [{
-                    "text": data.get("answer", ""),
-                    "finish_reason": "stop"
-                }]
-            }
+            with http_client.post(
+                endpoint, headers=self.headers, json=payload, stream=True, retry_unsafe=retry_safe(payload)
+            ) as response:
+                response.raise_for_status()
+                used = yield from iter_answer_chunks(http_client.iter_sse_events(response))
+            # Um stream abortado fica cobrado pela estimativa
+            self.rate_limiter.settle(estimated, used or estimated)
+        except requests.exceptions.RequestException as e:
+            raise DifyError(f"Erro na chamada à API do Dify: {str(e)}")
+
+    def stream_chat_completion(self, messages: list) -> Iterator[str]:
+        """
+        Completa um chat em modo streaming, devolvendo fragmentos à medida que chegam.
+
+        Args:
+            messages: Lista de mensagens no formato [{"role": "user", "content": "mensagem"}]
+
+        Yields:
+            Fragmentos da resposta
+        """
+        endpoint = f"{self.api_url}/chat-messages"
+        payload = _streaming(_chat_payload(messages))
+
+        estimated = payload_tokens(payload)
+        self.rate_limiter.acquire(estimated)
+
+        try:
+            with http_client.post(
+                endpoint, headers=self.headers, json=payload, stream=True, retry_unsafe=retry_safe(payload)
+            ) as response:
+                response.raise_for_status()
+                used = yield from iter_answer_chunks(http_client.iter_sse_events(response))
+            # Um stream abortado fica cobrado pela estimativa
+            self.rate_limiter.settle(estimated, used or estimated)
         except requests.exceptions.RequestException as e:
             raise DifyError(f"Erro na chamada à API do Dify: {str(e)}")
 
@@ -192,19 +385,9 @@ class DifyClient:
             Dict com a URL da imagem gerada
         """
         endpoint = f"{self.api_url}/images/generations"
-        
-        payload = {
-            "prompt": prompt,
-            "size": size,
-            "quality": quality,
-            "style": style,
-            "response_format": "url"
-        }
+        payload = _image_payload(prompt, size, quality, style)
 
         try:
-            response = requests.post(endpoint, headers=self.headers, json=payload)
-            response.raise_for_status()
-            data = response.json()
-            return {"url": data.get("data", [{}])[0].get("url", "")}
+            return _image_result(self._post(endpoint, payload))
         except requests.exceptions.RequestException as e:
             raise DifyError(f"Erro na geração de imagem: {str(e)}") 
\ No newline at end of file
@@ -31,6 +31,10 @@ class DifyError(Exception):
     """Exceção base para erros da API Dify."""
     pass
 
+class PipelineError(Exception):
+    """Exceção para etapas de pipeline que falharam."""
+    pass
+
 # Validações
 def validate_title(title: str) -> bool:
     """
@@ -0,0 +1,349 @@
+"""
+Camada de transporte HTTP partilhada pelos clientes do GeradorWP.
+
+Mantém uma única `requests.Session` por processo, com pool de ligações
+keep-alive, para que as várias chamadas feitas por artigo reutilizem as
+ligações TCP/TLS já abertas em vez de repetirem o handshake.
+
+/**
+ * Autor: Descomplicar - Agência de Aceleração Digital
+ * https://descomplicar.pt
+ */
+"""
+
+import json
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+from .resilience import RETRYABLE_STATUS, DeadlineExceededError, RetryPolicy, get_breaker
+from ..config import config
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+# Métodos que podem ser repetidos sem risco de duplicar efeitos no servidor
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+class TransferStats:
+    """
+    Contador de bytes transferidos por host.
+
+    Conta o corpo dos pedidos enviados e o corpo (já descomprimido) das
+    respostas lidas por inteiro; respostas em streaming só contam o pedido.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, Dict[str, int]] = {}
+
+    def record(self, host: str, sent: int, received: int) -> None:
+        """
+        Regista um pedido.
+
+        Args:
+            host: Host do pedido
+            sent: Bytes do corpo enviado
+            received: Bytes do corpo recebido
+        """
+        with self._lock:
+            stats = self._hosts.setdefault(host, {"requests": 0, "sent": 0, "received": 0})
+            stats["requests"] += 1
+            stats["sent"] += sent
+            stats["received"] += received
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """
+        Devolve uma cópia dos totais.
+
+        Returns:
+            Dicionário {host: {'requests', 'sent', 'received'}}
+        """
+        with self._lock:
+            return {host: dict(stats) for host, stats in self._hosts.items()}
+
+    def reset(self) -> None:
+        """Põe os totais a zero."""
+        with self._lock:
+            self._hosts.clear()
+
+
+# Totais do processo, usados para medir o tráfego de cada publicação
+transfer_stats = TransferStats()
+
+
+def _body_size(body: Any) -> int:
+    """Tamanho de um corpo de pedido ou resposta (0 se não for bytes/str)."""
+    if isinstance(body, bytes):
+        return len(body)
+    if isinstance(body, str):
+        return len(body.encode("utf-8"))
+    return 0
+
+
+def _create_session(pool_size: int) -> requests.Session:
+    """
+    Cria uma sessão com pool de ligações para HTTP e HTTPS.
+
+    Args:
+        pool_size: Número máximo de ligações mantidas por host
+
+    Returns:
+        Sessão configurada
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Connection": "keep-alive"})
+    return session
+
+
+def get_session() -> requests.Session:
+    """
+    Retorna a sessão HTTP partilhada do processo, criando-a se necessário.
+
+    Returns:
+        Sessão HTTP partilhada
+    """
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _create_session(config.HTTP_POOL_SIZE)
+    return _session
+
+
+def configure(pool_size: int) -> None:
+    """
+    Recria a sessão partilhada com um novo tamanho de pool.
+
+    Args:
+        pool_size: Número máximo de ligações mantidas por host
+    """
+    global _session
+
+    with _session_lock:
+        old_session = _session
+        _session = _create_session(pool_size)
+    if old_session is not None:
+        old_session.close()
+
+
+def close_session() -> None:
+    """Fecha a sessão partilhada e liberta as ligações abertas."""
+    global _session
+
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def _not_sent(error: requests.exceptions.RequestException) -> bool:
+    """
+    Indica se uma falha ocorreu antes de o pedido chegar ao servidor.
+
+    Só as falhas na fase de ligação (timeout ou recusa ao ligar) garantem
+    que o servidor não processou o pedido; um timeout de leitura ou uma
+    ligação cortada podem chegar depois de a escrita estar feita.
+
+    Args:
+        error: Exceção levantada pelo requests
+
+    Returns:
+        True se o pedido não foi enviado
+    """
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.Timeout):
+        return False
+    reason = error.args[0] if error.args else None
+    # O requests embrulha o erro do urllib3 num MaxRetryError
+    reason = getattr(reason, "reason", reason)
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+
+def request(
+    method: str,
+    url: str,
+    deadline: Optional[float] = None,
+    retry: Optional[RetryPolicy] = None,
+    retry_unsafe: Optional[bool] = None,
+    **kwargs: Any
+) -> requests.Response:
+    """
+    Executa uma requisição HTTP através da sessão partilhada.
+
+    Aplica REQUEST_TIMEOUT quando nenhum timeout é indicado. Falhas de
+    ligação, timeouts e respostas 429/5xx são repetidas com backoff
+    exponencial (respeitando Retry-After); o circuit breaker do host falha
+    de imediato se o serviço estiver em baixo. Se todas as tentativas
+    falharem com 429/5xx, a última resposta é devolvida para que o chamador
+    a trate com `raise_for_status`.
+
+    Pedidos não idempotentes (POST, PATCH) só são repetidos quando é certo
+    que o servidor não os processou: falhas na fase de ligação e 429. Um
+    5xx ou um timeout de leitura podem chegar depois de o WordPress ter
+    criado o post, e repetir criaria um duplicado.
+
+    Args:
+        method: Método HTTP
+        url: URL da requisição
+        deadline: Prazo total em segundos, incluindo novas tentativas
+            (se None, usa REQUEST_DEADLINE; 0 desativa)
+        retry: Política de novas tentativas (se None, usa MAX_RETRIES/RETRY_DELAY)
+        retry_unsafe: Se True, repete também timeouts de leitura e 5xx
+            (se None, só para os métodos de IDEMPOTENT_METHODS)
+        **kwargs: Argumentos adicionais para `requests.Session.request`
+
+    Returns:
+        Resposta HTTP
+
+    Raises:
+        CircuitOpenError: Se o circuito do host estiver aberto
+        DeadlineExceededError: Se o prazo total se esgotar
+    """
+    if retry_unsafe is None:
+        retry_unsafe = method.upper() in IDEMPOTENT_METHODS
+    host = urlsplit(url).netloc
+    breaker = get_breaker(url)
+
+    # Um pedido (com as suas novas tentativas) conta uma única vez no circuito
+    trial = breaker.before_call(host)
+    try:
+        try:
+            response = _send(method, url, host, deadline, retry or RetryPolicy(), retry_unsafe, kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            breaker.record_failure()
+            raise
+        # 429 e 4xx mostram que o host está a responder
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+    finally:
+        if trial:
+            breaker.end_trial()
+
+
+def _send(
+    method: str,
+    url: str,
+    host: str,
+    deadline: Optional[float],
+    policy: RetryPolicy,
+    retry_unsafe: bool,
+    kwargs: Dict[str, Any]
+) -> requests.Response:
+    """
+    Envia um pedido com novas tentativas, sem passar pelo circuit breaker.
+
+    Returns:
+        Primeira resposta não repetível ou a última recebida
+
+    Raises:
+        DeadlineExceededError: Se o prazo total se esgotar
+    """
+    deadline = config.REQUEST_DEADLINE if deadline is None else deadline
+    timeout = kwargs.pop("timeout", config.REQUEST_TIMEOUT)
+    session = get_session()
+    started = time.monotonic()
+
+    attempt = 0
+    while True:
+        remaining = deadline - (time.monotonic() - started) if deadline else None
+        if remaining is not None and remaining <= 0:
+            raise DeadlineExceededError(f"Prazo de {deadline}s esgotado para {method} {url}")
+
+        attempt_timeout = min(timeout, remaining) if remaining is not None and timeout else timeout
+
+        try:
+            response = session.request(method, url, timeout=attempt_timeout, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if attempt >= policy.max_retries or not (retry_unsafe or _not_sent(e)):
+                raise
+            wait = policy.delay(attempt)
+        else:
+            if response.status_code not in RETRYABLE_STATUS:
+                transfer_stats.record(
+                    host,
+                    _body_size(getattr(response.request, "body", None)),
+                    0 if kwargs.get("stream") else _body_size(response.content)
+                )
+                return response
+
+            if attempt >= policy.max_retries or not (retry_unsafe or response.status_code == 429):
+                return response
+            wait = policy.delay(attempt, response.headers.get("Retry-After"))
+            response.close()
+
+        # Não vale a pena esperar se a próxima tentativa já não cabe no prazo
+        if deadline and time.monotonic() - started + wait >= deadline:
+            raise DeadlineExceededError(f"Prazo de {deadline}s esgotado para {method} {url}")
+
+        time.sleep(wait)
+        attempt += 1
+
+
+def get(url: str, **kwargs: Any) -> requests.Response:
+    """Executa um GET através da sessão partilhada."""
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs: Any) -> requests.Response:
+    """Executa um POST através da sessão partilhada."""
+    return request("POST", url, **kwargs)
+
+
+def parse_sse_line(line: str) -> Optional[Dict[str, Any]]:
+    """
+    Interpreta uma linha de um stream de server-sent events.
+
+    Apenas as linhas `data:` com JSON são consideradas; comentários, linhas
+    vazias e eventos `ping` são ignorados.
+
+    Args:
+        line: Linha do stream, já descodificada
+
+    Returns:
+        Evento como dicionário ou None se a linha não tiver dados
+    """
+    if not line or not line.startswith("data:"):
+        return None
+
+    data = line[len("data:"):].strip()
+    if not data:
+        return None
+
+    try:
+        event = json.loads(data)
+    except json.JSONDecodeError:
+        return None
+    return event if isinstance(event, dict) else None
+
+
+def iter_sse_events(response: requests.Response) -> Iterator[Dict[str, Any]]:
+    """
+    Itera sobre os eventos de uma resposta HTTP em streaming (SSE).
+
+    Args:
+        response: Resposta obtida com `stream=True`
+
+    Yields:
+        Eventos do stream como dicionários
+    """
+    # text/event-stream é sempre UTF-8
+    response.encoding = "utf-8"
+    for line in response.iter_lines(decode_unicode=True):
+        event = parse_sse_line(line)
+        if event is not None:
+            yield event
@@ -10,16 +10,25 @@ Gerador de imagens para artigos do WordPress.
 import os
 import logging
 from pathlib import Path
-from typing import Optional, Dict, Any, Tuple
-from PIL import Image, ImageDraw, ImageFont
-from ..config.settings import SETTINGS
+from typing import TYPE_CHECKING, Optional, Dict, Any, Tuple
+from ..config.settings import get_settings
+
+if TYPE_CHECKING:  # o PIL e o aiohttp só são importados quando usados
+    from PIL import ImageFont
+    from .async_dify import AsyncDifyClient
 
 class ImageGenerator:
     """Gerador de imagens para artigos do WordPress."""
     
-    def __init__(self):
-        """Inicializa o gerador de imagens."""
+    def __init__(self, dify_client: Optional["AsyncDifyClient"] = None):
+        """Inicializa o gerador de imagens.
+        
+        Args:
+            dify_client: Cliente Dify assíncrono usado por `generate_image`
+                (opcional, sem ele é devolvida uma imagem de exemplo)
+        """
         self.logger = logging.getLogger(__name__)
+        self.dify = dify_client
         
         # Configurações de texto
         self.title_font_size = 65  # Tamanho exato
@@ -32,7 +41,7 @@ class ImageGenerator:
         # Configurar diretórios
         self.base_dir = Path(__file__).parent.parent.parent
         self.templates_dir = self.base_dir / 'assets' / 'templates'
-        self.cache_dir = Path(SETTINGS['cache']['dir'])
+        self.cache_dir = Path(get_settings()['cache']['dir'])
         
         # Criar diretório de cache se não existir
         self.cache_dir.mkdir(parents=True, exist_ok=True)
@@ -44,8 +53,7 @@ class ImageGenerator:
         # Verificar fonte
         if not self.title_font_path.exists():
             raise FileNotFoundError(f"Fonte não encontrada: {self.title_font_path}")
-            
-        self.title_font = ImageFont.truetype(str(self.title_font_path), self.title_font_size)
+        self._title_font = None
         
         # Templates por categoria
         self.template_files = {
@@ -60,7 +68,15 @@ class ImageGenerator:
             'default': 'default-bg.png'
         }
 
-    def _wrap_text(self, text: str, font: ImageFont, max_width: int) -> list:
+    @property
+    def title_font(self) -> "ImageFont.FreeTypeFont":
+        """Fonte do título, carregada (com o PIL) na primeira imagem."""
+        if self._title_font is None:
+            from PIL import ImageFont
+            self._title_font = ImageFont.truetype(str(self.title_font_path), self.title_font_size)
+        return self._title_font
+
+    def _wrap_text(self, text: str, font: "ImageFont.FreeTypeFont", max_width: int) -> list:
         """
         Quebra o texto em linhas que se ajustam à largura máxima.
         
@@ -124,6 +140,8 @@ class ImageGenerator:
                 self.logger.error(f"Template não encontrado: {template_path}")
                 return None
             
+            from PIL import Image, ImageDraw
+            
             # Abrir template
             image = Image.open(template_path)
             draw = ImageDraw.Draw(image)
@@ -180,6 +198,14 @@ class ImageGenerator:
         try:
             self.logger.info(f"Gerando imagem para prompt: {prompt}")
             
+            if self.dify is not None:
+                result = await self.dify.generate_image(prompt)
+                return {
+                    "url": result["url"],
+                    "alt_text": prompt,
+                    "prompt": prompt
+                }
+            
             # Simulação de geração de imagem
             # Em uma implementação real, aqui seria feita uma chamada à API de geração de imagens
             
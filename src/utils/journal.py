@@ -0,0 +1,121 @@
+"""
+Diário de progresso para trabalhos em lote.
+
+Cada etapa concluída de um artigo é acrescentada como uma linha JSON a um
+ficheiro append-only. Ao reiniciar um lote, o diário é relido e as etapas já
+concluídas são saltadas, retomando cada artigo na primeira etapa em falta.
+
+Autor: Descomplicar - Agência de Aceleração Digital
+https://descomplicar.pt
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Etapas de um artigo, pela ordem em que são executadas
+STAGES = ('sections', 'html', 'image', 'media', 'post')
+
+class JobJournal:
+    """Diário JSONL append-only com o resultado de cada etapa por artigo."""
+
+    def __init__(self, path: str):
+        """
+        Inicializa o diário, carregando as etapas já registadas.
+
+        Args:
+            path: Caminho do ficheiro JSONL (criado se não existir)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        # Se a última linha ficou incompleta, a próxima escrita começa numa linha nova
+        self._needs_newline = False
+        self._load()
+
+    def _load(self):
+        """Relê o diário; linhas incompletas (ex.: escrita interrompida) são ignoradas."""
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for number, line in enumerate(f, 1):
+                self._needs_newline = not line.endswith("\n")
+                try:
+                    entry = json.loads(line)
+                    self._jobs.setdefault(entry["job"], {})[entry["stage"]] = entry.get("value")
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    logger.warning(f"Linha {number} inválida no diário {self.path}, a ignorar")
+
+    def has(self, job: str, stage: str) -> bool:
+        """
+        Indica se uma etapa de um artigo já foi concluída.
+
+        Args:
+            job: Identificador do artigo
+            stage: Nome da etapa
+
+        Returns:
+            True se a etapa está registada no diário
+        """
+        with self._lock:
+            return stage in self._jobs.get(job, {})
+
+    def get(self, job: str, stage: str) -> Any:
+        """
+        Devolve o resultado registado de uma etapa.
+
+        Args:
+            job: Identificador do artigo
+            stage: Nome da etapa
+
+        Returns:
+            Resultado da etapa ou None se não estiver registada
+        """
+        with self._lock:
+            return self._jobs.get(job, {}).get(stage)
+
+    def record(self, job: str, stage: str, value: Any = None):
+        """
+        Regista a conclusão de uma etapa, garantindo que chega ao disco.
+
+        Args:
+            job: Identificador do artigo
+            stage: Nome da etapa
+            value: Resultado da etapa (serializável em JSON)
+        """
+        if stage not in STAGES:
+            raise ValueError(f"Etapa desconhecida: {stage}")
+
+        line = json.dumps({"job": job, "stage": stage, "value": value, "at": time.time()}, ensure_ascii=False)
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                if self._needs_newline:
+                    f.write("\n")
+                    self._needs_newline = False
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._jobs.setdefault(job, {})[stage] = value
+
+    def next_stage(self, job: str) -> Optional[str]:
+        """
+        Devolve a primeira etapa ainda não concluída de um artigo.
+
+        Args:
+            job: Identificador do artigo
+
+        Returns:
+            Nome da etapa ou None se todas estiverem concluídas
+        """
+        with self._lock:
+            done = self._jobs.get(job, {})
+            return next((stage for stage in STAGES if stage not in done), None)
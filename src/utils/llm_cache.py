@@ -0,0 +1,170 @@
+"""
+Cache de respostas do Dify endereçado pelo conteúdo do pedido.
+
+Cada resposta é guardada sob o hash de (endpoint, prompt, temperatura,
+base de conhecimento), pelo que repetir um artigo ou reenviar após uma
+falha do WordPress não volta a pagar as chamadas ao Dify.
+
+Modos (LLM_CACHE_MODE):
+    off: o cache não é usado
+    read_write: lê do cache e grava as respostas novas
+    replay: só lê do cache; um pedido sem resposta guardada falha
+
+/**
+ * Autor: Descomplicar - Agência de Aceleração Digital
+ * https://descomplicar.pt
+ */
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from .cache import Cache
+from .exceptions import DifyError
+from ..config import config
+
+CACHE_MODES = ("off", "read_write", "replay")
+
+
+class LLMCache:
+    """Cache de respostas do Dify."""
+
+    def __init__(self, mode: Optional[str] = None, cache: Optional[Cache] = None):
+        """
+        Inicializa o cache de respostas.
+
+        Args:
+            mode: Modo do cache (se None, usa LLM_CACHE_MODE)
+            cache: Armazenamento a usar (se None, usa CACHE_DIR/llm)
+        """
+        self.mode = mode or config.LLM_CACHE_MODE
+        if self.mode not in CACHE_MODES:
+            raise ValueError(f"Modo de cache inválido: {self.mode}")
+
+        self.cache = cache or Cache(os.path.join(config.CACHE_DIR, "llm"), config.LLM_CACHE_TTL)
+
+    @staticmethod
+    def make_key(
+        endpoint: str,
+        prompt: str,
+        temperature: Optional[float] = None,
+        knowledge_base_id: Optional[str] = None,
+        **extra: Any
+    ) -> str:
+        """
+        Calcula a chave de cache de um pedido.
+
+        Args:
+            endpoint: URL do endpoint
+            prompt: Prompt enviado
+            temperature: Temperatura usada
+            knowledge_base_id: ID da base de conhecimento
+            **extra: Outros parâmetros que distinguem o pedido
+
+        Returns:
+            Hash SHA-256 do pedido
+        """
+        material = json.dumps(
+            {
+                "endpoint": endpoint,
+                "prompt": prompt,
+                "temperature": temperature,
+                "knowledge_base_id": knowledge_base_id,
+                **extra,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get_or_call(
+        self,
+        key: str,
+        call: Callable[[], Dict[str, Any]],
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Devolve a resposta guardada ou executa a chamada e guarda o resultado.
+
+        Args:
+            key: Chave do pedido (ver `make_key`)
+            call: Função que executa o pedido ao Dify
+            use_cache: Se False, ignora o cache e chama sempre a API
+
+        Returns:
+            Resposta da API
+
+        Raises:
+            DifyError: Em modo replay, se a resposta não estiver no cache
+        """
+        if not use_cache or self.mode == "off":
+            return call()
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        if self.mode == "replay":
+            raise DifyError(f"Resposta não encontrada no cache (modo replay): {key}")
+
+        response = call()
+        self.cache.set(key, response)
+        return response
+
+    async def get_or_call_async(
+        self,
+        key: str,
+        call: Callable[[], Awaitable[Dict[str, Any]]],
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Versão assíncrona de `get_or_call`.
+
+        A leitura e a escrita do cache em disco correm numa thread, para não
+        bloquear o event loop.
+
+        Args:
+            key: Chave do pedido (ver `make_key`)
+            call: Função que devolve a corrotina que executa o pedido
+            use_cache: Se False, ignora o cache e chama sempre a API
+
+        Returns:
+            Resposta da API
+        """
+        if not use_cache or self.mode == "off":
+            return await call()
+
+        cached = await asyncio.to_thread(self.cache.get, key)
+        if cached is not None:
+            return cached
+
+        if self.mode == "replay":
+            raise DifyError(f"Resposta não encontrada no cache (modo replay): {key}")
+
+        response = await call()
+        await asyncio.to_thread(self.cache.set, key, response)
+        return response
+
+
+_default_cache: Optional[LLMCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache:
+    """
+    Retorna o cache de respostas partilhado do processo.
+
+    Returns:
+        Instância partilhada de LLMCache
+    """
+    global _default_cache
+
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = LLMCache()
+    return _default_cache
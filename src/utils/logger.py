@@ -7,7 +7,7 @@ import logging
 from typing import Optional
 from datetime import datetime
 
-from ..config.config import LOG_LEVEL, LOG_FILE
+from ..config import config
 
 class Logger:
     """Classe para gerenciar o logging do sistema."""
@@ -20,10 +20,10 @@ class Logger:
             name: Nome do logger
         """
         self.logger = logging.getLogger(name)
-        self.logger.setLevel(getattr(logging, LOG_LEVEL))
+        self.logger.setLevel(getattr(logging, config.LOG_LEVEL))
         
         # Cria o diretório de logs se não existir
-        log_dir = os.path.dirname(LOG_FILE)
+        log_dir = os.path.dirname(config.LOG_FILE)
         if log_dir and not os.path.exists(log_dir):
             os.makedirs(log_dir)
         
@@ -33,7 +33,7 @@ class Logger:
         )
         
         # Handler para arquivo
-        file_handler = logging.FileHandler(LOG_FILE, encoding="utf-8")
+        file_handler = logging.FileHandler(config.LOG_FILE, encoding="utf-8")
         file_handler.setFormatter(formatter)
         self.logger.addHandler(file_handler)
         
@@ -0,0 +1,164 @@
+"""
+Índice local dos ficheiros de media já enviados para o WordPress.
+
+Cada ficheiro é identificado pelo SHA-256 do seu conteúdo, pelo que as
+imagens idênticas (ex.: as imagens por omissão de cada categoria) só são
+enviadas uma vez: os envios seguintes devolvem o ID do anexo existente
+sem transferir os bytes de novo.
+
+/**
+ * Autor: Descomplicar - Agência de Aceleração Digital
+ * https://descomplicar.pt
+ */
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .cache import site_key
+from .singleflight import SingleFlight
+from ..config import config
+
+logger = logging.getLogger(__name__)
+
+def content_hash(data: bytes) -> str:
+    """
+    Calcula o hash do conteúdo de um ficheiro.
+
+    Args:
+        data: Conteúdo do ficheiro
+
+    Returns:
+        SHA-256 em hexadecimal
+    """
+    return hashlib.sha256(data).hexdigest()
+
+class MediaIndex:
+    """Mapa SHA-256 → ID de anexo de um site, persistido em JSON."""
+
+    def __init__(self, site_url: str, path: Optional[str] = None):
+        """
+        Inicializa o índice (o ficheiro só é lido no primeiro uso).
+
+        Args:
+            site_url: URL de qualquer endpoint do site (REST ou XML-RPC)
+            path: Ficheiro do índice (se None, usa CACHE_DIR/media/<site>.json)
+        """
+        self.path = path or os.path.join(config.CACHE_DIR, "media", f"{site_key(site_url)}.json")
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._uploads = SingleFlight()
+
+    def get(self, digest: str) -> Optional[Any]:
+        """
+        Obtém o ID do anexo com um dado conteúdo.
+
+        Args:
+            digest: SHA-256 do conteúdo
+
+        Returns:
+            ID do anexo ou None se o conteúdo nunca foi enviado
+        """
+        with self._lock:
+            entry = self._load().get(digest)
+            return entry['id'] if entry else None
+
+    def add(self, digest: str, media_id: Any, name: str = ''):
+        """
+        Regista um anexo enviado e grava o índice.
+
+        Args:
+            digest: SHA-256 do conteúdo
+            media_id: ID do anexo no WordPress
+            name: Nome do ficheiro enviado
+        """
+        with self._lock:
+            entries = self._load()
+            # Preserva as entradas gravadas entretanto por outros processos
+            entries.update({k: v for k, v in self._read().items() if k not in entries})
+            entries[digest] = {'id': media_id, 'name': name}
+            self._write(entries)
+
+    def get_or_upload(self, data: bytes, upload: Callable[[], Any], name: str = '') -> Any:
+        """
+        Devolve o anexo com este conteúdo, enviando-o só se for novo.
+
+        Envios simultâneos do mesmo conteúdo (ex.: vários workers do lote
+        com a mesma imagem por omissão) fazem um único upload.
+
+        Args:
+            data: Conteúdo do ficheiro
+            upload: Função que envia o ficheiro e devolve o ID do anexo
+            name: Nome do ficheiro (guardado no índice)
+
+        Returns:
+            ID do anexo no WordPress
+        """
+        digest = content_hash(data)
+        media_id = self.get(digest)
+        if media_id is not None:
+            logger.debug(f"Media já enviado ({name}): reutilizado o anexo {media_id}")
+            return media_id
+
+        def upload_once() -> Any:
+            media_id = self.get(digest)
+            if media_id is None:
+                media_id = upload()
+                self.add(digest, media_id, name)
+            return media_id
+
+        return self._uploads.do(digest, upload_once)
+
+    def reconcile(self, existing: Callable[[List[Any]], Iterable[Any]]) -> int:
+        """
+        Remove do índice os anexos que já não existem no WordPress.
+
+        Args:
+            existing: Função que recebe os IDs indexados e devolve os que
+                ainda existem na biblioteca de media
+
+        Returns:
+            Número de entradas removidas
+        """
+        with self._lock:
+            entries = self._load()
+            alive = set(existing([entry['id'] for entry in entries.values()])) if entries else set()
+            stale = [digest for digest, entry in entries.items() if entry['id'] not in alive]
+            for digest in stale:
+                del entries[digest]
+            if stale:
+                self._write(entries)
+                logger.info(f"Índice de media reconciliado: {len(stale)} anexos removidos")
+            return len(stale)
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Devolve as entradas em memória, lendo o ficheiro no primeiro uso."""
+        if self._entries is None:
+            self._entries = self._read()
+        return self._entries
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        """Lê as entradas gravadas (vazio se o ficheiro não existir ou for inválido)."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f).get("media", {})
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def _write(self, entries: Dict[str, Dict[str, Any]]):
+        """Grava o índice de forma atómica (ficheiro temporário + rename)."""
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"media": entries}, f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            # O índice é só uma otimização: sem disco, fica em memória
+            logger.warning(f"Não foi possível gravar o índice de media: {str(e)}")
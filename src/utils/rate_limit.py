@@ -0,0 +1,189 @@
+"""
+Limitador de pedidos (token bucket) partilhado entre processos.
+
+Aplica orçamentos de pedidos por minuto (RPM) e de tokens por minuto (TPM)
+às chamadas ao Dify. O estado vive numa base SQLite local, pelo que vários
+processos de lote no mesmo host partilham o mesmo orçamento.
+
+Os pedidos nunca são rejeitados: cada chamador reserva o seu consumo e
+recebe o tempo que deve esperar, o que distribui os pedidos no tempo em
+vez de provocar rajadas de respostas 429.
+
+/**
+ * Autor: Descomplicar - Agência de Aceleração Digital
+ * https://descomplicar.pt
+ */
+"""
+
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from ..config import config
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """
+    Estima o número de tokens de um texto (~4 caracteres por token).
+
+    Args:
+        text: Texto a estimar
+
+    Returns:
+        Número estimado de tokens
+    """
+    if not text:
+        return 0
+    return math.ceil(len(text) / 4)
+
+
+class RateLimiter:
+    """Token bucket de RPM/TPM com estado em SQLite."""
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: int,
+        tokens_per_minute: int = 0,
+        db_path: Optional[str] = None
+    ):
+        """
+        Inicializa o limitador.
+
+        Args:
+            name: Nome do orçamento (processos com o mesmo nome partilham-no)
+            requests_per_minute: Pedidos por minuto (0 desativa o limite)
+            tokens_per_minute: Tokens por minuto (0 desativa o limite)
+            db_path: Caminho da base SQLite (se None, usa RATE_LIMIT_DB)
+        """
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.db_path = db_path or config.RATE_LIMIT_DB or os.path.join(config.CACHE_DIR, "ratelimit.sqlite3")
+        self._local = threading.local()
+
+    @property
+    def enabled(self) -> bool:
+        """Indica se algum dos limites está ativo."""
+        return self.requests_per_minute > 0 or self.tokens_per_minute > 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """Retorna a ligação SQLite da thread atual, criando-a se necessário."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "name TEXT PRIMARY KEY, requests REAL, tokens REAL, updated REAL)"
+            )
+            self._local.connection = connection
+        return connection
+
+    def reserve(self, tokens: int = 0) -> float:
+        """
+        Reserva um pedido e `tokens` tokens do orçamento.
+
+        Os baldes podem ficar negativos: a dívida é paga pelo tempo de
+        espera devolvido, por ordem de chegada.
+
+        Args:
+            tokens: Tokens estimados do pedido
+
+        Returns:
+            Segundos que o chamador deve esperar antes de enviar o pedido
+        """
+        if not self.enabled:
+            return 0.0
+
+        connection = self._connect()
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT requests, tokens, updated FROM buckets WHERE name = ?", (self.name,)
+            ).fetchone()
+            if row is None:
+                requests_level, tokens_level = float(self.requests_per_minute), float(self.tokens_per_minute)
+            else:
+                elapsed = max(0.0, now - row[2])
+                requests_level = min(
+                    float(self.requests_per_minute),
+                    row[0] + elapsed * self.requests_per_minute / 60
+                )
+                tokens_level = min(
+                    float(self.tokens_per_minute),
+                    row[1] + elapsed * self.tokens_per_minute / 60
+                )
+
+            wait = 0.0
+            if self.requests_per_minute > 0:
+                requests_level -= 1
+                wait = max(wait, -requests_level * 60 / self.requests_per_minute)
+            if self.tokens_per_minute > 0:
+                tokens_level -= tokens
+                wait = max(wait, -tokens_level * 60 / self.tokens_per_minute)
+
+            connection.execute(
+                "INSERT OR REPLACE INTO buckets (name, requests, tokens, updated) VALUES (?, ?, ?, ?)",
+                (self.name, requests_level, tokens_level, now)
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+        return wait
+
+    def acquire(self, tokens: int = 0) -> None:
+        """
+        Reserva o consumo e espera até que caiba no orçamento.
+
+        Args:
+            tokens: Tokens estimados do pedido
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    def settle(self, estimated: int, actual: int) -> None:
+        """
+        Corrige o orçamento de tokens com o consumo real do pedido.
+
+        Args:
+            estimated: Tokens reservados
+            actual: Tokens efetivamente consumidos
+        """
+        if self.tokens_per_minute <= 0 or actual == estimated:
+            return
+
+        connection = self._connect()
+        connection.execute(
+            "UPDATE buckets SET tokens = tokens - ? WHERE name = ?",
+            (actual - estimated, self.name)
+        )
+
+
+_dify_limiter: Optional[RateLimiter] = None
+_dify_limiter_lock = threading.Lock()
+
+
+def get_dify_rate_limiter() -> RateLimiter:
+    """
+    Retorna o limitador partilhado das chamadas ao Dify (DIFY_RPM/DIFY_TPM).
+
+    Returns:
+        Limitador partilhado do processo
+    """
+    global _dify_limiter
+
+    if _dify_limiter is None:
+        with _dify_limiter_lock:
+            if _dify_limiter is None:
+                _dify_limiter = RateLimiter("dify", config.DIFY_RPM, config.DIFY_TPM)
+    return _dify_limiter
@@ -0,0 +1,267 @@
+"""
+Resiliência para as chamadas aos serviços externos (Dify e WordPress).
+
+Fornece a política de novas tentativas (backoff exponencial com jitter e
+respeito pelo cabeçalho Retry-After) e um circuit breaker por host, que
+falha de imediato quando o serviço está em baixo em vez de ocupar os
+workers com pedidos que vão expirar.
+
+/**
+ * Autor: Descomplicar - Agência de Aceleração Digital
+ * https://descomplicar.pt
+ */
+"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+from urllib.parse import urlsplit
+
+import requests
+
+from ..config import config
+
+# Estados HTTP que justificam nova tentativa
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """O circuito do host está aberto; o pedido não foi enviado."""
+    pass
+
+
+class DeadlineExceededError(requests.exceptions.Timeout):
+    """O prazo total do pedido esgotou-se entre tentativas."""
+    pass
+
+
+class RetryPolicy:
+    """Política de novas tentativas com backoff exponencial e jitter."""
+
+    def __init__(
+        self,
+        max_retries: Optional[int] = None,
+        base_delay: Optional[float] = None,
+        max_delay: Optional[float] = None
+    ):
+        """
+        Inicializa a política.
+
+        Args:
+            max_retries: Número máximo de novas tentativas (se None, usa MAX_RETRIES)
+            base_delay: Espera base em segundos, duplica a cada tentativa
+                (se None, usa RETRY_DELAY)
+            max_delay: Espera máxima em segundos (se None, usa RETRY_MAX_DELAY)
+        """
+        self.max_retries = config.MAX_RETRIES if max_retries is None else max_retries
+        self.base_delay = config.RETRY_DELAY if base_delay is None else base_delay
+        self.max_delay = config.RETRY_MAX_DELAY if max_delay is None else max_delay
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Calcula a espera antes da próxima tentativa ("full jitter").
+
+        Args:
+            attempt: Número da tentativa que falhou (0 para a primeira)
+
+        Returns:
+            Espera em segundos
+        """
+        ceiling = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        Calcula a espera, dando prioridade ao cabeçalho Retry-After.
+
+        Args:
+            attempt: Número da tentativa que falhou (0 para a primeira)
+            retry_after: Valor do cabeçalho Retry-After, se existir
+
+        Returns:
+            Espera em segundos
+        """
+        server_delay = parse_retry_after(retry_after)
+        if server_delay is not None:
+            return min(server_delay, self.max_delay)
+        return self.backoff(attempt)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Interpreta o cabeçalho Retry-After (segundos ou data HTTP).
+
+    Args:
+        value: Valor do cabeçalho
+
+    Returns:
+        Espera em segundos ou None se ausente/inválido
+    """
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class CircuitBreaker:
+    """Circuit breaker simples: fechado, aberto e meio-aberto."""
+
+    def __init__(
+        self,
+        failure_threshold: Optional[int] = None,
+        reset_timeout: Optional[float] = None
+    ):
+        """
+        Inicializa o circuito fechado.
+
+        Args:
+            failure_threshold: Falhas consecutivas que abrem o circuito
+                (se None, usa CIRCUIT_FAILURE_THRESHOLD)
+            reset_timeout: Segundos até permitir um pedido de teste
+                (se None, usa CIRCUIT_RESET_TIMEOUT)
+        """
+        self.failure_threshold = (
+            config.CIRCUIT_FAILURE_THRESHOLD if failure_threshold is None else failure_threshold
+        )
+        self.reset_timeout = config.CIRCUIT_RESET_TIMEOUT if reset_timeout is None else reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_progress = False
+
+    @property
+    def is_open(self) -> bool:
+        """Indica se o circuito está aberto."""
+        return self._opened_at is not None
+
+    def before_call(self, host: str = "") -> bool:
+        """
+        Verifica se o pedido pode ser enviado.
+
+        Returns:
+            True se o pedido é o pedido de teste do estado meio-aberto; o
+            chamador tem então de chamar `end_trial` quando terminar
+
+        Raises:
+            CircuitOpenError: Se o circuito estiver aberto
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return False
+
+            elapsed = time.monotonic() - self._opened_at
+            if elapsed >= self.reset_timeout and not self._trial_in_progress:
+                # Meio-aberto: deixa passar um único pedido de teste
+                self._trial_in_progress = True
+                return True
+
+        raise CircuitOpenError(f"Circuito aberto para {host or 'o serviço'}; pedido não enviado")
+
+    def end_trial(self) -> None:
+        """
+        Termina o pedido de teste, qualquer que tenha sido o resultado.
+
+        Se o pedido não registou sucesso nem falha (ex.: uma exceção
+        inesperada), o circuito continua aberto mas o próximo pedido pode
+        voltar a testá-lo, em vez de ficar bloqueado para sempre.
+        """
+        with self._lock:
+            self._trial_in_progress = False
+
+    def record_success(self) -> None:
+        """Regista um pedido bem-sucedido e fecha o circuito."""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_progress = False
+
+    def record_failure(self) -> None:
+        """Regista uma falha e abre o circuito se o limite for atingido."""
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_progress or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_progress = False
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(url: str) -> CircuitBreaker:
+    """
+    Retorna o circuit breaker do host de uma URL.
+
+    Args:
+        url: URL do pedido
+
+    Returns:
+        Circuit breaker partilhado pelo host
+    """
+    host = urlsplit(url).netloc
+    with _breakers_lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = CircuitBreaker()
+            _breakers[host] = breaker
+        return breaker
+
+
+def call_with_retry(
+    call: Callable[[], Any],
+    breaker_key: str,
+    retry_on: Tuple[Type[BaseException], ...],
+    policy: Optional[RetryPolicy] = None,
+    retry_if: Optional[Callable[[BaseException], bool]] = None
+) -> Any:
+    """
+    Executa uma chamada arbitrária com novas tentativas e circuit breaker.
+
+    Usado para transportes que não passam pela sessão HTTP partilhada
+    (por exemplo, XML-RPC). O circuito conta uma falha por chamada, e não
+    por tentativa; exceções fora de `retry_on` (ex.: um Fault XML-RPC)
+    não contam como falha do host.
+
+    Args:
+        call: Função a executar
+        breaker_key: URL cujo host identifica o circuito
+        retry_on: Exceções que justificam nova tentativa
+        policy: Política de novas tentativas (se None, usa a por omissão)
+        retry_if: Filtro opcional; exceções para as quais devolve False
+            são propagadas sem nova tentativa
+
+    Returns:
+        Resultado da chamada
+    """
+    policy = policy or RetryPolicy()
+    breaker = get_breaker(breaker_key)
+    host = urlsplit(breaker_key).netloc
+
+    trial = breaker.before_call(host)
+    try:
+        attempt = 0
+        while True:
+            try:
+                result = call()
+            except retry_on as e:
+                if attempt >= policy.max_retries or (retry_if is not None and not retry_if(e)):
+                    breaker.record_failure()
+                    raise
+                time.sleep(policy.delay(attempt))
+                attempt += 1
+            else:
+                breaker.record_success()
+                return result
+    finally:
+        if trial:
+            breaker.end_trial()
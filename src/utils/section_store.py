@@ -0,0 +1,148 @@
+"""
+Armazenamento em disco do conteúdo das seções de artigos.
+
+Permite manter milhares de artigos em memória apenas como referências
+leves: o texto de cada seção é escrito num ficheiro e lido a pedido.
+
+Autor: Descomplicar - Agência de Aceleração Digital
+https://descomplicar.pt
+"""
+
+import os
+import logging
+import tempfile
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Referência a um texto guardado: (posição, tamanho em bytes)
+SectionRef = Tuple[int, int]
+
+class SectionStore:
+    """Ficheiro append-only com o texto das seções, lido por posição."""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Inicializa o armazenamento.
+
+        Args:
+            path: Caminho do ficheiro (se None, usa um ficheiro temporário
+                anónimo, removido ao fechar)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(path, "a+b")
+        else:
+            self._file = tempfile.TemporaryFile()
+
+    def put(self, text: str) -> SectionRef:
+        """
+        Guarda um texto e devolve a referência para o ler mais tarde.
+
+        Args:
+            text: Texto a guardar
+
+        Returns:
+            Referência (posição, tamanho)
+        """
+        data = text.encode("utf-8")
+        with self._lock:
+            self._file.seek(0, os.SEEK_END)
+            offset = self._file.tell()
+            self._file.write(data)
+        return (offset, len(data))
+
+    def get(self, ref: SectionRef) -> str:
+        """
+        Lê um texto guardado.
+
+        Args:
+            ref: Referência devolvida por `put`
+
+        Returns:
+            Texto guardado
+        """
+        offset, size = ref
+        with self._lock:
+            self._file.flush()
+            self._file.seek(offset)
+            data = self._file.read(size)
+        return data.decode("utf-8")
+
+    def close(self):
+        """Fecha o ficheiro (um ficheiro temporário é removido)."""
+        with self._lock:
+            self._file.close()
+
+class SpilledSections(dict):
+    """
+    Dicionário de seções cujo conteúdo vive num SectionStore.
+
+    Internamente guarda apenas referências; o texto é lido do disco em cada
+    acesso e nunca fica retido em memória.
+    """
+
+    __slots__ = ('store',)
+
+    def __init__(self, store: SectionStore, sections: Optional[Dict[str, str]] = None):
+        """
+        Inicializa o dicionário, escrevendo as seções dadas no armazenamento.
+
+        Args:
+            store: Armazenamento onde o texto das seções é guardado
+            sections: Seções iniciais {nome: conteúdo} (opcional)
+        """
+        super().__init__()
+        self.store = store
+        self.update(sections or {})
+
+    def ref(self, name: str) -> SectionRef:
+        """Devolve a referência guardada para uma seção, sem a ler do disco."""
+        return dict.__getitem__(self, name)
+
+    def __getitem__(self, name: str) -> str:
+        return self.store.get(dict.__getitem__(self, name))
+
+    def __setitem__(self, name: str, content: str):
+        dict.__setitem__(self, name, self.store.put(content))
+
+    def __iter__(self) -> Iterator[str]:
+        # Evita que dict(sections) copie as referências em vez do texto
+        return iter(list(dict.keys(self)))
+
+    def get(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        return self[name] if name in self else default
+
+    def pop(self, name: str, *default):
+        if name not in self and default:
+            return default[0]
+        content = self[name]
+        dict.__delitem__(self, name)
+        return content
+
+    def items(self) -> List[Tuple[str, str]]:
+        return [(name, self[name]) for name in self]
+
+    def values(self) -> List[str]:
+        return [self[name] for name in self]
+
+    def update(self, sections: Dict[str, str] = (), **kwargs):
+        for name, content in dict(sections, **kwargs).items():
+            self[name] = content
+
+    def copy(self) -> Dict[str, str]:
+        """Devolve uma cópia em memória (dict normal) das seções."""
+        return dict(self.items())
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, dict) and self.copy() == dict(other.items())
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"SpilledSections({list(self)})"
@@ -0,0 +1,112 @@
+"""
+Coalescência de pedidos idênticos em curso (single-flight).
+
+Quando vários chamadores pedem a mesma chave ao mesmo tempo, apenas o
+primeiro executa a chamada; os restantes esperam e recebem o mesmo
+resultado (ou a mesma exceção). Funciona entre threads e entre tarefas
+asyncio, incluindo misturas das duas, porque o estado partilhado é um
+`concurrent.futures.Future`.
+
+/**
+ * Autor: Descomplicar - Agência de Aceleração Digital
+ * https://descomplicar.pt
+ */
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class SingleFlight:
+    """Grupo de chamadas em que pedidos idênticos em curso partilham o resultado."""
+
+    def __init__(self):
+        """Inicializa o grupo sem chamadas em curso."""
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+
+    def _join(self, key: str) -> Tuple[Future, bool]:
+        """
+        Junta-se à chamada em curso para a chave ou regista uma nova.
+
+        Returns:
+            Tuple (future partilhado, True se o chamador é o líder)
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            return future, True
+
+    def _finish(self, key: str) -> None:
+        """Remove a chamada concluída para que pedidos futuros voltem a executar."""
+        with self._lock:
+            self._calls.pop(key, None)
+
+    def in_flight(self) -> int:
+        """Retorna o número de chamadas atualmente em curso."""
+        with self._lock:
+            return len(self._calls)
+
+    def do(self, key: str, call: Callable[[], Any]) -> Any:
+        """
+        Executa `call` uma única vez por chave entre os chamadores simultâneos.
+
+        Não deve ser chamado a partir da thread de um event loop enquanto uma
+        tarefa desse loop lidera a mesma chave, pois bloquearia o loop.
+
+        Args:
+            key: Chave que identifica o pedido
+            call: Função que executa o pedido
+
+        Returns:
+            Resultado partilhado da chamada
+        """
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+
+        try:
+            result = call()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._finish(key)
+
+    async def do_async(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Versão assíncrona de `do`.
+
+        Args:
+            key: Chave que identifica o pedido
+            call: Função que devolve a corrotina que executa o pedido
+
+        Returns:
+            Resultado partilhado da chamada
+        """
+        future, leader = self._join(key)
+        if not leader:
+            return await asyncio.wrap_future(future)
+
+        try:
+            result = await call()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._finish(key)
+
+
+# Grupo partilhado pelos clientes Dify do processo
+dify_requests = SingleFlight()
@@ -0,0 +1,321 @@
+"""
+Índice local das categorias e tags do WordPress.
+
+Guarda em disco os mapas nome/slug → ID de cada taxonomia, pelo que
+resolver uma categoria ou tag conhecida não faz nenhum pedido HTTP. O
+índice é sincronizado por completo (todas as páginas, 100 termos de cada
+vez) quando expira; entre sincronizações, um nome desconhecido só obriga
+a ler os termos criados depois da última leitura.
+
+/**
+ * Autor: Descomplicar - Agência de Aceleração Digital
+ * https://descomplicar.pt
+ */
+"""
+
+import os
+import html
+import json
+import time
+import logging
+import threading
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from . import http_client
+from .cache import site_key
+from ..config import config
+
+logger = logging.getLogger(__name__)
+
+# Máximo de termos por página aceite pela API REST do WordPress
+PER_PAGE = 100
+
+# Campos de cada termo pedidos à API (_fields)
+TERM_FIELDS = ('id', 'name', 'slug')
+
+def normalize_term(name: str) -> str:
+    """
+    Normaliza um nome ou slug para comparação.
+
+    O WordPress devolve os nomes com entidades HTML (ex.: "&amp;") e
+    compara-os sem distinguir maiúsculas de minúsculas.
+
+    Args:
+        name: Nome ou slug do termo
+
+    Returns:
+        Chave normalizada
+    """
+    return html.unescape(name).strip().casefold()
+
+class TaxonomyIndex:
+    """Mapas nome/slug → ID de uma taxonomia, persistidos em JSON."""
+
+    def __init__(
+        self,
+        api_url: str,
+        auth: Tuple[str, str],
+        taxonomy: str,
+        path: Optional[str] = None,
+        ttl: Optional[int] = None
+    ):
+        """
+        Inicializa o índice (o ficheiro só é lido no primeiro uso).
+
+        Args:
+            api_url: URL base da API REST (…/wp-json/wp/v2)
+            auth: Credenciais (utilizador, application password)
+            taxonomy: Endpoint da taxonomia ('categories' ou 'tags')
+            path: Ficheiro do índice (se None, usa CACHE_DIR/taxonomy/<site>-<taxonomia>.json)
+            ttl: Segundos até nova sincronização completa (se None, usa TAXONOMY_TTL)
+        """
+        self.endpoint = f"{api_url}/{taxonomy}"
+        self.auth = auth
+        self.taxonomy = taxonomy
+        self.path = path or os.path.join(config.CACHE_DIR, "taxonomy", f"{site_key(api_url)}-{taxonomy}.json")
+        self.ttl = config.TAXONOMY_TTL if ttl is None else ttl
+
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._terms: Dict[int, Dict[str, str]] = {}
+        self._ids: Dict[str, int] = {}
+        self._synced_at = 0.0
+        # Maior ID lido da API; termos criados localmente não contam, para
+        # que a atualização incremental não salte termos criados por outros
+        self._max_id = 0
+
+    def get_id(self, name: str, refresh: bool = True) -> Optional[int]:
+        """
+        Obtém o ID de um termo pelo nome ou slug.
+
+        Args:
+            name: Nome ou slug do termo
+            refresh: Se True, lê os termos novos da API quando o nome não
+                está no índice
+
+        Returns:
+            ID do termo ou None se não existir
+        """
+        key = normalize_term(name)
+        with self._lock:
+            synced = self._ensure_loaded()
+            if key not in self._ids and refresh and not synced:
+                self.refresh()
+            return self._ids.get(key)
+
+    def get_ids(self, names: Iterable[str], refresh: bool = True) -> Dict[str, Optional[int]]:
+        """
+        Obtém os IDs de vários termos, com no máximo uma atualização.
+
+        Args:
+            names: Nomes ou slugs dos termos
+            refresh: Se True, lê os termos novos da API (uma única vez)
+                quando algum nome não está no índice
+
+        Returns:
+            Dicionário {nome: ID ou None}
+        """
+        names = list(names)
+        with self._lock:
+            synced = self._ensure_loaded()
+            if refresh and not synced and any(normalize_term(name) not in self._ids for name in names):
+                self.refresh()
+            return {name: self._ids.get(normalize_term(name)) for name in names}
+
+    def get_name(self, term_id: int, refresh: bool = True) -> Optional[str]:
+        """
+        Obtém o nome de um termo pelo ID.
+
+        Args:
+            term_id: ID do termo
+            refresh: Se True, lê os termos novos da API quando o ID não
+                está no índice
+
+        Returns:
+            Nome do termo ou None se não existir
+        """
+        with self._lock:
+            synced = self._ensure_loaded()
+            if term_id not in self._terms and refresh and not synced:
+                self.refresh()
+            term = self._terms.get(term_id)
+            return term['name'] if term else None
+
+    def get_names(self, term_ids: Iterable[int]) -> Dict[int, str]:
+        """
+        Obtém os nomes de vários termos pelo ID.
+
+        Os IDs que não estão no índice são lidos num único pedido
+        (`include=`) e acrescentados ao índice.
+
+        Args:
+            term_ids: IDs dos termos
+
+        Returns:
+            Dicionário {ID: nome} (IDs inexistentes ficam de fora)
+        """
+        term_ids = list(term_ids)
+        with self._lock:
+            self._ensure_loaded()
+            missing = sorted({term_id for term_id in term_ids if term_id not in self._terms})
+            if missing:
+                for term in self._list(include=','.join(map(str, missing))):
+                    self._index(term)
+                self._save()
+            return {term_id: self._terms[term_id]['name'] for term_id in term_ids if term_id in self._terms}
+
+    def add(self, term: Dict[str, Any]):
+        """
+        Regista um termo (ex.: acabado de criar) e grava o índice.
+
+        Args:
+            term: Termo com 'id', 'name' e, opcionalmente, 'slug'
+        """
+        with self._lock:
+            self._ensure_loaded()
+            self._index(term)
+            self._save()
+
+    def sync(self) -> int:
+        """
+        Lê todos os termos da API e substitui o índice.
+
+        Returns:
+            Número de termos indexados
+        """
+        with self._lock:
+            terms = list(self._list())
+            self._terms.clear()
+            self._ids.clear()
+            self._max_id = 0
+            for term in terms:
+                self._index(term)
+                self._max_id = max(self._max_id, term['id'])
+            self._synced_at = time.time()
+            self._loaded = True
+            self._save()
+            logger.debug(f"Índice de {self.taxonomy} sincronizado: {len(terms)} termos")
+            return len(terms)
+
+    def refresh(self) -> int:
+        """
+        Lê apenas os termos criados depois da última leitura.
+
+        Os termos são pedidos por ID decrescente e a leitura pára no
+        primeiro já conhecido, pelo que normalmente basta um pedido.
+
+        Returns:
+            Número de termos novos
+        """
+        with self._lock:
+            if self._ensure_loaded():
+                return 0
+
+            added = 0
+            newest = self._max_id
+            for term in self._list(orderby='id', order='desc'):
+                if term['id'] <= self._max_id:
+                    break
+                self._index(term)
+                newest = max(newest, term['id'])
+                added += 1
+            self._max_id = newest
+            if added:
+                self._save()
+            return added
+
+    def _ensure_loaded(self) -> bool:
+        """
+        Carrega o índice do disco ou sincroniza-o se não existir ou tiver expirado.
+
+        A validade é verificada em cada chamada, e não só ao carregar, para
+        que um processo longo (ex.: um lote) volte a sincronizar o índice.
+
+        Returns:
+            True se foi feita agora uma sincronização completa
+        """
+        if self._loaded:
+            if time.time() - self._synced_at <= self.ttl:
+                return False
+        elif self._load():
+            return False
+        self.sync()
+        return True
+
+    def _load(self) -> bool:
+        """
+        Lê o índice gravado.
+
+        Returns:
+            True se o ficheiro existe, é válido e não expirou
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if time.time() - data.get("synced_at", 0) > self.ttl:
+            return False
+
+        for term in data.get("terms", []):
+            self._index(term)
+        self._synced_at = data["synced_at"]
+        self._max_id = data.get("max_id", 0)
+        self._loaded = True
+        return True
+
+    def _save(self):
+        """Grava o índice de forma atómica (ficheiro temporário + rename)."""
+        data = {
+            "synced_at": self._synced_at,
+            "max_id": self._max_id,
+            "terms": [{"id": term_id, **term} for term_id, term in self._terms.items()]
+        }
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            # O índice é só uma otimização: sem disco, fica em memória
+            logger.warning(f"Não foi possível gravar o índice de {self.taxonomy}: {str(e)}")
+
+    def _index(self, term: Dict[str, Any]):
+        """Adiciona um termo aos mapas em memória."""
+        name = html.unescape(term['name'])
+        slug = term.get('slug') or ''
+        self._terms[term['id']] = {'name': name, 'slug': slug}
+        self._ids[normalize_term(name)] = term['id']
+        if slug:
+            self._ids.setdefault(normalize_term(slug), term['id'])
+
+    def _list(self, **params: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Percorre os termos da API, página a página.
+
+        As páginas seguintes só são pedidas se o iterador continuar a ser
+        consumido.
+
+        Args:
+            **params: Parâmetros adicionais da listagem
+
+        Returns:
+            Iterador de termos {'id', 'name', 'slug'}
+        """
+        page = 1
+        while True:
+            response = http_client.get(
+                self.endpoint,
+                auth=self.auth,
+                params={**params, 'per_page': PER_PAGE, 'page': page, '_fields': ','.join(TERM_FIELDS)}
+            )
+            response.raise_for_status()
+            yield from response.json()
+
+            if page >= int(response.headers.get('X-WP-TotalPages', 1)):
+                return
+            page += 1
@@ -8,7 +8,6 @@ https://descomplicar.pt
 import re
 from typing import Dict, List, Optional, Tuple
 import requests
-from bs4 import BeautifulSoup
 
 class ContentValidationError(Exception):
     """Exceção para erros de validação de conteúdo."""
@@ -141,6 +140,8 @@ class ACIDAValidator:
 
 def validate_html_structure(html_content: str) -> Tuple[bool, List[str]]:
     """Valida a estrutura HTML do conteúdo."""
+    from bs4 import BeautifulSoup
+    
     errors = []
     soup = BeautifulSoup(html_content, 'html.parser')
     
@@ -4,18 +4,44 @@ Utilitários para integração com o WordPress.
 
 import os
 import json
-import requests
-from typing import Dict, List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
 from pathlib import Path
+from . import http_client
 from .exceptions import WordPressError
 from .logger import Logger
-from ..config.config import (
-    WP_URL,
-    WP_USERNAME,
-    WP_APP_PASSWORD,
-    DEFAULT_CATEGORY,
-    DEFAULT_TAGS
-)
+from .media_index import MediaIndex
+from .taxonomy import TERM_FIELDS, TaxonomyIndex, normalize_term
+from ..config import config
+
+# Máximo de tags criadas em simultâneo
+MAX_TAG_WORKERS = 5
+
+# Campos pedidos à API REST (_fields). Nenhum chamador lê o conteúdo
+# renderizado do post acabado de criar, pelo que o eco do corpo só é pedido
+# com `detail=True`: POST_FIELDS serve o lote, POST_ENRICH_FIELDS acrescenta
+# o necessário para os nomes da categoria e das tags, e POST_DETAIL_FIELDS
+# mantém tudo o que `_format_post_data` devolve.
+POST_FIELDS = ('id', 'link', 'slug', 'status', 'featured_media')
+POST_ENRICH_FIELDS = POST_FIELDS + ('categories', 'tags')
+POST_DETAIL_FIELDS = POST_ENRICH_FIELDS + ('title', 'content', 'excerpt', 'date', 'modified')
+RENDERED_FIELDS = ('title', 'content', 'excerpt')
+MEDIA_FIELDS = ('id',)
+
+# Se False, pede as respostas completas (para comparar o tráfego)
+TRIM_FIELDS = True
+
+def _fields(fields: Tuple[str, ...]) -> Dict[str, str]:
+    """
+    Parâmetros de query que limitam a resposta aos campos indicados.
+    
+    Args:
+        fields: Campos usados da resposta
+        
+    Returns:
+        {'_fields': 'a,b,…'} ou {} se TRIM_FIELDS estiver desativado
+    """
+    return {'_fields': ','.join(fields)} if TRIM_FIELDS else {}
 
 class WordPressClient:
     """Cliente para integração com o WordPress."""
@@ -25,16 +51,17 @@ class WordPressClient:
         self.logger = Logger(__name__)
         
         # Configurar URL base da API
-        self.api_url = f"{WP_URL}/wp-json/wp/v2"
+        self.api_url = f"{config.WP_URL}/wp-json/wp/v2"
         
         # Configurar autenticação
-        self.auth = (WP_USERNAME, WP_APP_PASSWORD)
+        self.auth = (config.WP_USERNAME, config.WP_APP_PASSWORD)
         
-        # Cache de categorias
-        self._categories = {}
+        # Índices locais (persistidos) de categorias e tags
+        self.categories = TaxonomyIndex(self.api_url, self.auth, 'categories')
+        self.tags = TaxonomyIndex(self.api_url, self.auth, 'tags')
         
-        # Cache de tags
-        self._tags = {}
+        # Índice local dos media enviados (por SHA-256 do conteúdo)
+        self.media = MediaIndex(self.api_url)
     
     def get_category_id(self, category_name: str) -> int:
         """
@@ -48,27 +75,16 @@ class WordPressClient:
             ID da categoria
         """
         try:
-            # Verificar cache
-            if category_name in self._categories:
-                return self._categories[category_name]
-            
-            # Buscar todas as categorias
-            response = requests.get(f"{self.api_url}/categories", auth=self.auth)
-            response.raise_for_status()
-            
-            # Atualizar cache
-            categories = response.json()
-            for category in categories:
-                self._categories[category['name']] = category['id']
-            
-            # Retornar ID da categoria se existir
-            if category_name in self._categories:
-                return self._categories[category_name]
+            # Procurar no índice local
+            category_id = self.categories.get_id(category_name)
+            if category_id:
+                return category_id
             
             # Criar categoria se não existir
-            response = requests.post(
+            response = http_client.post(
                 f"{self.api_url}/categories",
                 auth=self.auth,
+                params=_fields(TERM_FIELDS),
                 json={
                     'name': category_name,
                     'slug': category_name.lower().replace(' ', '-')
@@ -76,9 +92,9 @@ class WordPressClient:
             )
             response.raise_for_status()
             
-            # Atualizar cache
+            # Atualizar índice
             category = response.json()
-            self._categories[category['name']] = category['id']
+            self.categories.add(category)
             
             return category['id']
             
@@ -97,12 +113,22 @@ class WordPressClient:
             Nome da categoria
         """
         try:
+            # Procurar no índice local
+            name = self.categories.get_name(category_id)
+            if name is not None:
+                return name
+            
             # Buscar categoria
-            response = requests.get(f"{self.api_url}/categories/{category_id}", auth=self.auth)
+            response = http_client.get(
+                f"{self.api_url}/categories/{category_id}",
+                auth=self.auth,
+                params=_fields(TERM_FIELDS)
+            )
             response.raise_for_status()
             
-            # Retornar nome
+            # Atualizar índice e retornar nome
             category = response.json()
+            self.categories.add(category)
             return category['name']
             
         except Exception as e:
@@ -120,12 +146,22 @@ class WordPressClient:
             Nome da tag
         """
         try:
+            # Procurar no índice local
+            name = self.tags.get_name(tag_id)
+            if name is not None:
+                return name
+            
             # Buscar tag
-            response = requests.get(f"{self.api_url}/tags/{tag_id}", auth=self.auth)
+            response = http_client.get(
+                f"{self.api_url}/tags/{tag_id}",
+                auth=self.auth,
+                params=_fields(TERM_FIELDS)
+            )
             response.raise_for_status()
             
-            # Retornar nome
+            # Atualizar índice e retornar nome
             tag = response.json()
+            self.tags.add(tag)
             return tag['name']
             
         except Exception as e:
@@ -141,7 +177,11 @@ class WordPressClient:
         category: Optional[str] = None,
         category_id: Optional[int] = None,
         tags: Optional[List[str]] = None,
-        featured_image: Optional[Union[str, Path]] = None
+        featured_image: Optional[Union[str, Path]] = None,
+        featured_media_id: Optional[int] = None,
+        tag_ids: Optional[List[int]] = None,
+        enrich: bool = True,
+        detail: bool = False
     ) -> Dict:
         """
         Cria um novo post no WordPress.
@@ -155,6 +195,13 @@ class WordPressClient:
             category_id: ID da categoria do post
             tags: Lista de tags
             featured_image: URL ou caminho da imagem destacada
+            featured_media_id: ID de uma imagem já enviada (dispensa o upload)
+            tag_ids: IDs das tags já resolvidas (dispensa `tags`)
+            enrich: Se True, acrescenta os nomes da categoria e das tags
+                ao resultado (ver `_format_post_data`); se False, a
+                resposta só traz os campos de POST_FIELDS
+            detail: Se True, pede também o título, o conteúdo e o resumo
+                renderizados e as datas (POST_DETAIL_FIELDS)
             
         Returns:
             Dados do post criado
@@ -170,29 +217,26 @@ class WordPressClient:
             }
             
             # Define a categoria
-            if category_id:
-                post_data['categories'].append(category_id)
-            elif category:
-                category_id = self.get_category_id(category)
-                post_data['categories'].append(category_id)
-            else:
-                category_id = self.get_category_id(DEFAULT_CATEGORY)
-                post_data['categories'].append(category_id)
+            if not category_id:
+                category_id = self.get_category_id(category or config.DEFAULT_CATEGORY)
+            post_data['categories'].append(category_id)
             
             # Define as tags
-            if tags:
-                post_data['tags'] = self._create_tags(tags)
-            else:
-                post_data['tags'] = self._create_tags(DEFAULT_TAGS)
+            post_data['tags'] = tag_ids if tag_ids is not None else self._create_tags(tags or config.DEFAULT_TAGS)
             
             # Faz upload da imagem destacada
-            if featured_image:
+            if featured_media_id:
+                post_data['featured_media'] = featured_media_id
+            elif featured_image:
                 post_data['featured_media'] = self._upload_image(featured_image)
             
             # Publica o post
-            response = requests.post(
+            response = http_client.post(
                 f"{self.api_url}/posts",
                 auth=self.auth,
+                params=_fields(
+                    POST_DETAIL_FIELDS if detail else POST_ENRICH_FIELDS if enrich else POST_FIELDS
+                ),
                 json=post_data
             )
             response.raise_for_status()
@@ -201,60 +245,155 @@ class WordPressClient:
             post_data = response.json()
             
             self.logger.info(f"Post criado com sucesso: {title}")
-            return self._format_post_data(post_data)
+            return self._format_post_data(post_data, enrich=enrich)
             
         except Exception as e:
             self.logger.log_error(e, f"Erro ao criar post: {title}")
             raise
     
+    def resolve_taxonomy(
+        self,
+        category: Optional[str] = None,
+        tags: Optional[List[str]] = None
+    ) -> Tuple[int, List[int]]:
+        """
+        Obtém (ou cria) a categoria e as tags de um post.
+        
+        Usa DEFAULT_CATEGORY e DEFAULT_TAGS quando não são indicadas, tal
+        como `create_post`. Permite resolver a taxonomia antes de o conteúdo
+        estar pronto.
+        
+        Args:
+            category: Nome da categoria
+            tags: Lista de nomes de tags
+            
+        Returns:
+            Tuplo (ID da categoria, IDs das tags)
+        """
+        return self.get_category_id(category or config.DEFAULT_CATEGORY), self._create_tags(tags or config.DEFAULT_TAGS)
+    
     def _create_tags(self, tags: List[str]) -> List[int]:
         """
         Cria ou obtém IDs das tags.
         
+        As tags conhecidas são resolvidas pelo índice local (no máximo uma
+        listagem para ler tags novas); só as que faltam são criadas, em
+        paralelo. Nomes vazios são ignorados.
+        
         Args:
             tags: Lista de nomes de tags
             
         Returns:
-            Lista de IDs das tags
+            Lista de IDs das tags, pela ordem dos nomes
         """
         try:
-            tag_ids = []
-            
-            for tag_name in tags:
-                # Criar tag
-                response = requests.post(
-                    f"{self.api_url}/tags",
-                    auth=self.auth,
-                    json={'name': tag_name}
-                )
-                
-                # Se a tag já existe, usar o ID existente
-                if response.status_code == 400:
-                    # Buscar tag existente
-                    response = requests.get(
-                        f"{self.api_url}/tags",
-                        auth=self.auth,
-                        params={'search': tag_name}
-                    )
-                    response.raise_for_status()
-                    
-                    tags = response.json()
-                    if tags:
-                        tag_ids.append(tags[0]['id'])
-                else:
-                    response.raise_for_status()
-                    tag_ids.append(response.json()['id'])
-            
-            return tag_ids
+            names = [name.strip() for name in tags if name and name.strip()]
+            resolved = self.tags.get_ids(names)
+            
+            # Criar as tags que faltam (uma vez por nome normalizado)
+            missing = {}
+            for name, tag_id in resolved.items():
+                if tag_id is None:
+                    missing.setdefault(normalize_term(name), name)
+            if missing:
+                workers = min(len(missing), MAX_TAG_WORKERS)
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tag") as executor:
+                    created = dict(zip(missing, executor.map(self._create_tag, missing.values())))
+                for name in resolved:
+                    if resolved[name] is None:
+                        resolved[name] = created[normalize_term(name)]
+            
+            return [resolved[name] for name in names]
             
         except Exception as e:
             self.logger.log_error(e, f"Erro ao criar tags: {tags}")
             raise
     
+    def _create_tag(self, name: str) -> int:
+        """
+        Cria uma tag e regista-a no índice local.
+        
+        Se outro processo a criou entretanto, o WordPress responde 400
+        com o código 'term_exists' e o ID da tag existente, que é usado.
+        
+        Args:
+            name: Nome da tag
+            
+        Returns:
+            ID da tag
+        """
+        response = http_client.post(
+            f"{self.api_url}/tags",
+            auth=self.auth,
+            params=_fields(TERM_FIELDS),
+            json={'name': name}
+        )
+        
+        if response.status_code == 400:
+            try:
+                error = response.json()
+            except ValueError:
+                error = {}
+            term_id = (error.get('data') or {}).get('term_id') if error.get('code') == 'term_exists' else None
+            if term_id:
+                self.tags.add({'id': term_id, 'name': name})
+                return term_id
+        
+        response.raise_for_status()
+        tag = response.json()
+        self.tags.add(tag)
+        return tag['id']
+    
+    def upload_media(self, image_path: Union[str, Path]) -> int:
+        """
+        Faz upload de uma imagem para a biblioteca de media.
+        
+        Args:
+            image_path: Caminho da imagem
+            
+        Returns:
+            ID da imagem no WordPress
+        """
+        return self._upload_image(image_path)
+    
+    def reconcile_media(self) -> int:
+        """
+        Remove do índice de media os anexos apagados no WordPress.
+        
+        Returns:
+            Número de entradas removidas
+        """
+        return self.media.reconcile(self._existing_media)
+    
+    def _existing_media(self, media_ids: List[int]) -> List[int]:
+        """
+        Indica quais dos anexos indicados ainda existem.
+        
+        Args:
+            media_ids: IDs dos anexos
+            
+        Returns:
+            IDs que existem na biblioteca de media
+        """
+        existing = []
+        for start in range(0, len(media_ids), 100):
+            chunk = media_ids[start:start + 100]
+            response = http_client.get(
+                f"{self.api_url}/media",
+                auth=self.auth,
+                params={'include': ','.join(map(str, chunk)), 'per_page': 100, **_fields(MEDIA_FIELDS)}
+            )
+            response.raise_for_status()
+            existing.extend(item['id'] for item in response.json())
+        return existing
+    
     def _upload_image(self, image_path: Union[str, Path]) -> int:
         """
         Faz upload de uma imagem.
         
+        Uma imagem com o mesmo conteúdo (SHA-256) de outra já enviada não é
+        enviada de novo: é devolvido o ID do anexo existente.
+        
         Args:
             image_path: Caminho da imagem
             
@@ -269,40 +408,58 @@ class WordPressClient:
             if not image_path.exists():
                 raise FileNotFoundError(f"Imagem não encontrada: {image_path}")
             
-            # Fazer upload
-            with open(image_path, 'rb') as img:
-                files = {
-                    'file': (image_path.name, img, 'image/webp')
-                }
-                
-                response = requests.post(
-                    f"{self.api_url}/media",
-                    auth=self.auth,
-                    files=files
-                )
-                response.raise_for_status()
-            
-            return response.json()['id']
+            # Bytes em memória para o hash e para permitir novas tentativas
+            data = image_path.read_bytes()
+            return self.media.get_or_upload(
+                data, lambda: self._post_media(image_path.name, data), image_path.name
+            )
             
         except Exception as e:
             self.logger.log_error(e, f"Erro ao fazer upload da imagem: {image_path}")
             raise
     
-    def _format_post_data(self, post_data: Dict) -> Dict:
+    def _post_media(self, name: str, data: bytes) -> int:
+        """
+        Envia um ficheiro para a biblioteca de media.
+        
+        Args:
+            name: Nome do ficheiro
+            data: Conteúdo do ficheiro
+            
+        Returns:
+            ID do anexo criado
+        """
+        response = http_client.post(
+            f"{self.api_url}/media",
+            auth=self.auth,
+            params=_fields(MEDIA_FIELDS),
+            files={'file': (name, data, 'image/webp')}
+        )
+        response.raise_for_status()
+        return response.json()['id']
+    
+    def _format_post_data(self, post_data: Dict, enrich: bool = True) -> Dict:
         """
         Formata os dados do post.
         
+        Os nomes da categoria e das tags vêm dos índices locais; os IDs
+        desconhecidos são lidos num único pedido por taxonomia. Os campos
+        renderizados só são incluídos se a resposta os trouxer.
+        
         Args:
             post_data: Dados do post
+            enrich: Se False, não acrescenta 'category_name' nem 'tag_names'
             
         Returns:
             Dados formatados do post
         """
         data = {
             'id': post_data.get('id'),
-            'title': post_data.get('title', {}).get('rendered', ''),
-            'content': post_data.get('content', {}).get('rendered', ''),
-            'excerpt': post_data.get('excerpt', {}).get('rendered', ''),
+            **{
+                key: post_data.get(key, {}).get('rendered', '')
+                for key in RENDERED_FIELDS
+                if key in post_data
+            },
             'status': post_data.get('status', ''),
             'date': post_data.get('date'),
             'modified': post_data.get('modified'),
@@ -314,11 +471,13 @@ class WordPressClient:
         }
         
         # Adicionar nomes das categorias e tags
-        if data['categories']:
-            data['category_name'] = self.get_category_name(data['categories'][0])
+        if enrich and data['categories']:
+            category_id = data['categories'][0]
+            data['category_name'] = self.categories.get_names([category_id]).get(category_id)
         
-        if data['tags']:
-            data['tag_names'] = [self.get_tag_name(tag_id) for tag_id in data['tags']]
+        if enrich and data['tags']:
+            names = self.tags.get_names(data['tags'])
+            data['tag_names'] = [names[tag_id] for tag_id in data['tags'] if tag_id in names]
         
         # Remover campos None
         return {k: v for k, v in data.items() if v is not None} 
\ No newline at end of file
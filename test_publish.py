@@ -10,6 +10,7 @@ from src.utils.wordpress import WordPressClient
 from src.utils.image import ImageGenerator
 from src.utils.content import ContentManager
 from src.utils.seo import SEOOptimizer
+from src.utils.pipeline import Pipeline
 
 def main():
     # Inicializar componentes
@@ -41,50 +42,8 @@ def main():
     Comece hoje mesmo a desenvolver sua presença digital. Identifique os canais mais relevantes para sua especialidade, crie conteúdo que ressoe com seu público-alvo e estabeleça uma comunicação eficiente com seus pacientes atuais e potenciais.
     """
     
-    # Estruturar conteúdo no formato ACIDA
-    content = content_manager.structure_content(content_base, template="ACIDA")
-    
-    # Adicionar CTAs
-    content = content_manager.add_cta(
-        content,
-        cta_type="consultoria",
-        cta_text="Precisa de ajuda com o marketing digital da sua clínica? A Descomplicar oferece consultoria especializada em marketing digital para profissionais de saúde. Agende uma análise gratuita do seu projeto."
-    )
-    content = content_manager.add_cta(
-        content,
-        cta_type="servicos",
-        cta_text="Transforme sua Presença Digital. Descubra como a Descomplicar pode ajudar sua clínica a alcançar mais pacientes online com estratégias personalizadas de marketing digital."
-    )
-    
-    # Formatar conteúdo em HTML
-    content = content_manager.format_content(
-        content,
-        format_type="html",
-        title=title,
-        category="Marketing Digital",
-        tags=[
-            "marketing digital para clínicas",
-            "marketing médico",
-            "presença digital na saúde",
-            "estratégia digital para médicos",
-            "marketing para profissionais de saúde",
-            "comunicação em saúde",
-            "clínica online",
-            "gestão de clínicas"
-        ]
-    )
-    
-    # Gerar imagem destacada
-    featured_image = image_gen.create_featured_image(
-        title=title,
-        category="Marketing Digital"
-    )
-    
-    # Extrair palavras-chave do conteúdo
-    extracted_keywords = content_manager.extract_keywords(content_base, max_keywords=8)
-    
-    # Combinar com tags específicas
-    tags = list(set(extracted_keywords + [
+    # Tags específicas do artigo
+    base_tags = [
         "marketing digital para clínicas",
         "marketing médico",
         "presença digital na saúde",
@@ -93,21 +52,67 @@ def main():
         "comunicação em saúde",
         "clínica online",
         "gestão de clínicas"
-    ]))
+    ]
+    
+    def build_content():
+        # Estruturar conteúdo no formato ACIDA
+        content = content_manager.structure_content(content_base, template="ACIDA")
+        
+        # Adicionar CTAs
+        content = content_manager.add_cta(
+            content,
+            cta_type="consultoria",
+            cta_text=(
+                "Precisa de ajuda com o marketing digital da sua clínica? A Descomplicar oferece "
+                "consultoria especializada em marketing digital para profissionais de saúde. "
+                "Agende uma análise gratuita do seu projeto."
+            )
+        )
+        content = content_manager.add_cta(
+            content,
+            cta_type="servicos",
+            cta_text=(
+                "Transforme sua Presença Digital. Descubra como a Descomplicar pode ajudar sua clínica "
+                "a alcançar mais pacientes online com estratégias personalizadas de marketing digital."
+            )
+        )
+        
+        # Formatar conteúdo em HTML
+        return content_manager.format_content(
+            content,
+            format_type="html",
+            title=title,
+            category="Marketing Digital",
+            tags=base_tags
+        )
     
-    # Gerar resumo otimizado
-    excerpt = content_manager.generate_excerpt(content_base)
+    def build_tags():
+        # Extrair palavras-chave do conteúdo e combinar com as tags específicas
+        extracted_keywords = content_manager.extract_keywords(content_base, max_keywords=8)
+        return list(set(extracted_keywords + base_tags))
     
-    # Publicar como rascunho
-    result = wp.create_post(
-        title=title,
-        content=content,
-        excerpt=excerpt,
-        status="draft",
-        category="Marketing Digital",
-        tags=tags,
-        featured_image=featured_image
+    # A imagem, o upload e a taxonomia só dependem do título e das tags,
+    # por isso correm em paralelo com a preparação do conteúdo
+    pipeline = (
+        Pipeline()
+        .add('content', build_content)
+        .add('excerpt', lambda: content_manager.generate_excerpt(content_base))
+        .add('tags', build_tags)
+        .add('image', lambda: image_gen.create_featured_image(title=title, category="Marketing Digital"))
+        .add('media', lambda image: wp.upload_media(image) if image else None, requires=['image'])
+        .add('taxonomy', lambda tags: wp.resolve_taxonomy("Marketing Digital", tags), requires=['tags'])
+        .add('post', lambda content, excerpt, media, taxonomy: wp.create_post(
+            title=title,
+            content=content,
+            excerpt=excerpt,
+            status="draft",  # Publicar como rascunho
+            category_id=taxonomy[0],
+            tag_ids=taxonomy[1],
+            featured_media_id=media
+        ), requires=['content', 'excerpt', 'media', 'taxonomy'])
     )
+    result = pipeline.run()['post']
+    print(f"Etapas: {pipeline.format_timings()}")
     
     # Verificar resultado
     print(f"Artigo publicado com sucesso!")
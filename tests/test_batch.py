@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes para a geração de artigos em lote.
+
+Autor: Descomplicar - Agência de Aceleração Digital
+https://descomplicar.pt
+"""
+
+import threading
+import time
+from unittest.mock import Mock
+from src.batch import BatchRunner, iter_rows, parse_row
+from src.utils.journal import JobJournal
+
+CSV_HEADER = 'título,tópicos,palavras chave,tags,categorias,slug,faqs\n'
+
+def section_answer(prompt, *args, **kwargs):
+    """Resposta do Dify dentro dos limites de palavras da seção pedida."""
+    words = 500 if 'conteúdo principal' in prompt else 200
+    return {'answer': '<p>' + ' '.join(['Conteúdo'] * words) + '</p>'}
+
+def make_runner(**kwargs):
+    dify = Mock()
+    dify.knowledge_base_id = "kb"
+    dify.generate_content.side_effect = section_answer
+    return BatchRunner(dify_client=dify, **kwargs)
+
+def test_parse_row():
+    """Testa a conversão de uma linha do CSV."""
+    item = parse_row({
+        'título': ' SEO Local ',
+        'tópicos': 'Google, Mapas ,',
+        'palavras chave': 'seo',
+        'tags': 'seo, local',
+        'categorias': '',
+        'slug': 'seo-local',
+        'faqs': '[{"pergunta": "O quê?", "resposta": "Isto."}]'
+    })
+
+    assert item['title'] == 'SEO Local'
+    assert item['topics'] == ['Google', 'Mapas']
+    assert item['tags'] == ['seo', 'local']
+    assert item['category'] is None
+    assert item['faqs'][0]['pergunta'] == 'O quê?'
+
+def test_iter_rows_start_and_limit(tmp_path):
+    """Testa a leitura em streaming com início e limite."""
+    path = tmp_path / 'artigos.csv'
+    rows = ''.join(f'Artigo {i},,,,,artigo-{i},[]\n' for i in range(5))
+    path.write_text(CSV_HEADER + rows, encoding='utf-8')
+
+    items = list(iter_rows(path, start=1, limit=2))
+
+    assert [item['title'] for item in items] == ['Artigo 1', 'Artigo 2']
+    assert [item['row'] for item in items] == [1, 2]
+
+def test_batch_runner_bounds_workers_and_reuses_clients(tmp_path):
+    """Testa o limite de artigos em curso e a partilha dos clientes."""
+    runner = make_runner(workers=2, output_dir=tmp_path, wordpress=Mock(), image_generator=Mock())
+    lock = threading.Lock()
+    active = {'now': 0, 'max': 0}
+
+    def slow_process(item):
+        with lock:
+            active['now'] += 1
+            active['max'] = max(active['max'], active['now'])
+        time.sleep(0.02)
+        with lock:
+            active['now'] -= 1
+        return {'title': item['title'], 'seconds': 0.02}
+
+    runner.process = slow_process
+    items = [{'title': f'Artigo {i}', 'row': i} for i in range(6)]
+    summary = runner.run(iter(items))
+
+    assert summary['done'] == 6
+    assert summary['failed'] == 0
+    assert active['max'] == 2
+
+def test_batch_runner_process_publishes_with_shared_clients(tmp_path):
+    """Testa que cada artigo usa os clientes partilhados do lote."""
+    wordpress = Mock()
+    wordpress.create_post.return_value = {'id': 1}
+    wordpress.resolve_taxonomy.return_value = (3, [5])
+    image_generator = Mock()
+    runner = make_runner(output_dir=tmp_path, wordpress=wordpress, image_generator=image_generator)
+    item = parse_row({'título': 'SEO Local', 'tags': 'seo', 'categorias': 'Marketing Digital', 'slug': 'seo-local'})
+
+    runner.run([item, dict(item, slug='seo-local-2')])
+
+    assert (tmp_path / 'seo-local.html').read_text(encoding='utf-8').startswith('<h1>SEO Local</h1>')
+    assert wordpress.create_post.call_count == 2
+    wordpress.resolve_taxonomy.assert_called_with('Marketing Digital', ['seo'])
+    assert wordpress.create_post.call_args.kwargs['category_id'] == 3
+    assert wordpress.create_post.call_args.kwargs['tag_ids'] == [5]
+    assert wordpress.create_post.call_args.kwargs['enrich'] is False
+    image_generator.create_featured_image.assert_called_with('SEO Local', 'Marketing Digital')
+
+def test_batch_runner_uses_planned_topics_keywords_and_faqs(tmp_path):
+    """Testa que os tópicos, palavras-chave e FAQs do CSV chegam ao artigo."""
+    runner = make_runner(output_dir=tmp_path)
+    item = parse_row({
+        'título': 'SEO Local',
+        'tópicos': 'Google Business Profile, Avaliações',
+        'palavras chave': 'seo local, mapas',
+        'slug': 'seo-local',
+        'faqs': '[{"pergunta": "Quanto tempo demora?", "resposta": "Alguns meses."}]'
+    })
+
+    runner.run([item])
+
+    prompts = [call.args[0] for call in runner.dify.generate_content.call_args_list]
+    # A seção de FAQ vem do CSV: só as outras quatro são pedidas ao Dify
+    assert len(prompts) == 4
+    assert all('abordando: Google Business Profile, Avaliações' in prompt for prompt in prompts)
+    assert all('palavras-chave: seo local, mapas' in prompt for prompt in prompts)
+    html = (tmp_path / 'seo-local.html').read_text(encoding='utf-8')
+    assert '<h3>Quanto tempo demora?</h3>' in html
+    assert 'Alguns meses.' in html
+
+def test_batch_runner_repairs_failed_sections_before_journaling(tmp_path):
+    """Testa que uma seção com erro é regenerada e nunca chega ao diário."""
+    journal = JobJournal(str(tmp_path / 'journal.jsonl'))
+    runner = make_runner(journal=journal)
+    failed = []
+
+    def fail_first_introduction(prompt, *args, **kwargs):
+        if 'introdução' in prompt and not failed:
+            failed.append(prompt)
+            raise RuntimeError("502")
+        return section_answer(prompt)
+
+    runner.dify.generate_content.side_effect = fail_first_introduction
+    item = parse_row({'título': 'SEO Local', 'slug': 'seo-local'})
+
+    summary = runner.run([item])
+
+    assert summary['done'] == 1
+    assert runner.dify.generate_content.call_count == 6
+    sections = journal.get('seo-local', 'sections')
+    assert sections['attention'] == section_answer('introdução')['answer']
+
+def test_batch_runner_fails_job_with_invalid_sections(tmp_path):
+    """Testa que um artigo cujas seções continuam inválidas não é publicado."""
+    journal = JobJournal(str(tmp_path / 'journal.jsonl'))
+    wordpress = Mock()
+    runner = make_runner(journal=journal, wordpress=wordpress)
+    runner.dify.generate_content.side_effect = RuntimeError("502")
+    item = parse_row({'título': 'SEO Local', 'slug': 'seo-local'})
+
+    summary = runner.run([item])
+
+    assert summary['failed'] == 1
+    assert 'falha na geração' in summary['errors'][0]['error']
+    assert not journal.has('seo-local', 'sections')
+    wordpress.create_post.assert_not_called()
+
+def test_batch_runner_continues_after_failure():
+    """Testa que um artigo com erro não interrompe o lote."""
+    runner = make_runner()
+    runner.process = Mock(side_effect=[RuntimeError("502"), {'title': 'B', 'seconds': 0.0}])
+
+    summary = runner.run([{'title': 'A', 'row': 0}, {'title': 'B', 'row': 1}])
+
+    assert summary['done'] == 1
+    assert summary['errors'] == [{'title': 'A', 'row': 0, 'error': '502'}]
+
+def test_journal_skips_truncated_line(tmp_path):
+    """Testa que uma linha incompleta no fim do diário é ignorada."""
+    path = tmp_path / 'journal.jsonl'
+    JobJournal(str(path)).record('seo-local', 'sections', {'attention': '<p>A</p>'})
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"job": "seo-local", "stage": "ht')
+
+    journal = JobJournal(str(path))
+
+    assert journal.get('seo-local', 'sections') == {'attention': '<p>A</p>'}
+    assert journal.next_stage('seo-local') == 'html'
+
+    journal.record('seo-local', 'html', '<h1>SEO Local</h1>')
+    assert JobJournal(str(path)).next_stage('seo-local') == 'image'
+
+def test_batch_runner_resumes_from_first_unfinished_stage(tmp_path):
+    """Testa que um lote reiniciado não repete etapas já concluídas."""
+    journal_path = str(tmp_path / 'journal.jsonl')
+    wordpress = Mock()
+    wordpress.upload_media.return_value = 42
+    wordpress.resolve_taxonomy.return_value = (3, [5])
+    wordpress.create_post.side_effect = [RuntimeError("502"), {'id': 7}]
+    image_generator = Mock()
+    image_generator.create_featured_image.return_value = tmp_path / 'seo-local.webp'
+    item = parse_row({'título': 'SEO Local', 'slug': 'seo-local'})
+
+    runner = make_runner(wordpress=wordpress, image_generator=image_generator, journal=JobJournal(journal_path))
+    assert runner.run([item])['failed'] == 1
+
+    resumed = make_runner(wordpress=wordpress, image_generator=image_generator, journal=JobJournal(journal_path))
+    summary = resumed.run([item])
+
+    assert summary['results'][0]['post'] == {'id': 7}
+    resumed.dify.generate_content.assert_not_called()
+    assert image_generator.create_featured_image.call_count == 1
+    assert wordpress.upload_media.call_count == 1
+    assert wordpress.create_post.call_args.kwargs['featured_media_id'] == 42
@@ -10,7 +10,10 @@ https://descomplicar.pt
 
 import pytest
 from unittest.mock import Mock, patch
-from src.generators.content_generator import ContentGenerator, Article
+from src.generators.content_generator import (
+    ContentGenerator, Article, clean_content, extract_topics, section_placeholder
+)
+from src.utils.exceptions import ValidationError
 
 def test_article_initialization():
     """Testa a inicialização de um artigo."""
@@ -91,4 +94,208 @@ def test_content_generator_generate_article(mock_generate_section):
     assert len(article.sections) == 5  # attention, interest, desire, action, faq
     
     # Verificar se _generate_section foi chamado para cada seção
-    assert mock_generate_section.call_count == 5
\ No newline at end of file
+    assert mock_generate_section.call_count == 5
+
+def test_content_generator_generate_article_concurrent():
+    """Testa a geração paralela das seções mantendo a ordem."""
+    import threading
+    import time
+    
+    mock_dify = Mock()
+    generator = ContentGenerator(mock_dify, max_workers=5)
+    barrier = threading.Barrier(5, timeout=5)
+    
+    def fake_generate_section(topic, section):
+        # Todas as seções têm de estar em curso ao mesmo tempo
+        barrier.wait()
+        time.sleep(0.01)
+        return f"<p>{section}</p>"
+    
+    with patch.object(generator, '_generate_section', side_effect=fake_generate_section):
+        article = generator.generate_article("Marketing Digital", "blog-marketing-digital")
+    
+    assert list(article.sections) == ['attention', 'interest', 'desire', 'action', 'faq']
+    assert article.sections['faq'] == "<p>faq</p>"
+
+def test_content_generator_generate_article_sequential():
+    """Testa a geração sequencial das seções."""
+    mock_dify = Mock()
+    generator = ContentGenerator(mock_dify, max_workers=1)
+    
+    with patch.object(generator, '_generate_section', side_effect=lambda topic, section: section) as mocked:
+        article = generator.generate_article("Marketing Digital", "blog-marketing-digital")
+    
+    assert [c.args[1] for c in mocked.call_args_list] == ['attention', 'interest', 'desire', 'action', 'faq']
+    assert article.sections['action'] == 'action'
+
+def test_content_generator_stream_section():
+    """Testa a geração de uma seção em streaming, bloco a bloco."""
+    mock_dify = Mock()
+    mock_dify.stream_content.return_value = iter([
+        "<h3>1. Prim", "eiro</h3><p>Texto ", "um</p>", "<p>Texto dois</p>"
+    ])
+    generator = ContentGenerator(mock_dify)
+    received = []
+    
+    content = generator._generate_section(
+        "Marketing Digital", "interest", on_block=lambda section, block: received.append(block)
+    )
+    
+    assert received == ["<h3>1. Primeiro</h3>", "<p>Texto um</p>", "<p>Texto dois</p>"]
+    assert content == "\n".join(received)
+    mock_dify.generate_content.assert_not_called()
+
+def test_content_generator_stream_section_aborts_on_limit():
+    """Testa que a geração em streaming é abortada acima do limite."""
+    def endless_stream():
+        while True:
+            yield "<p>Texto</p>"
+    
+    mock_dify = Mock()
+    stream = endless_stream()
+    mock_dify.stream_content.return_value = stream
+    generator = ContentGenerator(mock_dify, stream_max_chars=100)
+    
+    blocks = []
+    with pytest.raises(ValidationError):
+        for block in generator.stream_section("Marketing Digital", "attention"):
+            blocks.append(block)
+    
+    assert 0 < len(blocks) <= 10
+    assert stream.gi_frame is None  # gerador fechado
+    
+    # Uma seção truncada não passa por completa: fica com o marcador para reparação
+    mock_dify.stream_content.return_value = iter(["<p>Texto</p>"] * 20)
+    content = generator._generate_section("Marketing Digital", "attention", on_block=lambda section, block: None)
+    assert content == section_placeholder("attention")
+
+def test_content_generator_one_shot_with_fallback():
+    """Testa o modo one-shot com geração individual das seções em falta."""
+    mock_dify = Mock()
+    mock_dify.generate_content.return_value = {
+        'answer': '```json\n{"attention": "<p>Intro</p>", "interest": "<p>Corpo</p>", '
+                  '"desire": "", "action": "<p>Fim</p>"}\n```'
+    }
+    generator = ContentGenerator(mock_dify)
+    
+    with patch.object(generator, '_generate_section', side_effect=lambda topic, section: f"<p>{section}</p>") as mocked:
+        article = generator.generate_article("Marketing Digital", "blog-marketing-digital", one_shot=True)
+    
+    assert mock_dify.generate_content.call_count == 1
+    assert sorted(c.args[1] for c in mocked.call_args_list) == ['desire', 'faq']
+    assert list(article.sections) == ['attention', 'interest', 'desire', 'action', 'faq']
+    assert article.sections['attention'] == "<p>Intro</p>"
+    assert article.sections['desire'] == "<p>desire</p>"
+
+def test_content_generator_reuse_conversation(mock_dify_response):
+    """Testa que as seções partilham a conversa aberta pela primeira."""
+    mock_dify = Mock()
+    mock_dify.generate_content.return_value = dict(
+        mock_dify_response, metadata={'usage': {'total_tokens': 100}}
+    )
+    generator = ContentGenerator(mock_dify)
+    
+    article = generator.generate_article("Marketing Digital", "blog-marketing-digital", reuse_conversation=True)
+    
+    conversation_ids = [c.kwargs['conversation_id'] for c in mock_dify.generate_content.call_args_list]
+    assert conversation_ids == [None] + ['123456789'] * 4
+    assert len(article.sections) == 5
+    assert sum(stat['tokens'] for stat in generator.last_run_stats) == 500
+
+def test_clean_content_combined_passes():
+    """Testa a limpeza de HTML numa única função pré-compilada."""
+    raw = (
+        '<html><body><h1>Título</h1>x```html\n<h2>Introdução</h2>\n<p>Texto<br/></p>'
+        '<h3>Passo</h3> <p></h3>\n\n<h3></p>```'
+    )
+    
+    assert clean_content(raw) == 'x<p>Texto</p><h3>Passo</h3> </p>'
+
+def test_extract_topics_single_pass():
+    """Testa a extração de tópicos numerados com o corpo de cada <h3>."""
+    content = (
+        '<h3>2: Segundo</h3><p>B</p><h3>Sem número</h3><p>fora</p>'
+        '<p>Ver <strong>3. Terceiro</strong></p><h3>1. Primeiro</h3><p>A</p>'
+    )
+    
+    assert extract_topics(content) == [
+        (1, 'Primeiro', '<p>A</p>'),
+        (2, 'Segundo', '<p>B</p>'),
+        (3, 'Terceiro', None)
+    ]
+
+def test_article_to_html_renders_only_changed_sections():
+    """Testa que só a seção alterada é renderizada de novo."""
+    article = Article("Teste", "blog-marketing-digital")
+    article.add_section("attention", "<p>Introdução</p>")
+    article.add_section("action", "<p>Conclusão</p>")
+    
+    with patch('src.generators.content_generator.format_section', side_effect=lambda c, s: c) as fmt:
+        first = article.to_html()
+        assert article.to_html() == first
+        assert fmt.call_count == 2
+        
+        article.add_section("action", "<p>Nova conclusão</p>")
+        html = article.to_html()
+        assert fmt.call_count == 3
+        assert "<p>Nova conclusão</p>" in html
+
+def test_article_write_html_matches_to_html():
+    """Testa que write_html escreve o mesmo HTML que to_html."""
+    import io
+    article = Article("Teste", "blog-marketing-digital")
+    article.add_section("attention", "<p>Introdução</p>")
+    article.add_section("faq", "<strong>Pergunta?</strong> Resposta")
+    buffer = io.StringIO()
+    
+    written = article.write_html(buffer)
+    
+    assert buffer.getvalue() == article.to_html()
+    assert written == len(buffer.getvalue())
+
+def test_article_spill_keeps_sections_on_disk(tmp_path):
+    """Testa o despejo das seções para disco e a leitura a pedido."""
+    from src.utils.section_store import SectionStore
+    article = Article("Teste", "blog-marketing-digital")
+    article.add_section("attention", "<p>Introdução</p>")
+    html = article.to_html()
+    store = SectionStore(str(tmp_path / 'sections.bin'))
+    
+    article.spill(store)
+    article.add_section("action", "<p>Conclusão</p>")
+    
+    assert article.spilled
+    assert isinstance(article.sections, dict)
+    assert all(isinstance(ref, tuple) for ref in dict.values(article.sections))
+    assert article.sections["attention"] == "<p>Introdução</p>"
+    assert dict(article.sections) == {"attention": "<p>Introdução</p>", "action": "<p>Conclusão</p>"}
+    assert article.to_html().startswith(html)
+    
+    article.load()
+    assert type(article.sections) is dict
+    assert not hasattr(article, '__dict__')
+
+def test_content_generator_repair_regenerates_only_invalid_sections():
+    """Testa que repair regenera apenas as seções com falha ou fora dos limites."""
+    mock_dify = Mock()
+    mock_dify.knowledge_base_id = "test_kb_id"
+    generator = ContentGenerator(mock_dify)
+    article = Article("Teste", "blog-marketing-digital")
+    valid_attention = "<p>" + "palavra " * 200 + "</p>"
+    article.add_section("attention", valid_attention)
+    article.add_section("interest", "<p>curto</p>")
+    article.add_section("desire", "<p>Benefícios</p>")
+    article.add_section("action", "<p>Erro ao gerar conteúdo para action</p>")
+    article.add_section("faq", "<strong>Pergunta?</strong> Resposta")
+    
+    def regenerate(topic, section, use_cache):
+        return f"<p>novo {section}</p>"
+    
+    with patch.object(generator, '_generate_section', side_effect=regenerate) as mocked:
+        problems = generator.repair(article)
+    
+    assert set(problems) == {"interest", "action"}
+    assert sorted(c.args[1] for c in mocked.call_args_list) == ["action", "interest"]
+    assert all(c.kwargs == {'use_cache': False} for c in mocked.call_args_list)
+    assert article.sections["attention"] == valid_attention
+    assert article.sections["action"] == "<p>novo action</p>"
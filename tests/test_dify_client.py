@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes para os clientes Dify e a camada de transporte HTTP.
+
+Autor: Descomplicar - Agência de Aceleração Digital
+https://descomplicar.pt
+"""
+
+import pytest
+from unittest.mock import Mock, patch
+from src.utils import http_client, llm_cache
+from src.utils.cache import Cache
+from src.utils.exceptions import DifyError
+from src.utils.dify import DifyClient as UtilsDifyClient
+from src.integrations.dify_client import DifyClient as IntegrationsDifyClient
+
+@pytest.fixture
+def dify_env(monkeypatch):
+    """Define as variáveis de ambiente necessárias para os clientes Dify."""
+    monkeypatch.setenv("DIFY_API_KEY", "test_key")
+    monkeypatch.setenv("DIFY_API_URL", "https://api.test.dify.ai/v1")
+    monkeypatch.setenv("DIFY_KNOWLEDGE_BASE_ID", "test_kb_id")
+
+@pytest.fixture(autouse=True)
+def isolated_llm_cache(tmp_path, monkeypatch):
+    """Usa um cache de respostas temporário em cada teste."""
+    cache = llm_cache.LLMCache(mode="read_write", cache=Cache(str(tmp_path)))
+    monkeypatch.setattr(llm_cache, '_default_cache', cache)
+    return cache
+
+@pytest.fixture
+def mock_session():
+    """Substitui a sessão HTTP partilhada por um mock."""
+    session = Mock()
+    response = Mock(status_code=200, text='{"answer": "ok"}', headers={})
+    response.json.return_value = {'answer': 'ok', 'data': [{'url': 'https://img'}]}
+    session.request.return_value = response
+    with patch.object(http_client, 'get_session', return_value=session):
+        yield session
+
+def test_get_session_is_shared():
+    """Testa que a sessão HTTP é única por processo."""
+    http_client.close_session()
+    try:
+        assert http_client.get_session() is http_client.get_session()
+    finally:
+        http_client.close_session()
+
+def test_request_applies_default_timeout(mock_session):
+    """Testa que o REQUEST_TIMEOUT é aplicado por omissão."""
+    http_client.post("https://example.com", json={})
+    
+    _, kwargs = mock_session.request.call_args
+    assert kwargs['timeout'] == http_client.config.REQUEST_TIMEOUT
+
+def test_request_counts_transferred_bytes(mock_session):
+    """Testa a contagem dos bytes enviados e recebidos por host."""
+    response = mock_session.request.return_value
+    response.request.body = b'{"title": "SEO"}'
+    response.content = b'{"id": 1}'
+    
+    http_client.transfer_stats.reset()
+    http_client.post("https://bytes.test/wp-json/wp/v2/posts")
+    http_client.post("https://bytes.test/wp-json/wp/v2/posts", stream=True)
+    
+    assert http_client.transfer_stats.snapshot()['bytes.test'] == {'requests': 2, 'sent': 32, 'received': 9}
+
+def test_utils_client_uses_shared_session(dify_env, mock_session):
+    """Testa que o cliente de utils usa a sessão partilhada."""
+    client = UtilsDifyClient()
+    
+    assert client.generate_text("Olá") == "ok"
+    assert client.generate_image("Uma imagem")["url"] == "https://img"
+    assert mock_session.request.call_count == 2
+
+def test_integrations_client_uses_shared_session(dify_env, mock_session):
+    """Testa que o cliente de integrações usa a sessão partilhada."""
+    client = IntegrationsDifyClient()
+    
+    assert client.generate_content("Olá")["answer"] == "ok"
+    client.get_similar_content("Olá")
+    client.validate_content("<p>Olá</p>")
+    assert mock_session.request.call_count == 3
+
+def test_async_client_limits_concurrency(dify_env, monkeypatch):
+    """Testa que o semáforo global limita as chamadas simultâneas."""
+    import asyncio
+    import threading
+    import time
+    from src.config import config
+    from src.utils import async_dify
+    
+    monkeypatch.setattr(async_dify, 'aiohttp', None)
+    monkeypatch.setitem(config.get_config(), 'DIFY_MAX_CONCURRENCY', 2)
+    
+    lock = threading.Lock()
+    state = {'running': 0, 'peak': 0}
+    
+    def fake_post(endpoint, **kwargs):
+        with lock:
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+        time.sleep(0.02)
+        with lock:
+            state['running'] -= 1
+        response = Mock()
+        response.json.return_value = {'answer': kwargs['json']['query']}
+        return response
+    
+    monkeypatch.setattr(async_dify.http_client, 'post', fake_post)
+    
+    async def run():
+        client = async_dify.AsyncDifyClient()
+        return await asyncio.gather(*(client.generate_text(f"prompt {i}") for i in range(6)))
+    
+    results = asyncio.run(run())
+    
+    assert results == [f"prompt {i}" for i in range(6)]
+    assert state['peak'] == 2
+
+def test_async_client_aiohttp_retries_server_errors(dify_env, monkeypatch):
+    """Testa o transporte aiohttp contra um servidor local, com um 503 antes de cada resposta."""
+    import asyncio
+    import json
+    from aiohttp import web
+    from aiohttp.test_utils import TestServer
+    from src.config import config
+    from src.utils import async_dify
+    
+    monkeypatch.setitem(config.get_config(), 'RETRY_DELAY', 0)
+    calls = []
+    
+    async def completion(request):
+        payload = await request.json()
+        calls.append(payload['response_mode'])
+        if len(calls) % 2:
+            return web.Response(status=503)
+        if payload['response_mode'] == 'blocking':
+            return web.json_response({'answer': 'ok'})
+        events = [
+            {'event': 'message', 'answer': 'Olá'},
+            {'event': 'message', 'answer': ' mundo'},
+            {'event': 'message_end', 'metadata': {'usage': {'total_tokens': 42}}},
+        ]
+        body = ''.join(f"data: {json.dumps(event)}\n\n" for event in events)
+        return web.Response(text=body, content_type='text/event-stream')
+    
+    app = web.Application()
+    app.router.add_post('/v1/completion-messages', completion)
+    
+    async def run():
+        async with TestServer(app) as server:
+            monkeypatch.setenv("DIFY_API_URL", str(server.make_url('/v1')))
+            async with async_dify.AsyncDifyClient() as client:
+                text = await client.generate_text("Olá")
+                # A segunda chamada vem do cache em disco, sem pedido
+                assert await client.generate_text("Olá") == text
+                chunks = [chunk async for chunk in client.stream_completion("Olá")]
+            return text, chunks
+    
+    assert async_dify.aiohttp is not None
+    assert asyncio.run(run()) == ("ok", ["Olá", " mundo"])
+    assert calls == ['blocking', 'blocking', 'streaming', 'streaming']
+
+def test_utils_client_stream_completion(dify_env, mock_session):
+    """Testa o consumo de server-sent events do Dify."""
+    response = mock_session.request.return_value
+    response.__enter__ = Mock(return_value=response)
+    response.__exit__ = Mock(return_value=False)
+    response.iter_lines.return_value = iter([
+        'data: {"event": "message", "answer": "Olá"}',
+        '',
+        'event: ping',
+        'data: {"event": "message", "answer": " mundo"}',
+        'data: {"event": "message_end", "metadata": {"usage": {"total_tokens": 42}}}',
+        'data: {"event": "message", "answer": "ignorado"}',
+    ])
+    client = UtilsDifyClient()
+    client.rate_limiter = Mock()
+    
+    assert list(client.stream_completion("Olá")) == ["Olá", " mundo"]
+    _, kwargs = mock_session.request.call_args
+    assert kwargs['stream'] is True
+    assert kwargs['json']['response_mode'] == "streaming"
+    # O orçamento é acertado com o consumo indicado no message_end
+    estimated = client.rate_limiter.acquire.call_args.args[0]
+    client.rate_limiter.settle.assert_called_once_with(estimated, 42)
+
+def test_llm_cache_key_is_content_addressed():
+    """Testa que a chave depende de todos os parâmetros do pedido."""
+    key = llm_cache.LLMCache.make_key("/chat-messages", "Olá", 0.3, "kb")
+    
+    assert key == llm_cache.LLMCache.make_key("/chat-messages", "Olá", 0.3, "kb")
+    assert key != llm_cache.LLMCache.make_key("/chat-messages", "Olá", 0.7, "kb")
+    assert key != llm_cache.LLMCache.make_key("/chat-messages", "Olá", 0.3, "outra")
+
+def test_utils_client_caches_responses(dify_env, mock_session):
+    """Testa que pedidos repetidos são servidos pelo cache."""
+    client = UtilsDifyClient()
+    
+    assert client.generate_text("Olá") == "ok"
+    assert client.generate_text("Olá") == "ok"
+    assert client.generate_text("Olá", use_cache=False) == "ok"
+    assert mock_session.request.call_count == 2
+
+def test_integrations_client_skips_cache_in_conversation(dify_env, mock_session):
+    """Testa que pedidos numa conversa não usam o cache."""
+    client = IntegrationsDifyClient()
+    
+    client.generate_content("Olá")
+    client.generate_content("Olá")
+    client.generate_content("Olá", conversation_id="abc")
+    assert mock_session.request.call_count == 2
+
+def test_conversation_rerun_does_not_replay_first_section(dify_env):
+    """Testa que, com o cache quente, a primeira seção de uma conversa volta a ser pedida."""
+    from src.generators.content_generator import ContentGenerator
+    
+    client = IntegrationsDifyClient()
+    responses = iter([{'answer': '<p>ok</p>', 'conversation_id': f"conversa-{n}"} for n in range(10)])
+    with patch.object(client, '_post', side_effect=lambda *args: next(responses)) as post:
+        generator = ContentGenerator(client)
+        generator.generate_article("SEO Local", "blog-marketing-digital", reuse_conversation=True)
+        generator.generate_article("SEO Local", "blog-marketing-digital", reuse_conversation=True)
+    
+    assert post.call_count == 10
+    # A segunda execução abre uma conversa nova em vez de reutilizar a antiga
+    assert [call.args[1]['conversation_id'] for call in post.call_args_list[5:]] == [None] + ['conversa-5'] * 4
+
+def test_llm_cache_replay_mode(dify_env, mock_session, isolated_llm_cache):
+    """Testa que o modo replay nunca chama a API."""
+    client = IntegrationsDifyClient()
+    client.generate_content("Olá")
+    isolated_llm_cache.mode = "replay"
+    
+    assert client.generate_content("Olá")["answer"] == "ok"
+    with pytest.raises(DifyError):
+        client.generate_content("Outro prompt")
+    assert mock_session.request.call_count == 1
+
+def test_singleflight_coalesces_threads_and_tasks():
+    """Testa que chamadas simultâneas com a mesma chave partilham uma execução."""
+    import asyncio
+    import threading
+    import time
+    from src.utils.singleflight import SingleFlight
+    
+    group = SingleFlight()
+    calls = []
+    started = threading.Event()
+    
+    def slow_call():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return {'answer': 'partilhado'}
+    
+    results = []
+    leader = threading.Thread(target=lambda: results.append(group.do("k", slow_call)))
+    leader.start()
+    started.wait(1)
+    
+    follower = threading.Thread(target=lambda: results.append(group.do("k", slow_call)))
+    follower.start()
+    
+    async def async_follower():
+        return await group.do_async("k", lambda: asyncio.sleep(0, result={'answer': 'outro'}))
+    
+    results.append(asyncio.run(async_follower()))
+    leader.join()
+    follower.join()
+    
+    assert len(calls) == 1
+    assert results == [{'answer': 'partilhado'}] * 3
+    assert group.in_flight() == 0
+
+def test_utils_client_coalesces_identical_requests(dify_env, mock_session):
+    """Testa que pedidos idênticos em threads diferentes fazem uma só chamada HTTP."""
+    import threading
+    import time
+    
+    barrier = threading.Barrier(4)
+    response = mock_session.request.return_value
+    
+    def slow_request(*args, **kwargs):
+        time.sleep(0.1)
+        return response
+    
+    mock_session.request.side_effect = slow_request
+    client = UtilsDifyClient(cache=llm_cache.LLMCache(mode="off"))
+    results = []
+    
+    def worker():
+        barrier.wait()
+        results.append(client.generate_text("Mesmo prompt"))
+    
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert results == ["ok"] * 4
+    assert mock_session.request.call_count == 1
+
+def test_utils_client_uncached_request_is_not_coalesced(dify_env, mock_session):
+    """Testa que um pedido com use_cache=False não reutiliza um pedido idêntico em curso."""
+    import threading
+    import time
+    
+    response = mock_session.request.return_value
+    started = threading.Event()
+    
+    def slow_request(*args, **kwargs):
+        started.set()
+        time.sleep(0.1)
+        return response
+    
+    mock_session.request.side_effect = slow_request
+    client = UtilsDifyClient()
+    cached = threading.Thread(target=client.generate_text, args=("Mesmo prompt",))
+    cached.start()
+    started.wait()
+    
+    assert client.generate_text("Mesmo prompt", use_cache=False) == "ok"
+    cached.join()
+    assert mock_session.request.call_count == 2
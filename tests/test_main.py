@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes para o ponto de entrada da linha de comando.
+
+Autor: Descomplicar - Agência de Aceleração Digital
+https://descomplicar.pt
+"""
+
+import os
+import sys
+import subprocess
+from pathlib import Path
+from unittest.mock import patch
+from src import main as cli
+
+def test_native_mode_does_not_import_crewai():
+    """Testa que o modo nativo não importa o CrewAI e usa as mesmas opções."""
+    with patch.object(cli, 'validate_config'), \
+         patch('src.batch.BatchRunner.process', return_value={'post': {'id': 1}}) as process, \
+         patch('src.utils.wordpress.WordPressClient'), \
+         patch('src.utils.image.ImageGenerator'), \
+         patch('src.batch.DifyClient'), \
+         patch('src.generators.content_generator.ContentGenerator.format_title',
+               return_value="SEO Local: Guia Completo") as format_title:
+        code = cli.main([
+            "SEO Local", "--native", "--draft", "--category", "Marketing Digital", "--keywords", "seo", "local"
+        ])
+    
+    assert code == 0
+    assert 'crewai' not in sys.modules
+    item = process.call_args.args[0]
+    format_title.assert_called_once_with("SEO Local")
+    assert item['title'] == "SEO Local: Guia Completo"
+    assert item['category'] == "Marketing Digital"
+    assert item['keywords'] == ["seo", "local"]
+    assert item['tags'] == ["seo", "local"]
+
+def test_native_imports_are_light(tmp_path):
+    """Testa que importar os módulos do modo nativo não carrega dependências pesadas nem cria diretórios."""
+    code = (
+        "import sys, src.main, src.batch, src.utils.wordpress, src.utils.image, src.config.settings; "
+        "print(','.join(m for m in ('bs4', 'PIL', 'aiohttp', 'dotenv') if m in sys.modules))"
+    )
+    root = Path(__file__).resolve().parent.parent
+    result = subprocess.run(
+        [sys.executable, '-c', code],
+        cwd=tmp_path,
+        env=dict(os.environ, PYTHONPATH=str(root)),
+        capture_output=True,
+        text=True
+    )
+    
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ''
+    assert not any(tmp_path.iterdir())
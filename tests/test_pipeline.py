@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes para o executor de etapas em grafo.
+
+Autor: Descomplicar - Agência de Aceleração Digital
+https://descomplicar.pt
+"""
+
+import threading
+import pytest
+from src.utils.exceptions import PipelineError
+from src.utils.pipeline import Pipeline
+
+def test_pipeline_runs_independent_stages_concurrently():
+    """Testa que etapas independentes correm em paralelo e as dependentes esperam."""
+    both_started = threading.Barrier(2, timeout=2)
+    
+    def text(title):
+        both_started.wait()
+        return f"<p>{title}</p>"
+    
+    def image(title):
+        both_started.wait()
+        return f"{title}.webp"
+    
+    pipeline = (
+        Pipeline()
+        .add('text', text, requires=['title'])
+        .add('image', image, requires=['title'])
+        .add('post', lambda text, image: (text, image), requires=['text', 'image'])
+    )
+    
+    results = pipeline.run(title="SEO")
+    
+    assert results['post'] == ("<p>SEO</p>", "SEO.webp")
+    assert set(pipeline.last_timings) == {'text', 'image', 'post'}
+    assert pipeline.last_timings['post']['start'] >= pipeline.last_timings['text']['start']
+
+def test_pipeline_failure_cancels_dependents():
+    """Testa que a falha de uma etapa é reportada e as dependentes não correm."""
+    called = []
+    
+    def fail():
+        raise RuntimeError("502")
+    
+    pipeline = Pipeline().add('upload', fail).add('post', lambda upload: called.append(upload), requires=['upload'])
+    
+    with pytest.raises(PipelineError, match="upload"):
+        pipeline.run()
+    assert called == []
+
+def test_pipeline_rejects_cycles_and_unknown_dependencies():
+    """Testa a validação do grafo antes da execução."""
+    with pytest.raises(ValueError, match="circulares"):
+        Pipeline().add('a', lambda b: b, requires=['b']).add('b', lambda a: a, requires=['a']).run()
+    with pytest.raises(ValueError, match="inexistentes"):
+        Pipeline().add('a', lambda x: x, requires=['x']).run()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes para a camada de resiliência (novas tentativas e circuit breaker).
+
+Autor: Descomplicar - Agência de Aceleração Digital
+https://descomplicar.pt
+"""
+
+import socket
+import xmlrpc.client
+import pytest
+import requests
+from unittest.mock import Mock, patch
+from src.utils import http_client
+from src.utils.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    DeadlineExceededError,
+    RetryPolicy,
+    call_with_retry,
+    get_breaker,
+    parse_retry_after,
+)
+
+def make_response(status_code, headers=None):
+    """Cria uma resposta HTTP simulada."""
+    return Mock(status_code=status_code, headers=headers or {})
+
+@pytest.fixture
+def no_sleep():
+    """Evita esperas reais durante os testes."""
+    with patch('src.utils.http_client.time.sleep') as sleep:
+        yield sleep
+
+def test_retry_policy_backoff_is_bounded():
+    """Testa que o backoff com jitter respeita os limites."""
+    policy = RetryPolicy(max_retries=5, base_delay=1, max_delay=4)
+    
+    for attempt in range(6):
+        assert 0 <= policy.backoff(attempt) <= min(4, 2 ** attempt)
+
+def test_parse_retry_after():
+    """Testa a interpretação do cabeçalho Retry-After."""
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("inválido") is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+def test_request_retries_on_server_error(no_sleep):
+    """Testa novas tentativas em 503 e respeito pelo Retry-After."""
+    session = Mock()
+    session.request.side_effect = [
+        make_response(503, {'Retry-After': '2'}),
+        make_response(200),
+    ]
+    
+    with patch.object(http_client, 'get_session', return_value=session):
+        response = http_client.get("https://retry.test/api", retry=RetryPolicy(max_retries=3))
+    
+    assert response.status_code == 200
+    assert session.request.call_count == 2
+    no_sleep.assert_called_once_with(2.0)
+
+def test_post_is_not_repeated_after_it_may_have_been_processed(no_sleep):
+    """Testa que um POST com 502 ou timeout de leitura é enviado uma única vez."""
+    session = Mock()
+    session.request.return_value = make_response(502)
+    
+    with patch.object(http_client, 'get_session', return_value=session):
+        assert http_client.post("https://posts.test/wp-json/wp/v2/posts").status_code == 502
+        assert session.request.call_count == 1
+        
+        session.request.reset_mock()
+        session.request.side_effect = requests.exceptions.ReadTimeout()
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            http_client.post("https://posts.test/wp-json/wp/v2/posts")
+        assert session.request.call_count == 1
+    no_sleep.assert_not_called()
+
+def test_post_is_repeated_when_not_processed(no_sleep):
+    """Testa que um POST é repetido após falha ao ligar ou 429."""
+    session = Mock()
+    session.request.side_effect = [
+        requests.exceptions.ConnectTimeout(),
+        make_response(429),
+        make_response(201),
+    ]
+    
+    with patch.object(http_client, 'get_session', return_value=session):
+        response = http_client.post("https://retry-post.test/api", retry=RetryPolicy(max_retries=3))
+    
+    assert response.status_code == 201
+    assert session.request.call_count == 3
+
+def test_xmlrpc_writes_only_retry_unsent_requests():
+    """Testa que as escritas XML-RPC só são repetidas se não chegaram ao servidor."""
+    from src.integrations.wordpress_client import _is_retryable_write
+    
+    assert _is_retryable_write(ConnectionRefusedError())
+    assert _is_retryable_write(xmlrpc.client.ProtocolError('url', 429, 'Too Many Requests', {}))
+    assert not _is_retryable_write(socket.timeout())
+    assert not _is_retryable_write(xmlrpc.client.ProtocolError('url', 502, 'Bad Gateway', {}))
+
+def test_request_returns_last_response_when_retries_exhausted(no_sleep):
+    """Testa que a última resposta é devolvida após esgotar as tentativas."""
+    session = Mock()
+    session.request.return_value = make_response(429)
+    
+    with patch.object(http_client, 'get_session', return_value=session):
+        response = http_client.get("https://exhausted.test/api", retry=RetryPolicy(max_retries=2))
+    
+    assert response.status_code == 429
+    assert session.request.call_count == 3
+
+def test_request_honours_deadline(no_sleep):
+    """Testa que o prazo total interrompe as novas tentativas."""
+    session = Mock()
+    session.request.return_value = make_response(503, {'Retry-After': '30'})
+    
+    with patch.object(http_client, 'get_session', return_value=session):
+        with pytest.raises(DeadlineExceededError):
+            http_client.get("https://deadline.test/api", deadline=5, retry=RetryPolicy(max_retries=3))
+    
+    assert session.request.call_count == 1
+    _, kwargs = session.request.call_args
+    assert kwargs['timeout'] <= 5
+
+def test_circuit_breaker_opens_and_recovers():
+    """Testa a abertura do circuito e o pedido de teste após o reset."""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0)
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+    
+    assert breaker.is_open
+    breaker.before_call()  # pedido de teste (meio-aberto)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    
+    breaker.record_success()
+    assert not breaker.is_open
+
+def test_request_fails_fast_when_circuit_open(no_sleep):
+    """Testa que um host em baixo deixa de receber pedidos."""
+    session = Mock()
+    session.request.side_effect = requests.exceptions.ConnectionError("down")
+    policy = RetryPolicy(max_retries=0)
+    
+    with patch.object(http_client, 'get_session', return_value=session):
+        for _ in range(http_client.get_breaker("https://down.test").failure_threshold):
+            with pytest.raises(requests.exceptions.ConnectionError):
+                http_client.get("https://down.test/api", retry=policy)
+        
+        with pytest.raises(CircuitOpenError):
+            http_client.get("https://down.test/api", retry=policy)
+
+def test_request_counts_one_failure_per_call(no_sleep):
+    """Testa que as novas tentativas de um pedido contam uma só falha no circuito."""
+    session = Mock()
+    session.request.side_effect = requests.exceptions.ConnectionError("down")
+    breaker = http_client.get_breaker("https://flaky.test")
+    
+    with patch.object(http_client, 'get_session', return_value=session):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            http_client.get("https://flaky.test/api", retry=RetryPolicy(max_retries=breaker.failure_threshold))
+    
+    assert session.request.call_count == breaker.failure_threshold + 1
+    assert not breaker.is_open
+
+@pytest.mark.parametrize('outcome', [
+    make_response(429),
+    make_response(404),
+    requests.exceptions.ChunkedEncodingError("truncated"),
+])
+def test_request_trial_never_leaves_circuit_stuck(no_sleep, outcome):
+    """Testa que o pedido de teste termina mesmo sem 2xx nem falha de ligação."""
+    host = f"https://trial-{id(outcome)}.test"
+    breaker = http_client.get_breaker(host)
+    breaker.reset_timeout = 0
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    session = Mock()
+    session.request.side_effect = [outcome, make_response(200)]
+    
+    with patch.object(http_client, 'get_session', return_value=session):
+        try:
+            http_client.get(f"{host}/api", retry=RetryPolicy(max_retries=0))
+        except requests.exceptions.ChunkedEncodingError:
+            pass
+        response = http_client.get(f"{host}/api", retry=RetryPolicy(max_retries=0))
+    
+    assert response.status_code == 200
+    assert not breaker.is_open
+
+def test_call_with_retry_ends_trial_on_unexpected_error():
+    """Testa que um erro fora de retry_on não bloqueia o circuito."""
+    breaker = get_breaker("xmlrpc://fault.test")
+    breaker.reset_timeout = 0
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    fault = xmlrpc.client.Fault(403, 'Forbidden')
+    
+    with pytest.raises(xmlrpc.client.Fault):
+        call_with_retry(Mock(side_effect=fault), "xmlrpc://fault.test", (OSError,))
+    
+    assert call_with_retry(lambda: 'ok', "xmlrpc://fault.test", (OSError,)) == 'ok'
+
+def test_rate_limiter_smooths_requests(tmp_path):
+    """Testa que o orçamento RPM atrasa pedidos em vez de os rejeitar."""
+    from src.utils.rate_limit import RateLimiter
+    
+    db_path = str(tmp_path / "ratelimit.sqlite3")
+    limiter = RateLimiter("teste", requests_per_minute=60, db_path=db_path)
+    
+    with patch("src.utils.rate_limit.time.time", return_value=1000.0):
+        waits = [limiter.reserve() for _ in range(62)]
+    
+    assert all(wait == 0 for wait in waits[:60])
+    assert 0.9 < waits[60] < 1.1
+    assert 1.9 < waits[61] < 2.1
+
+def test_rate_limiter_budget_is_shared(tmp_path):
+    """Testa que instâncias diferentes (processos) partilham o orçamento."""
+    from src.utils.rate_limit import RateLimiter
+    
+    db_path = str(tmp_path / "ratelimit.sqlite3")
+    first = RateLimiter("partilhado", requests_per_minute=0, tokens_per_minute=600, db_path=db_path)
+    second = RateLimiter("partilhado", requests_per_minute=0, tokens_per_minute=600, db_path=db_path)
+    
+    with patch("src.utils.rate_limit.time.time", return_value=1000.0):
+        assert first.reserve(tokens=600) == 0
+        # Consumiu menos 100 tokens do que o estimado: a diferença é devolvida
+        first.settle(estimated=600, actual=500)
+        assert second.reserve(tokens=100) == 0
+        assert 9.9 < second.reserve(tokens=100) < 10.1
+
+def test_rate_limiter_disabled_by_default(tmp_path):
+    """Testa que sem limites não há acesso à base de dados."""
+    from src.utils.rate_limit import RateLimiter
+    
+    limiter = RateLimiter("desativado", 0, 0, db_path=str(tmp_path / "nao-criado.sqlite3"))
+    
+    assert limiter.reserve(tokens=10_000) == 0
+    assert not (tmp_path / "nao-criado.sqlite3").exists()
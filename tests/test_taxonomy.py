@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes para o índice local de categorias e tags.
+
+Autor: Descomplicar - Agência de Aceleração Digital
+https://descomplicar.pt
+"""
+
+import json
+import time
+from unittest.mock import Mock, patch
+from src.utils.taxonomy import PER_PAGE, TaxonomyIndex
+
+API_URL = "https://exemplo.pt/wp-json/wp/v2"
+
+def page(terms, total_pages=1):
+    """Cria uma resposta paginada da API REST."""
+    response = Mock()
+    response.json.return_value = terms
+    response.headers = {'X-WP-TotalPages': str(total_pages)}
+    return response
+
+def make_index(tmp_path, **kwargs):
+    return TaxonomyIndex(API_URL, ('user', 'pass'), 'tags', path=str(tmp_path / 'tags.json'), **kwargs)
+
+def test_sync_reads_all_pages_and_persists(tmp_path):
+    """Testa que a sincronização percorre todas as páginas e grava o índice."""
+    pages = [
+        page([{'id': 1, 'name': 'SEO', 'slug': 'seo'}], total_pages=2),
+        page([{'id': 2, 'name': 'E-commerce &amp; Vendas', 'slug': 'e-commerce-vendas'}], total_pages=2),
+    ]
+    with patch('src.utils.taxonomy.http_client.get', side_effect=pages) as get:
+        index = make_index(tmp_path)
+        assert index.get_id('seo') == 1
+
+    assert get.call_count == 2
+    params = [call.kwargs['params'] for call in get.call_args_list]
+    assert [p['page'] for p in params] == [1, 2]
+    assert all(p['per_page'] == PER_PAGE for p in params)
+
+    # Uma nova instância resolve a partir do disco, sem pedidos
+    with patch('src.utils.taxonomy.http_client.get') as get:
+        index = make_index(tmp_path)
+        assert index.get_id('E-commerce & Vendas') == 2
+        assert index.get_id('e-commerce-vendas') == 2
+        assert index.get_name(1) == 'SEO'
+    get.assert_not_called()
+
+def test_unknown_name_reads_only_new_terms(tmp_path):
+    """Testa que um nome desconhecido só lê os termos posteriores à última leitura."""
+    with patch('src.utils.taxonomy.http_client.get', return_value=page([{'id': 5, 'name': 'SEO', 'slug': 'seo'}])):
+        index = make_index(tmp_path)
+        index.get_id('SEO')
+
+    newest_first = page([
+        {'id': 7, 'name': 'Vendas', 'slug': 'vendas'},
+        {'id': 5, 'name': 'SEO', 'slug': 'seo'},
+    ], total_pages=3)
+    with patch('src.utils.taxonomy.http_client.get', return_value=newest_first) as get:
+        assert index.get_id('Vendas') == 7
+        assert index.get_id('Inexistente', refresh=False) is None
+
+    get.assert_called_once()
+    assert get.call_args.kwargs['params']['order'] == 'desc'
+    assert json.loads((tmp_path / 'tags.json').read_text())['max_id'] == 7
+
+def test_expired_index_is_synced_again(tmp_path):
+    """Testa que um índice expirado é lido de novo da API."""
+    with patch('src.utils.taxonomy.http_client.get', return_value=page([{'id': 1, 'name': 'SEO', 'slug': 'seo'}])):
+        make_index(tmp_path).get_id('SEO')
+
+    renamed = page([{'id': 1, 'name': 'SEO Local', 'slug': 'seo'}])
+    with patch('src.utils.taxonomy.http_client.get', return_value=renamed) as get:
+        index = make_index(tmp_path, ttl=-1)
+        assert index.get_name(1) == 'SEO Local'
+    get.assert_called_once()
+
+def test_index_in_memory_is_synced_again_after_ttl(tmp_path):
+    """Testa que um processo longo volta a sincronizar o índice quando expira."""
+    with patch('src.utils.taxonomy.http_client.get', return_value=page([{'id': 1, 'name': 'SEO', 'slug': 'seo'}])):
+        index = make_index(tmp_path, ttl=3600)
+        index.get_id('SEO')
+
+    renamed = page([{'id': 1, 'name': 'SEO Local', 'slug': 'seo'}])
+    with patch('src.utils.taxonomy.http_client.get', return_value=renamed) as get:
+        assert index.get_name(1) == 'SEO'
+        get.assert_not_called()
+
+        with patch('src.utils.taxonomy.time.time', return_value=time.time() + 3601):
+            assert index.get_name(1) == 'SEO Local'
+    get.assert_called_once()
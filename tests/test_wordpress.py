@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes para o cliente REST do WordPress.
+
+Autor: Descomplicar - Agência de Aceleração Digital
+https://descomplicar.pt
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+from src.utils.media_index import MediaIndex
+from src.utils.taxonomy import TaxonomyIndex
+from src.utils.wordpress import WordPressClient
+
+def make_client(tmp_path):
+    """Cria um cliente com índices de taxonomia num diretório temporário."""
+    client = WordPressClient()
+    client.categories = TaxonomyIndex(client.api_url, client.auth, 'categories', path=str(tmp_path / 'categories.json'))
+    client.tags = TaxonomyIndex(client.api_url, client.auth, 'tags', path=str(tmp_path / 'tags.json'))
+    client.media = MediaIndex(client.api_url, path=str(tmp_path / 'media.json'))
+    return client
+
+def response(data, status_code=200):
+    """Cria uma resposta HTTP simulada."""
+    result = Mock(status_code=status_code, headers={'X-WP-TotalPages': '1'})
+    result.json.return_value = data
+    if status_code >= 400:
+        result.raise_for_status.side_effect = Exception(f"HTTP {status_code}")
+    return result
+
+def test_create_tags_resolves_known_and_creates_missing(tmp_path):
+    """Testa que só as tags em falta são criadas e os IDs seguem a ordem dos nomes."""
+    client = make_client(tmp_path)
+    listing = response([{'id': 3, 'name': 'SEO', 'slug': 'seo'}])
+
+    def create(url, **kwargs):
+        name = kwargs['json']['name']
+        return response({'id': {'Vendas': 8, 'Local': 9}[name], 'name': name, 'slug': name.lower()}, 201)
+
+    with patch('src.utils.taxonomy.http_client.get', return_value=listing) as get, \
+         patch('src.utils.wordpress.http_client.post', side_effect=create) as post:
+        assert client._create_tags(['Vendas', 'seo', 'Local', '', 'vendas']) == [8, 3, 9, 8]
+
+    # Uma listagem (sincronização inicial) e um POST por tag em falta
+    assert get.call_count == 1
+    assert sorted(call.kwargs['json']['name'] for call in post.call_args_list) == ['Local', 'Vendas']
+
+    with patch('src.utils.taxonomy.http_client.get') as get, \
+         patch('src.utils.wordpress.http_client.post') as post:
+        assert client._create_tags(['Local', 'SEO']) == [9, 3]
+    get.assert_not_called()
+    post.assert_not_called()
+
+def test_create_tag_uses_existing_term_on_race(tmp_path):
+    """Testa que uma tag criada entretanto por outro processo é reutilizada."""
+    client = make_client(tmp_path)
+    exists = response({'code': 'term_exists', 'data': {'status': 400, 'term_id': 42}}, 400)
+
+    with patch('src.utils.taxonomy.http_client.get', return_value=response([])), \
+         patch('src.utils.wordpress.http_client.post', return_value=exists):
+        assert client._create_tags(['Marketing']) == [42]
+
+    assert client.tags.get_id('marketing', refresh=False) == 42
+
+def test_format_post_data_resolves_names_in_one_request(tmp_path):
+    """Testa que os nomes das tags desconhecidas são lidos num único pedido."""
+    client = make_client(tmp_path)
+    with patch('src.utils.taxonomy.http_client.get', side_effect=[
+        response([{'id': 1, 'name': 'Blog', 'slug': 'blog'}]),
+        response([{'id': 3, 'name': 'SEO', 'slug': 'seo'}]),
+    ]):
+        client.categories.get_id('Blog')
+        client.tags.get_id('SEO')
+
+    post = {'id': 10, 'status': 'draft', 'categories': [1], 'tags': [3, 7, 8]}
+    extra = response([{'id': 7, 'name': 'Vendas', 'slug': 'vendas'}, {'id': 8, 'name': 'Local', 'slug': 'local'}])
+    with patch('src.utils.taxonomy.http_client.get', return_value=extra) as get:
+        data = client._format_post_data(post)
+
+    get.assert_called_once()
+    assert get.call_args.kwargs['params']['include'] == '7,8'
+    assert data['category_name'] == 'Blog'
+    assert data['tag_names'] == ['SEO', 'Vendas', 'Local']
+    # Os campos renderizados só aparecem se a resposta os trouxer
+    assert 'content' not in data
+    assert client._format_post_data(dict(post, content={'rendered': '<p>Texto</p>'}))['content'] == '<p>Texto</p>'
+
+    with patch('src.utils.taxonomy.http_client.get') as get:
+        data = client._format_post_data(dict(post, tags=[9]), enrich=False)
+    get.assert_not_called()
+    assert 'category_name' not in data and 'tag_names' not in data
+    assert 'content' not in data
+
+def test_create_post_requests_only_used_fields(tmp_path):
+    """Testa que a criação do post pede só os campos usados da resposta."""
+    client = make_client(tmp_path)
+    created = response(
+        {'id': 10, 'link': 'https://exemplo.pt/seo', 'slug': 'seo', 'status': 'draft', 'featured_media': 4}, 201
+    )
+
+    with patch('src.utils.wordpress.http_client.post', return_value=created) as post:
+        data = client.create_post("SEO", "<p>Texto</p>", category_id=1, tag_ids=[3], featured_media_id=4, enrich=False)
+
+    assert post.call_args.kwargs['params'] == {'_fields': 'id,link,slug,status,featured_media'}
+    assert data['link'] == 'https://exemplo.pt/seo'
+    assert 'content' not in data
+    
+    # Por omissão o corpo renderizado não é devolvido; só com detail=True
+    with patch('src.utils.wordpress.http_client.post', return_value=created) as post:
+        client.create_post("SEO", "<p>Texto</p>", category_id=1, tag_ids=[], featured_media_id=4)
+    assert post.call_args.kwargs['params'] == {'_fields': 'id,link,slug,status,featured_media,categories,tags'}
+    
+    with patch('src.utils.wordpress.http_client.post', return_value=created) as post:
+        client.create_post("SEO", "<p>Texto</p>", category_id=1, tag_ids=[], featured_media_id=4, detail=True)
+    assert {'title', 'content', 'excerpt'} <= set(post.call_args.kwargs['params']['_fields'].split(','))
+
+def test_identical_images_are_uploaded_once(tmp_path):
+    """Testa que imagens com o mesmo conteúdo reutilizam o anexo já enviado."""
+    client = make_client(tmp_path)
+    for name in ('a.webp', 'b.webp'):
+        (tmp_path / name).write_bytes(b'mesma imagem')
+    (tmp_path / 'c.webp').write_bytes(b'outra imagem')
+    uploads = iter([response({'id': 11}, 201), response({'id': 12}, 201)])
+
+    with patch('src.utils.wordpress.http_client.post', side_effect=lambda *a, **k: next(uploads)) as post:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            ids = list(executor.map(client.upload_media, [tmp_path / 'a.webp'] * 3 + [tmp_path / 'b.webp']))
+        assert client.upload_media(tmp_path / 'c.webp') == 12
+
+    assert ids == [11, 11, 11, 11]
+    assert post.call_count == 2
+    # O índice persiste entre instâncias
+    assert MediaIndex(client.api_url, path=str(tmp_path / 'media.json')).get_or_upload(b'mesma imagem', Mock()) == 11
+
+def test_reconcile_media_drops_deleted_attachments(tmp_path):
+    """Testa que os anexos apagados no WordPress saem do índice."""
+    client = make_client(tmp_path)
+    client.media.add('a' * 64, 11)
+    client.media.add('b' * 64, 12)
+
+    with patch('src.utils.wordpress.http_client.get', return_value=response([{'id': 12}])) as get:
+        assert client.reconcile_media() == 1
+
+    assert get.call_args.kwargs['params']['include'] == '11,12'
+    assert client.media.get('a' * 64) is None
+    assert client.media.get('b' * 64) == 12